@@ -0,0 +1,225 @@
+"""
+Gateway replay benchmark - RSS and event-handling CPU per intents/cache profile
+
+Feeds synthetic large-guild gateway traffic (GUILD_CREATE, member chunks, presences, joins,
+typing, messages) through discord.py's own ConnectionState parsers, with only the events each
+profile's intents would actually receive. Every profile runs in a fresh process so RSS is
+comparable.
+
+Usage: python bench/gateway_replay.py [--guilds 20] [--members 5000] [--events 50000]
+Relies on discord.py 2.3 internals (ConnectionState, ChunkRequest).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from discord.state import ConnectionState, ChunkRequest
+
+from utils.intents import PROFILES, gateway_options
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+ONLINE_FRACTION = 0.15   # share of members online (sent with presences in GUILD_CREATE)
+VOICE_FRACTION = 0.005   # share of members in voice (always sent in GUILD_CREATE)
+CHUNK_SIZE = 1000
+
+
+# ====================== SYNTHETIC PAYLOADS ====================== #
+def snowflake(n: int) -> str:
+    return str((1_500_000_000_000 << 22) + n)
+
+
+def user(uid: int) -> dict:
+    return {"id": snowflake(uid), "username": f"user{uid}", "discriminator": "0", "avatar": None, "global_name": f"User {uid}"}
+
+
+def member(uid: int, roles: list) -> dict:
+    return {"user": user(uid), "roles": roles, "joined_at": TIMESTAMP, "deaf": False, "mute": False, "nick": None, "flags": 0}
+
+
+def presence(uid: int, guild_id: str) -> dict:
+    return {
+        "user": {"id": snowflake(uid)},
+        "guild_id": guild_id,
+        "status": random.choice(("online", "idle", "dnd")),
+        "activities": [{"name": random.choice(("A Game", "Music", "Coding")), "type": 0, "created_at": 1_700_000_000_000}],
+        "client_status": {"desktop": "online"}
+    }
+
+
+class Guild:
+    """IDs for one synthetic guild"""
+
+    def __init__(self, index: int, members: int):
+        base = index * 10_000_000
+        self.id = snowflake(base)
+        self.text_channel = snowflake(base + 1)
+        self.voice_channel = snowflake(base + 2)
+        self.roles = [snowflake(base + 10 + r) for r in range(20)]
+        self.member_ids = [base + 1000 + m for m in range(members)]
+        self.next_member = base + 1000 + members
+
+    def member(self, uid: int) -> dict:
+        return member(uid, random.sample(self.roles, 3))
+
+    def create_payload(self, options: dict) -> dict:
+        intents = options["intents"]
+        online = self.member_ids[:int(len(self.member_ids) * ONLINE_FRACTION)]
+        voice = self.member_ids[:max(1, int(len(self.member_ids) * VOICE_FRACTION))]
+        # Large guilds only ship online members (with presences) or voice members up front
+        sent = online if intents.presences else voice
+        return {
+            "id": self.id, "name": f"Guild {self.id}", "owner_id": snowflake(1), "large": True,
+            "member_count": len(self.member_ids), "afk_timeout": 300, "features": [],
+            "roles": [{"id": self.id, "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False}] +
+                     [{"id": r, "name": f"role{i}", "permissions": "0", "position": i + 1, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False} for i, r in enumerate(self.roles)],
+            "channels": [
+                {"id": self.text_channel, "type": 0, "name": "general", "position": 0, "permission_overwrites": []},
+                {"id": self.voice_channel, "type": 2, "name": "Voice", "position": 1, "permission_overwrites": [], "bitrate": 64000, "user_limit": 0}
+            ],
+            "members": [self.member(uid) for uid in sent],
+            "presences": [presence(uid, self.id) for uid in online] if intents.presences else [],
+            "voice_states": [
+                {"user_id": snowflake(uid), "channel_id": self.voice_channel, "session_id": "s", "deaf": False, "mute": False,
+                 "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False}
+                for uid in voice
+            ] if intents.voice_states else [],
+            "emojis": [], "stickers": [], "threads": [], "stage_instances": [], "guild_scheduled_events": []
+        }
+
+    def chunks(self, nonce: str, with_presences: bool):
+        total = -(-len(self.member_ids) // CHUNK_SIZE)
+        for index in range(total):
+            ids = self.member_ids[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+            yield {
+                "guild_id": self.id, "nonce": nonce, "chunk_index": index, "chunk_count": total,
+                "members": [self.member(uid) for uid in ids],
+                "presences": [presence(uid, self.id) for uid in ids[:int(len(ids) * ONLINE_FRACTION)]] if with_presences else []
+            }
+
+    def message(self, n: int, with_content: bool) -> dict:
+        uid = random.choice(self.member_ids)
+        return {
+            "id": snowflake(9_000_000_000 + n), "channel_id": self.text_channel, "guild_id": self.id, "type": 0,
+            "author": user(uid), "member": {k: v for k, v in self.member(uid).items() if k != "user"},
+            "content": f"$help message number {n}" if with_content else "", "timestamp": TIMESTAMP,
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": [], "pinned": False
+        }
+
+
+# ====================== REPLAY (child process) ====================== #
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, in KB on Linux
+
+
+async def replay(profile: str, guild_count: int, member_count: int, event_count: int) -> dict:
+    random.seed(727)
+    options = gateway_options(profile)
+    intents = options["intents"]
+    state = ConnectionState(dispatch=lambda *a, **k: None, handlers={}, hooks={}, http=None, **options)
+    guilds = [Guild(i, member_count) for i in range(guild_count)]
+    loop = asyncio.get_running_loop()
+
+    # Build the whole replay up front so only parsing is timed
+    startup = []
+    for guild in guilds:
+        startup.append((state._add_guild_from_data, guild.create_payload(options)))
+        if options.get("chunk_guilds_at_startup"):
+            request = ChunkRequest(int(guild.id), loop, state._get_guild, cache=True)
+            state._chunk_requests[request.nonce] = request
+            startup += [(state.parse_guild_members_chunk, chunk) for chunk in guild.chunks(request.nonce, intents.presences)]
+
+    # Steady-state traffic; each event type only arrives if its intent is enabled
+    kinds = []
+    if intents.presences:
+        kinds += ["presence"] * 6  # presence updates dominate real gateway traffic
+    if intents.guild_typing:
+        kinds += ["typing"] * 2
+    if intents.guild_messages:
+        kinds += ["message"] * 2
+    if intents.members:
+        kinds += ["join"]
+    traffic = []
+    for n in range(event_count if kinds else 0):
+        guild = random.choice(guilds)
+        kind = random.choice(kinds)
+        if kind == "presence":
+            traffic.append((state.parse_presence_update, presence(random.choice(guild.member_ids), guild.id)))
+        elif kind == "typing":
+            uid = random.choice(guild.member_ids)
+            traffic.append((state.parse_typing_start, {"channel_id": guild.text_channel, "guild_id": guild.id,
+                                                       "user_id": snowflake(uid), "timestamp": 1_700_000_000,
+                                                       "member": guild.member(uid)}))
+        elif kind == "message":
+            traffic.append((state.parse_message_create, guild.message(n, intents.message_content)))
+        else:
+            uid = guild.next_member
+            guild.next_member += 1
+            traffic.append((state.parse_guild_member_add, dict(guild.member(uid), guild_id=guild.id)))
+
+    baseline = rss_mb()
+    cpu_start = time.process_time()
+    for parse, payload in startup:
+        parse(payload)
+    startup_cpu = time.process_time() - cpu_start
+    for parse, payload in traffic:
+        parse(payload)
+    cpu = time.process_time() - cpu_start
+    events = len(startup) + len(traffic)
+
+    cached = sum(len(g._members) for g in state._guilds.values())
+    return {
+        "profile": profile,
+        "events": events,
+        "cpu_s": round(cpu, 3),
+        "startup_cpu_s": round(startup_cpu, 3),
+        "us_per_event": round(cpu / events * 1e6, 1) if events else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - baseline, 1),
+        "cached_members": cached
+    }
+
+
+# ====================== DRIVER ====================== #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--members", type=int, default=5000, help="members per guild")
+    parser.add_argument("--events", type=int, default=50000, help="steady-state events after startup")
+    parser.add_argument("--profile", choices=PROFILES, help="run one profile in this process (used internally)")
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(asyncio.run(replay(args.profile, args.guilds, args.members, args.events))))
+        return
+
+    print(f"Replaying {args.guilds} guilds x {args.members} members, {args.events} events per profile\n")
+    print(f"{'profile':<10}{'events':>10}{'startup s':>11}{'cpu s':>10}{'us/event':>10}{'rss MB':>10}{'growth MB':>11}{'members':>10}")
+    for profile in PROFILES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--profile", profile, "--guilds", str(args.guilds),
+             "--members", str(args.members), "--events", str(args.events)],
+            capture_output=True, text=True, check=True
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['profile']:<10}{r['events']:>10}{r['startup_cpu_s']:>11}{r['cpu_s']:>10}{r['us_per_event']:>10}"
+              f"{r['rss_mb']:>10}{r['rss_growth_mb']:>11}{r['cached_members']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Playlist import benchmark - tracks resolved per second against a local Lavalink stand-in
+
+Starts an aiohttp server that answers Lavalink v4 /loadtracks requests after a configurable
+latency (plus the websocket handshake, so the node reports as available), points a real
+lavalink.Client at it and imports the same list of queries one by one and then through
+PlaylistImport at several concurrency limits. The search cache is bypassed so every query
+reaches the stand-in.
+
+Usage: python bench/playlist_import.py [--tracks 1000] [--latency 0.15] [--jitter 0.05]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import lavalink
+from aiohttp import web
+from lavalink.utils import encode_track
+
+from utils.music.importer import PlaylistImport
+from utils.music.queue import TrackQueue
+from utils.music.search import ResolvedTracks
+
+PASSWORD = "bench"
+REQUESTER = 1_500_000_000_000_000_000
+
+
+# ====================== LAVALINK STAND-IN ====================== #
+def track_json(query: str, n: int) -> dict:
+    identifier = f"{abs(hash((query, n))) % 10 ** 11:011d}"
+    info = {
+        "title": f"{query} (result {n})",
+        "author": "Bench Artist",
+        "length": 200_000,
+        "identifier": identifier,
+        "isStream": False,
+        "uri": f"https://www.youtube.com/watch?v={identifier}",
+        "sourceName": "youtube",
+        "position": 0,
+        "artworkUrl": None,
+        "isrc": None,
+        "isSeekable": True
+    }
+    return {"encoded": encode_track(info)[1], "info": info, "pluginInfo": {}, "userData": {}}
+
+
+def stand_in(latency: float, jitter: float, miss_rate: float) -> web.Application:
+    counters = {"requests": 0, "peak": 0, "active": 0}
+
+    async def websocket(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"op": "ready", "resumed": False, "sessionId": "bench"})
+        async for _ in ws:
+            pass
+        return ws
+
+    async def load_tracks(request):
+        counters["requests"] += 1
+        counters["active"] += 1
+        counters["peak"] = max(counters["peak"], counters["active"])
+        try:
+            await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        finally:
+            counters["active"] -= 1
+        query = request.query["identifier"].partition(":")[2]
+        if random.random() < miss_rate:
+            return web.json_response({"loadType": "empty", "data": {}})
+        return web.json_response({"loadType": "search", "data": [track_json(query, n) for n in range(5)]})
+
+    app = web.Application()
+    app["counters"] = counters
+    app.router.add_get("/v4/websocket", websocket)
+    app.router.add_get("/v4/loadtracks", load_tracks)
+    return app
+
+
+# ====================== IMPORT SIDE ====================== #
+class NodeResolver:
+    """TrackResolver without its caches - every lookup is a node request"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def resolve(self, query: str) -> ResolvedTracks:
+        results = await self.client.get_tracks(f"ytsearch:{query}")
+        return ResolvedTracks(results.load_type, None, tuple(base64.b64decode(t.track) for t in results.tracks[:5]))
+
+
+class BenchPlayer:
+    """Just enough of QueuePlayer for an import: a queue and a play() that starts the next entry"""
+
+    def __init__(self):
+        self.queue = TrackQueue()
+        self.current = None
+        self.is_connected = True
+
+    @property
+    def is_playing(self) -> bool:
+        return self.current is not None
+
+    async def play(self):
+        self.current = self.queue.pop_next()
+
+
+async def run_import(resolver, queries, concurrency: int, interval: float) -> tuple:
+    edits = 0
+
+    async def progress(job):
+        nonlocal edits
+        edits += 1
+
+    player = BenchPlayer()
+    job = PlaylistImport(resolver, player, queries, REQUESTER, concurrency=concurrency,
+                         progress=progress, progress_interval=interval)
+    await job.run()
+    return job, edits
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15, help="mean seconds per /loadtracks")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--miss-rate", type=float, default=0.02, help="share of queries with no results")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--progress-interval", type=float, default=3.0)
+    args = parser.parse_args()
+    random.seed(727)
+
+    app = stand_in(args.latency, args.jitter, args.miss_rate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = lavalink.Client(1)
+    client.add_node("127.0.0.1", port, PASSWORD, "us", "bench")
+    while not client.node_manager.available_nodes:
+        await asyncio.sleep(0.05)
+    resolver = NodeResolver(client)
+    queries = [f"bench artist song {n}" for n in range(args.tracks)]
+
+    print(f"{args.tracks} queries, node latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f}ms\n")
+    print(f"{'mode':<22}{'seconds':>9}{'tracks/s':>10}{'first track':>13}{'edits':>7}{'node peak':>11}")
+    baseline = None
+    for concurrency in [1] + args.concurrency:
+        app["counters"]["peak"] = 0
+        job, edits = await run_import(resolver, queries, concurrency, args.progress_interval)
+        baseline = baseline or job.rate
+        label = "one by one" if concurrency == 1 else f"concurrency {concurrency}"
+        print(f"{label:<22}{job.elapsed:>9.1f}{job.rate:>10.1f}{job.first_track_seconds * 1000:>11.0f}ms"
+              f"{edits:>7}{app['counters']['peak']:>11}   {job.rate / baseline:.1f}x")
+
+    await client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
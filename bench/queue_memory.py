@@ -0,0 +1,119 @@
+"""
+Music queue benchmark - memory per queued track and per-operation cost
+
+Fills a TrackQueue with synthetic YouTube tracks and compares its memory against the list of
+lavalink.AudioTrack objects DefaultPlayer would keep, then times each queue operation.
+Memory is measured with tracemalloc, so it counts only what the queue itself allocates.
+
+Usage: python bench/queue_memory.py [--tracks 50000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from lavalink import AudioTrack
+from lavalink.utils import encode_track
+
+from utils.music.queue import QueueEntry, TrackQueue
+
+REQUESTER = 1_500_000_000_000_000_000
+
+
+# ====================== SYNTHETIC TRACKS ====================== #
+def track_info(n: int) -> dict:
+    identifier = f"{n:011d}"
+    return {
+        "title": f"Artist {n % 500} - Song Title Number {n} (Official Video)",
+        "author": f"Artist {n % 500}",
+        "length": random.randint(120_000, 420_000),
+        "identifier": identifier,
+        "isStream": False,
+        "uri": f"https://www.youtube.com/watch?v={identifier}",
+        "sourceName": "youtube",
+        "position": 0,
+        "artworkUrl": f"https://i.ytimg.com/vi/{identifier}/maxresdefault.jpg",
+        "isrc": None,
+        "isSeekable": True
+    }
+
+
+def rest_payloads(count: int) -> list:
+    """Track objects shaped like Lavalink's /loadtracks response, as raw JSON"""
+    payloads = []
+    for n in range(count):
+        info = track_info(n)
+        _, encoded = encode_track(info)
+        payloads.append(json.dumps({"encoded": encoded, "info": info, "pluginInfo": {}, "userData": {}}))
+    return payloads
+
+
+# ====================== MEASUREMENTS ====================== #
+def measure(build) -> tuple:
+    """(bytes allocated by build(), the object built) - the object is kept alive while measuring"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, built
+
+
+def timed(label: str, count: int, op):
+    start = time.perf_counter()
+    for _ in range(count):
+        op()
+    took = time.perf_counter() - start
+    print(f"{label:<28}{took / count * 1e6:>10.2f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=50000)
+    args = parser.parse_args()
+    random.seed(727)
+
+    payloads = rest_payloads(args.tracks)
+
+    # What DefaultPlayer keeps: the AudioTrack objects parsed from the response
+    list_bytes, tracks = measure(lambda: [AudioTrack(json.loads(payload), REQUESTER) for payload in payloads])
+
+    def build_queue():
+        queue = TrackQueue()
+        queue.extend(QueueEntry.from_track(AudioTrack(json.loads(payload), REQUESTER)) for payload in payloads)
+        queue.take_changes()  # as after the first snapshot
+        return queue
+    queue_bytes, queue = measure(build_queue)
+
+    n = args.tracks
+    print(f"{n} tracks\n")
+    print(f"{'structure':<28}{'total MB':>10}{'bytes/track':>13}")
+    print(f"{'list[AudioTrack]':<28}{list_bytes / 1e6:>10.1f}{list_bytes / n:>13.0f}")
+    print(f"{'TrackQueue[QueueEntry]':<28}{queue_bytes / 1e6:>10.1f}{queue_bytes / n:>13.0f}")
+    print(f"{'  of which blob bytes':<28}{'':>10}{sum(len(e.blob) for e in queue.page(0, n)) / n:>13.0f}")
+    print(f"\nreduction: {list_bytes / queue_bytes:.1f}x\n")
+
+    ops = 10000
+    entries = [QueueEntry.from_track(track, REQUESTER) for track in tracks[:ops]]
+    it = iter(entries)
+    timed("append", ops, lambda: queue.append(next(it)))
+    timed("page (10)", ops, lambda: queue.page(random.randrange(len(queue) - 10), 10))
+    timed("move (random)", ops, lambda: queue.move(random.randrange(len(queue)), random.randrange(len(queue))))
+    timed("remove (random)", ops // 10, lambda: queue.remove(random.randrange(len(queue))))
+    timed("shuffle", ops, queue.shuffle)
+    timed("pop_next (shuffled)", ops, queue.pop_next)
+    timed("decode one entry", ops, lambda: queue.peek(0).decode())
+    timed("list.pop(0) for comparison", ops // 10, lambda: tracks.pop(0))
+    rewrite, rows, deletes = queue.take_changes()
+    print(f"\nsnapshot delta after the timed operations ({len(queue)} tracks left): {len(rows)} rows written, "
+          f"{len(deletes)} deleted (full rewrite: {rewrite})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Welcome render benchmark - per-join embed rendering, old replace path vs compiled templates
+
+Renders the same welcome settings for many synthetic members with the pre-compilation code
+(12 str.replace calls plus parse_color rebuilding its color map on every join) and with
+CompiledWelcome, whose templates and color are built once per guild. Both paths build the
+full discord.Embed, so the difference is only in templating.
+
+Usage: python bench/welcome_render.py [--joins 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import discord
+
+from cogs.customaddons.welcome import CompiledWelcome
+
+SETTINGS = {
+    "title": "👋 Welcome to {server}, {username}!",
+    "description": "Hey {user}, you are member #{membercount} of {server}. Read the rules and have fun! 🎉",
+    "footer": "{username} • {server} • {membercount} members",
+    "color": "dark_purple",
+    "thumbnail": "https://cdn.example.com/welcome/thumb.png",
+    "image": "https://cdn.example.com/welcome/banner.png",
+}
+
+
+# ====================== SYNTHETIC MEMBERS ====================== #
+class FakeGuild:
+    def __init__(self):
+        self.name = "Benchmark Server"
+        self.member_count = 125_000
+
+
+class FakeMember:
+    """The attributes the welcome renderers read"""
+
+    avatar = None
+
+    def __init__(self, n: int, guild: FakeGuild):
+        self.id = 1_500_000_000_000_000_000 + n
+        self.name = f"member{n}"
+        self.mention = f"<@{self.id}>"
+        self.guild = guild
+        self.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def __str__(self):
+        return self.name
+
+
+# ====================== OLD RENDER PATH ====================== #
+def old_parse_color(color_str: str) -> discord.Color:
+    try:
+        if color_str.startswith('#'):
+            return discord.Color(int(color_str[1:], 16))
+        color_map = {
+            'red': discord.Color.red(), 'green': discord.Color.green(), 'blue': discord.Color.blue(),
+            'gold': discord.Color.gold(), 'purple': discord.Color.purple(), 'orange': discord.Color.orange(),
+            'teal': discord.Color.teal(), 'magenta': discord.Color.magenta(),
+            'dark_red': discord.Color.dark_red(), 'dark_green': discord.Color.dark_green(),
+            'dark_blue': discord.Color.dark_blue(), 'dark_purple': discord.Color.dark_purple(),
+            'dark_teal': discord.Color.dark_teal(), 'dark_magenta': discord.Color.dark_magenta(),
+            'dark_gold': discord.Color.dark_gold(), 'dark_orange': discord.Color.dark_orange(),
+        }
+        return color_map.get(color_str.lower(), discord.Color.green())
+    except Exception:
+        return discord.Color.green()
+
+
+def old_render(member, settings: dict) -> discord.Embed:
+    title = settings.get('title', f"👋 Welcome to {member.guild.name}!")
+    description = settings.get('description', "Welcome {user}! We're glad to have you here. 🎉")
+    footer = settings.get('footer', "Enjoy your stay!")
+    color = old_parse_color(settings.get('color', "#00ff00"))
+
+    title = title.replace("{user}", member.mention)
+    title = title.replace("{username}", str(member))
+    title = title.replace("{server}", member.guild.name)
+    title = title.replace("{membercount}", str(member.guild.member_count))
+
+    description = description.replace("{user}", member.mention)
+    description = description.replace("{username}", str(member))
+    description = description.replace("{server}", member.guild.name)
+    description = description.replace("{membercount}", str(member.guild.member_count))
+
+    footer = footer.replace("{user}", str(member))
+    footer = footer.replace("{username}", str(member))
+    footer = footer.replace("{server}", member.guild.name)
+    footer = footer.replace("{membercount}", str(member.guild.member_count))
+
+    embed = discord.Embed(title=title, description=description, color=color, timestamp=datetime.utcnow())
+    if settings.get('thumbnail'):
+        embed.set_thumbnail(url=settings['thumbnail'])
+    if settings.get('image'):
+        embed.set_image(url=settings['image'])
+    embed.set_footer(text=footer, icon_url=None)
+    return embed
+
+
+# ====================== MEASUREMENTS ====================== #
+def timed(label: str, members, render) -> float:
+    start = time.perf_counter()
+    for member in members:
+        render(member)
+    per_join = (time.perf_counter() - start) / len(members)
+    print(f"{label:<34}{per_join * 1e6:>10.2f} us/join{1 / per_join:>12,.0f} joins/s")
+    return per_join
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--joins", type=int, default=100000)
+    args = parser.parse_args()
+
+    guild = FakeGuild()
+    members = [FakeMember(n, guild) for n in range(args.joins)]
+
+    # Same output from both paths before timing anything
+    compiled = CompiledWelcome(SETTINGS)
+    for member in members[:100]:
+        assert old_render(member, SETTINGS).to_dict() | {"timestamp": None} == \
+            compiled.render(member).to_dict() | {"timestamp": None}
+
+    print(f"{args.joins} joins, {len(compiled.names)} placeholders used\n")
+    old = timed("12x str.replace + parse_color", members, lambda m: old_render(m, SETTINGS))
+    new = timed("CompiledWelcome.render", members, compiled.render)
+    cold = timed("compile + render (cache miss)", members, lambda m: CompiledWelcome(SETTINGS).render(m))
+    print(f"\nspeedup: {old / new:.2f}x with a warm compile cache, {old / cold:.2f}x compiling every join")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Cluster launcher - runs the bot as several processes, each an AutoShardedBot over its own shard range
+Usage: python cluster.py   (python main.py still runs everything in one process)
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.config import Config
+from utils.emotes import Emotes
+from utils.cluster import ClusterSupervisor, fetch_gateway_info
+import main as bot
+
+
+def launch():
+    if not Config.BOT_TOKEN:
+        print(f"{Emotes.ERROR} Bot token missing! Please set it in config.py or .env")
+        return
+
+    recommended, max_concurrency = asyncio.run(fetch_gateway_info(Config.BOT_TOKEN))
+    shard_count = Config.SHARD_COUNT or recommended
+    clusters = Config.CLUSTER_COUNT or os.cpu_count() or 1
+    ClusterSupervisor(bot.run_worker, shard_count, clusters, max_concurrency).run()
+
+
+if __name__ == "__main__":
+    launch()
@@ -2,56 +2,60 @@
 Main bot file - Entry point for the Discord bot
 """
 
+import time
+_BOOT = time.perf_counter()  # taken before the heavy imports so the startup timeline includes them
+
 import discord
 from discord.ext import commands
 import asyncio
 import os
 import sys
-import asyncpg
 from datetime import datetime
+from pathlib import Path
+from typing import Optional
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from utils.config import Config
 from utils.emotes import Emotes
+from utils.models.database import DatabasePool
+from utils.models import customutils
+from utils.models.migrations import run_migrations
+from utils.cluster import ClusterLink
+from utils.intents import gateway_options
+from utils.startup import StartupTimeline, CommandSyncCache, command_tree_digest
 
-# ------------------ DATABASE CONNECTION ------------------ #
-async def ensure_database_exists():
-    """Ensure PostgreSQL database connection and create tables if needed."""
-    try:
-        pool = await asyncpg.create_pool(
-            user=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            database=Config.DB_NAME,
-            host=Config.DB_HOST,
-            port=Config.DB_PORT,
-            min_size=1,
-            max_size=5
-        )
-        globals()["_db_pool"] = pool
-        print(f"{Emotes.SUCCESS} Connected to PostgreSQL database successfully!")
-    except Exception as e:
-        raise RuntimeError(f"Database connection failed: {e}")
+# Absolute, so the bot can be started from any working directory
+COGS_DIR = Path(__file__).resolve().parent / "src" / "cogs" / "customaddons"
+_IMPORTED = time.perf_counter()
 
-async def close_pool():
-    """Close PostgreSQL connection pool."""
-    pool = globals().get("_db_pool")
-    if pool:
-        await pool.close()
-        print(f"{Emotes.SUCCESS} PostgreSQL pool closed!")
-
-class CustomBot(commands.Bot):
+class CustomBot(commands.AutoShardedBot):
     
-    def __init__(self):
-        intents = discord.Intents.all()
+    def __init__(self, cluster: Optional[ClusterLink] = None):
+        # Standalone: discord.py picks the shard count and runs every shard here.
+        # Clustered: this process only runs its slice of the shards.
+        shard_kwargs = {}
+        if cluster:
+            shard_kwargs = {"shard_ids": cluster.shard_ids, "shard_count": cluster.shard_count}
         super().__init__(
             command_prefix=Config.BOT_PREFIX,
-            intents=intents,
             help_command=None,
-            case_insensitive=True
+            case_insensitive=True,
+            **gateway_options(Config.GATEWAY_PROFILE),
+            **shard_kwargs
         )
         self.start_time = datetime.utcnow()
+        self.cluster = cluster
+        self.timeline = StartupTimeline(_BOOT)
+        self.timeline.record("imports", _BOOT, _IMPORTED)
+        self.command_sync = CommandSyncCache(Config.COMMAND_SYNC_CACHE)
+        # Each process needs its own offline journal, or replays would interleave
+        local_store = Config.DB_LOCAL_STORE
+        if cluster:
+            root, ext = os.path.splitext(local_store)
+            local_store = f"{root}-cluster{cluster.cluster_id}{ext}"
+        self.db = DatabasePool(local_store)
         self.status_rotation= [
         "Listening $help",
         "Powered by LazyCoder",
@@ -61,38 +65,97 @@ class CustomBot(commands.Bot):
         ]
     async def setup_hook(self):
         print(f"Starting Bot...")
-        try:
-            await ensure_database_exists()
-        except Exception as e:
-            print(f"{Emotes.ERROR} Database connection failed: {e}")
-            print(f"{Emotes.WARNING} Bot will continue but features may not work!")
+        self.timeline.mark("login")
+        customutils.use_pool(self.db)
+        with self.timeline.stage("database"):
+            try:
+                await self.connect_database()
+            except Exception as e:
+                print(f"{Emotes.ERROR} Database connection failed: {e}")
+                print(f"{Emotes.WARNING} Running in degraded mode - cached reads only, writes journaled until it reconnects")
+        # Reconnects with backoff and replays the write journal whenever the database comes back
+        self.db.start_supervisor()
 
-        await self.load_cogs()
-        try:
-            await self.tree.sync()
-            print(f"{Emotes.SUCCESS} Commands synced!")
-        except Exception as e:
-            print(f"{Emotes.WARNING} Command sync failed: {e}")
+        with self.timeline.stage("cogs"):
+            await self.load_cogs()
+        # Application commands are global - one cluster syncing is enough
+        if self.cluster is None or self.cluster.cluster_id == 0:
+            with self.timeline.stage("command sync"):
+                await self.sync_commands()
+        if self.cluster:
+            self.loop.create_task(self.report_cluster_stats())
         
         print(f"\n{Emotes.SUCCESS} Bot setup complete!")
         print("=" * 50)
 
+    async def connect_database(self):
+        """Open and warm up the shared PostgreSQL pool used by every cog"""
+        try:
+            await self.db.connect()
+        except Exception as e:
+            raise RuntimeError(f"Database connection failed: {e}")
+        stats = self.db.stats()
+        print(f"{Emotes.SUCCESS} Connected to PostgreSQL database successfully! ({stats['size']} connections warm)")
+
+        # Schema changes run once per startup here, not on every cog load
+        applied = await run_migrations(self.db)
+        self.db.mark_schema_ready()
+        if applied:
+            print(f"{Emotes.SUCCESS} Applied database migrations: {', '.join(map(str, applied))}")
+
     async def load_cogs(self):
         """Auto load all cogs from src/cogs/customaddons"""
-        cogs_dir = os.path.join("src", "cogs", "customaddons")
+        if not COGS_DIR.is_dir():
+            print(f"{Emotes.ERROR} Cogs directory not found: {COGS_DIR}")
+            return
+
+        cog_paths = sorted(f"cogs.customaddons.{path.stem}" for path in COGS_DIR.glob("*.py") if not path.name.startswith("__"))
+        # Cogs don't depend on each other, so their cog_load work (DB, views, listeners) can overlap
+        await asyncio.gather(*(self.load_cog(cog_path) for cog_path in cog_paths))
+
+    async def load_cog(self, cog_path: str):
+        with self.timeline.stage(f"cog {cog_path.rsplit('.', 1)[-1]}"):
+            try:
+                await self.load_extension(cog_path)
+                print(f"  {Emotes.SUCCESS} Loaded: {cog_path}")
+            except Exception as e:
+                print(f"  {Emotes.ERROR} Failed to load {cog_path}: {e}")
 
-        if not os.path.exists(cogs_dir):
-            print(f"{Emotes.ERROR} Cogs directory not found: {cogs_dir}")
+    async def sync_commands(self):
+        """Sync app commands, but only when the tree changed since the last successful sync"""
+        digest = command_tree_digest(self.tree)
+        if digest == self.command_sync.last_digest(self.application_id):
+            print(f"{Emotes.INFO} Commands unchanged - skipping sync")
             return
+        try:
+            synced = await self.tree.sync()
+            self.command_sync.save(self.application_id, digest)
+            print(f"{Emotes.SUCCESS} Commands synced! ({len(synced)} commands)")
+        except Exception as e:
+            print(f"{Emotes.WARNING} Command sync failed: {e}")
 
-        for filename in os.listdir(cogs_dir):
-            if filename.endswith(".py") and not filename.startswith("__"):
-                cog_path = f"cogs.customaddons.{filename[:-3]}"
-                try:
-                    await self.load_extension(cog_path)
-                    print(f"  {Emotes.SUCCESS} Loaded: {cog_path}")
-                except Exception as e:
-                    print(f"  {Emotes.ERROR} Failed to load {cog_path}: {e}")
+    async def report_cluster_stats(self):
+        """Push this cluster's numbers to the supervisor for cross-shard $stats"""
+        await self.wait_until_ready()
+        while not self.is_closed():
+            db = self.db.stats()
+            self.cluster.report({
+                "cluster_id": self.cluster.cluster_id,
+                "pid": os.getpid(),
+                "guilds": len(self.guilds),
+                "users": sum(g.member_count or 0 for g in self.guilds),
+                "latencies": {shard_id: latency for shard_id, latency in self.latencies},
+                "db_qps": db["qps"],
+                "db_available": db["available"]
+            })
+            await asyncio.sleep(Config.CLUSTER_STATS_INTERVAL)
+
+    async def total_guilds(self) -> int:
+        """Guild count across every cluster (just this process when standalone)"""
+        if self.cluster:
+            totals = await self.cluster.aggregate()
+            return totals.get("guilds", len(self.guilds))
+        return len(self.guilds)
 
     async def on_ready(self):
         """Called when the bot is ready"""
@@ -102,12 +165,17 @@ class CustomBot(commands.Bot):
         print(f"🌐 Servers: {len(self.guilds)}")
         print(f"👥 Users: {sum(g.member_count for g in self.guilds)}")
         print(f"⏰ Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+        # on_ready fires again after reconnects; only the first one ends startup
+        if not self.timeline.reported:
+            self.timeline.mark("ready")
+            self.timeline.reported = True
+            print(f"\n{Emotes.INFO} Startup timeline:\n{self.timeline.report()}")
         async def rotate_status():
          await self.wait_until_ready()
          index = 0
          while not self.is_closed():
              status_text = self.status_rotation[index % len(self.status_rotation)]
-             status_text = status_text.format(servers=len(self.guilds))
+             status_text = status_text.format(servers=await self.total_guilds())
         
              await self.change_presence(
                 activity=discord.Activity(
@@ -125,7 +193,10 @@ class CustomBot(commands.Bot):
     async def close(self):
         """Close PostgreSQL before shutting down"""
         print(f"\n{Emotes.LOADING} Shutting down...")
-        await close_pool()
+        was_connected = self.db.connected
+        await self.db.close()
+        if was_connected:
+            print(f"{Emotes.SUCCESS} PostgreSQL pool closed!")
         await super().close()
 
 
@@ -145,6 +216,34 @@ async def stats(ctx: commands.Context):
         f"• Uptime: `{h}h {m}m {s}s`\n"
         f"• Latency: `{round(ctx.bot.latency * 1000)}ms`"
     )
+    if ctx.bot.cluster:
+        totals = await ctx.bot.cluster.aggregate()
+        if totals:
+            alive = sum(1 for cluster in totals["clusters"].values() if cluster["alive"])
+            embed.description += (
+                f"\n• All Clusters: `{totals['guilds']} servers, {totals['users']} users`\n"
+                f"• Clusters: `{alive}/{totals['cluster_count']} up, {totals['shards']}/{totals['shard_count']} shards, "
+                f"{totals['restarts']} restarts`\n"
+                f"• This Server: `shard {ctx.guild.shard_id if ctx.guild else 0}, cluster {ctx.bot.cluster.cluster_id}`"
+            )
+    db = ctx.bot.db.stats()
+    if ctx.bot.db.connected:
+        embed.description += (
+            f"\n• DB Pool: `{db['in_use']}/{db['size']} in use`\n"
+            f"• DB Wait: `{db['acquire_wait_avg_ms']:.1f}ms avg / {db['acquire_wait_max_ms']:.1f}ms max`\n"
+            f"• DB Queries: `{db['qps']:.1f}/s ({db['prepared']} prepared)`"
+        )
+    if not db["available"] or db["journaled"]:
+        embed.description += f"\n• DB Degraded: `{'offline' if not db['available'] else 'replaying'}, {db['journaled']} writes queued`"
+    cache = customutils.WelcomeManager.cache_stats()
+    embed.description += f"\n• Welcome Cache: `{cache['size']} guilds, {cache['hit_rate']:.0%} hits`"
+    music = ctx.bot.get_cog("Music")
+    if music and music.resolver:
+        search = music.resolver.stats()
+        embed.description += (
+            f"\n• Music: `{len(music.lavalink.player_manager.players)} players, "
+            f"search cache {search['hit_rate']:.0%} hits, {search['saved_seconds']:.0f}s saved`"
+        )
     embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
     await ctx.send(embed=embed)
 
@@ -157,17 +256,20 @@ async def help_command(ctx: commands.Context):
     )
     embed.description = (
         f"**<a:ruby66:1431646044869099600> Music Commands**\n"
-        f"• `{ctx.prefix}play <song>` — Play music\n"
+        f"• `{ctx.prefix}play <song>` — Play music (several lines or a playlist file import them all)\n"
         f"• `{ctx.prefix}pause` — Pause/Resume\n"
         f"• `{ctx.prefix}skip` — Skip current song\n"
         f"• `{ctx.prefix}stop` — Stop and clear queue\n"
         f"• `{ctx.prefix}queue` — Show queue\n"
+        f"• `{ctx.prefix}remove <position>` — Remove a queued song\n"
+        f"• `{ctx.prefix}move <from> <to>` — Reorder the queue\n"
         f"• `{ctx.prefix}nowplaying` — See current song\n"
         f"• `{ctx.prefix}volume <0-200>` — Set volume\n"
         f"• `{ctx.prefix}shuffle` — Shuffle queue\n"
         f"• `{ctx.prefix}loop <off/track/queue>` — Repeat mode\n"
         f"• `{ctx.prefix}filter <name>` — Apply audio filters\n"
-        f"• `{ctx.prefix}equalizer <preset>` — EQ Presets\n\n"
+        f"• `{ctx.prefix}equalizer <preset>` — EQ Presets\n"
+        f"• `{ctx.prefix}filter create <name> <options>` / `{ctx.prefix}equalizer create <name> <gains>` — Save a custom preset\n\n"
 
         f"**<a:ruby66:1431646044869099600> Welcome Commands**\n"
         f"• `{ctx.prefix}welcome setup #channel` — Setup welcome system\n"
@@ -181,6 +283,8 @@ async def help_command(ctx: commands.Context):
         f"• `{ctx.prefix}ticket setup` — Setup ticket panel\n"
         f"• `{ctx.prefix}ticket create` — Create a ticket\n"
         f"• `{ctx.prefix}ticket close` — Close a ticket\n"
+        f"• `{ctx.prefix}ticketsearch [@user] [keywords]` — Search archived tickets\n"
+        f"• `{ctx.prefix}tickettranscript <id>` — Download an archived transcript\n"
 
         f"\n**<a:ruby66:1431646044869099600> Utility Commands**\n"
         f"• `{ctx.prefix}stats` — Show bot stats"
@@ -188,6 +292,13 @@ async def help_command(ctx: commands.Context):
     embed.set_footer(text=f"Prefix: {ctx.prefix} | Requested by {ctx.author}")
     await ctx.send(embed=embed)
 
+def run_worker(cluster: ClusterLink):
+    """Entry point for one cluster process (started by cluster.py)"""
+    bot = CustomBot(cluster)
+    bot.add_command(stats)
+    bot.add_command(help_command)
+    bot.run(Config.BOT_TOKEN)
+
 def main():
     if not Config.BOT_TOKEN:
         print(f"{Emotes.ERROR} Bot token missing! Please set it in config.py or .env")
@@ -195,6 +306,7 @@ def main():
 
     print(f"\n{Emotes.INFO} Bot Configuration:")
     print(f" • Prefix: {Config.BOT_PREFIX}")
+    print(f" • Gateway profile: {Config.GATEWAY_PROFILE}")
 
     bot = CustomBot()
     bot.add_command(stats)
@@ -1 +1,697 @@
+import discord
+from discord.ext import commands
+from datetime import datetime
+from typing import Dict, Optional, Set
+import asyncio
+import time
 
+import lavalink
+from lavalink import LoadType
+
+from utils.config import Config
+from utils.emotes import Emotes
+from utils.models.customutils import MusicQueueManager, MusicSearchManager, MusicPresetManager, DatabaseUnavailable
+from utils.music.nodes import MusicClient
+from utils.music.queue import QueueEntry, QueuePlayer, TrackQueue, LOOP_OFF, LOOP_TRACK, LOOP_QUEUE
+from utils.music.filters import (
+    FilterPreset, BUILTIN_PRESETS, KIND_FILTER, KIND_EQUALIZER, equalizer_preset, filter_preset_from_spec
+)
+from utils.music.importer import PlaylistImport, parse_playlist
+from utils.music.search import TrackResolver
+
+LOOP_MODES = {
+    'off': LOOP_OFF,
+    'track': LOOP_TRACK,
+    'queue': LOOP_QUEUE,
+}
+LOOP_NAMES = {mode: name for name, mode in LOOP_MODES.items()}
+
+
+def track_link(track) -> str:
+    return f"[{track.title}]({track.uri})" if track.uri else track.title
+
+
+# ======================= VOICE PROTOCOL =======================
+class LavalinkVoiceClient(discord.VoiceProtocol):
+    """Forwards voice state/server updates to Lavalink; no audio ever passes through this process"""
+
+    def __init__(self, client: discord.Client, channel: discord.abc.Connectable):
+        self.client = client
+        self.channel = channel
+        self.guild_id = channel.guild.id
+        self.lavalink: MusicClient = client.lavalink
+        self._destroyed = False
+
+    async def on_voice_server_update(self, data):
+        await self.lavalink.voice_update_handler({'t': 'VOICE_SERVER_UPDATE', 'd': data})
+
+    async def on_voice_state_update(self, data):
+        channel_id = data['channel_id']
+        if not channel_id:
+            await self._destroy()
+            return
+        self.channel = self.client.get_channel(int(channel_id))
+        await self.lavalink.voice_update_handler({'t': 'VOICE_STATE_UPDATE', 'd': data})
+
+    async def connect(self, *, timeout: float, reconnect: bool, self_deaf: bool = False, self_mute: bool = False):
+        # The player already exists (created on its chosen node); this only joins the channel
+        self.lavalink.player_manager.create(guild_id=self.guild_id)
+        await self.channel.guild.change_voice_state(channel=self.channel, self_mute=self_mute, self_deaf=self_deaf)
+
+    async def disconnect(self, *, force: bool = False):
+        player = self.lavalink.player_manager.get(self.guild_id)
+        if not force and (not player or not player.is_connected):
+            return
+        await self.channel.guild.change_voice_state(channel=None)
+        if player:
+            player.channel_id = None
+        await self._destroy()
+
+    async def _destroy(self):
+        self.cleanup()
+        if self._destroyed:
+            return
+        self._destroyed = True
+        try:
+            await self.lavalink.player_manager.destroy(self.guild_id)
+        except lavalink.ClientError:
+            pass
+
+
+# ======================= MUSIC COG =======================
+class Music(commands.Cog):
+    """Music playback on a pool of Lavalink nodes"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.lavalink: Optional[MusicClient] = None
+        # Idle disconnects are loop timers, not one sleeping task per guild
+        self.idle_timers: Dict[int, asyncio.TimerHandle] = {}
+        self.failovers = 0
+        self.saved: Set[int] = set()  # guilds whose session is stored in PostgreSQL
+        self.snapshot_task: Optional[asyncio.Task] = None
+        self.resolver: Optional[TrackResolver] = None
+        self.imports: Dict[int, asyncio.Task] = {}  # running playlist imports per guild
+
+    async def cog_load(self):
+        # setup_hook runs after login, so the bot user is known; clusters each get their own client
+        if not hasattr(self.bot, 'lavalink'):
+            self.bot.lavalink = MusicClient(self.bot.user.id)
+        self.lavalink = self.bot.lavalink
+        self.lavalink.add_event_hooks(self)
+        self.resolver = TrackResolver(self.lavalink)
+        self.snapshot_task = asyncio.create_task(self.snapshot_loop())
+        print(f"{Emotes.SUCCESS} Music system loaded! ({len(self.lavalink.node_manager)} Lavalink nodes)")
+
+    async def cog_unload(self):
+        if self.snapshot_task:
+            self.snapshot_task.cancel()
+        for task in self.imports.values():
+            task.cancel()
+        for timer in self.idle_timers.values():
+            timer.cancel()
+        self.idle_timers.clear()
+        self.lavalink.clear_event_hooks()
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    # ---------- voice / player helpers ---------- #
+    def get_player(self, guild_id: int) -> Optional[QueuePlayer]:
+        return self.lavalink.player_manager.get(guild_id)
+
+    async def ensure_voice(self, ctx, connect: bool = False) -> Optional[QueuePlayer]:
+        """The guild's player if the author can control it, joining their channel when `connect` is set"""
+        voice = ctx.author.voice
+        if not voice or not voice.channel:
+            await ctx.send("❌ Join a voice channel first!")
+            return None
+
+        player = self.get_player(ctx.guild.id)
+        if player and player.is_connected:
+            if player.channel_id != voice.channel.id:
+                await ctx.send("❌ You need to be in my voice channel!")
+                return None
+            return player
+        if not connect:
+            await ctx.send("❌ Nothing is playing!")
+            return None
+
+        permissions = voice.channel.permissions_for(ctx.me)
+        if not permissions.connect or not permissions.speak:
+            await ctx.send("❌ I need permission to connect and speak in your voice channel!")
+            return None
+
+        try:
+            # Placed on the least-loaded node, preferring the channel's region
+            player = self.lavalink.player_manager.create(
+                ctx.guild.id,
+                region=self.lavalink.node_manager.region_for(voice.channel.rtc_region)
+            )
+        except lavalink.ClientError:
+            await ctx.send("❌ No music nodes are available right now, try again shortly.")
+            return None
+
+        player.store('channel', ctx.channel.id)
+        if player.volume != Config.MUSIC_DEFAULT_VOLUME:
+            await player.set_volume(Config.MUSIC_DEFAULT_VOLUME)
+        await voice.channel.connect(cls=LavalinkVoiceClient, self_deaf=True)
+        return player
+
+    def schedule_idle_disconnect(self, guild_id: int):
+        self.cancel_idle_disconnect(guild_id)
+        self.idle_timers[guild_id] = asyncio.get_running_loop().call_later(
+            Config.MUSIC_IDLE_DISCONNECT,
+            lambda: asyncio.create_task(self.disconnect_idle(guild_id))
+        )
+
+    def cancel_idle_disconnect(self, guild_id: int):
+        timer = self.idle_timers.pop(guild_id, None)
+        if timer:
+            timer.cancel()
+
+    async def disconnect_idle(self, guild_id: int):
+        self.idle_timers.pop(guild_id, None)
+        player = self.get_player(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if player and player.is_playing:
+            return
+        if guild and guild.voice_client:
+            await guild.voice_client.disconnect(force=True)
+
+    async def announce(self, player: QueuePlayer, content: str = None, embed: discord.Embed = None):
+        channel = self.bot.get_channel(player.fetch('channel'))
+        if not channel:
+            return
+        try:
+            await channel.send(content=content, embed=embed)
+        except discord.HTTPException:
+            pass
+
+    # ---------- session snapshots ---------- #
+    async def snapshot_loop(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.restore_sessions()
+        except DatabaseUnavailable:
+            print(f"{Emotes.WARNING} Database unavailable - music sessions not restored")
+        except Exception as e:
+            print(f"{Emotes.ERROR} Failed to restore music sessions: {e}")
+        last_purge = time.monotonic()
+        while True:
+            await asyncio.sleep(Config.MUSIC_SNAPSHOT_INTERVAL)
+            try:
+                await self.save_snapshots()
+            except DatabaseUnavailable:
+                pass  # retried next interval; affected queues are rewritten in full
+            except Exception as e:
+                print(f"{Emotes.ERROR} Failed to snapshot music sessions: {e}")
+            if time.monotonic() - last_purge >= Config.MUSIC_SEARCH_PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                try:
+                    purged = await MusicSearchManager.purge_expired()
+                    if purged:
+                        print(f"{Emotes.SUCCESS} Purged {purged} expired search cache entries")
+                except DatabaseUnavailable:
+                    pass
+                except Exception as e:
+                    print(f"{Emotes.ERROR} Failed to purge search cache: {e}")
+
+    async def save_snapshots(self):
+        """Write every active session plus only the queue rows that changed since the last snapshot"""
+        players = {
+            guild_id: player for guild_id, player in self.lavalink.player_manager.players.items()
+            if player.is_connected
+        }
+        sessions, replaced, deletes, rows, taken = [], [], [], [], []
+        for guild_id, player in players.items():
+            queue = player.queue
+            current = player.current_entry if player.current else None
+            shuffled, shuffle_end = queue.shuffle_state()
+            sessions.append((
+                guild_id, player.channel_id, player.fetch('channel'),
+                current.blob if current else None, current.requester if current else None,
+                player.position, player.paused, player.volume, queue.loop, shuffled, shuffle_end
+            ))
+            if guild_id not in self.saved:
+                queue.rewrite = True  # new session, or its last snapshot failed
+            if queue.dirty:
+                rewrite, changed, removed = queue.take_changes()
+                taken.append(guild_id)
+                if rewrite:
+                    replaced.append(guild_id)
+                rows.extend((guild_id, key, blob, requester) for key, blob, requester in changed)
+                deletes.extend((guild_id, key) for key in removed)
+        ended = [guild_id for guild_id in self.saved if guild_id not in players]
+
+        try:
+            await MusicQueueManager.save_sessions(sessions)
+            await MusicQueueManager.save_queues(replaced, deletes, rows)
+            await MusicQueueManager.delete_sessions(ended)
+        except Exception:
+            # The taken changes are gone; forgetting these guilds makes the next snapshot rewrite them
+            self.saved.difference_update(taken)
+            raise
+        self.saved = set(players)
+
+    async def restore_sessions(self):
+        """Rejoin voice and rebuild queues for sessions saved before the last shutdown"""
+        sessions = await MusicQueueManager.load_sessions([guild.id for guild in self.bot.guilds])
+        if not sessions:
+            return
+        # Nodes connect in the background; give them a moment before placing players
+        for _ in range(30):
+            if self.lavalink.node_manager.available_nodes:
+                break
+            await asyncio.sleep(1)
+
+        semaphore = asyncio.Semaphore(Config.MUSIC_RESTORE_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self.restore_session(session, semaphore) for session in sessions.values()),
+            return_exceptions=True
+        )
+        restored = {guild_id for guild_id, result in zip(sessions, results) if result is True}
+        await MusicQueueManager.delete_sessions([guild_id for guild_id in sessions if guild_id not in restored])
+        self.saved |= restored
+        print(f"{Emotes.SUCCESS} Restored {len(restored)}/{len(sessions)} music sessions")
+
+    async def restore_session(self, session: dict, semaphore: asyncio.Semaphore) -> bool:
+        guild = self.bot.get_guild(session['guild_id'])
+        channel = guild.get_channel(session['voice_channel_id']) if guild else None
+        if not isinstance(channel, discord.VoiceChannel) or not any(not m.bot for m in channel.members):
+            return False
+        if not session['current_track'] and not session['queue']:
+            return False
+
+        async with semaphore:
+            player = self.lavalink.player_manager.create(
+                guild.id, region=self.lavalink.node_manager.region_for(channel.rtc_region)
+            )
+            player.queue = TrackQueue.restore(session['queue'], session['shuffled'], session['shuffle_end'])
+            player.set_loop(session['loop'])
+            player.store('channel', session['text_channel_id'])
+            if player.volume != session['volume']:
+                await player.set_volume(session['volume'])
+            await channel.connect(cls=LavalinkVoiceClient, self_deaf=True)
+            if session['current_track']:
+                current = QueueEntry(bytes(session['current_track']), session['current_requester'] or 0)
+                await player.play(current, start_time=session['position'], pause=session['paused'])
+            else:
+                await player.play()
+        return True
+
+    # ---------- lavalink events ---------- #
+    @lavalink.listener(lavalink.TrackStartEvent)
+    async def on_track_start(self, event: lavalink.TrackStartEvent):
+        self.cancel_idle_disconnect(event.player.guild_id)
+        track = event.track
+        embed = discord.Embed(
+            title=f"{Emotes.MUSIC} Now Playing",
+            description=f"{track_link(track)}\n`{lavalink.format_time(track.duration)}` • <@{track.requester}>",
+            color=discord.Color.pink()
+        )
+        await self.announce(event.player, embed=embed)
+
+    @lavalink.listener(lavalink.QueueEndEvent)
+    async def on_queue_end(self, event: lavalink.QueueEndEvent):
+        self.schedule_idle_disconnect(event.player.guild_id)
+
+    @lavalink.listener(lavalink.TrackExceptionEvent)
+    async def on_track_exception(self, event: lavalink.TrackExceptionEvent):
+        await self.announce(event.player, f"❌ Could not play **{event.track.title}**: {event.message or 'unknown error'}")
+
+    @lavalink.listener(lavalink.NodeConnectedEvent)
+    async def on_node_connected(self, event: lavalink.NodeConnectedEvent):
+        print(f"{Emotes.SUCCESS} Lavalink node '{event.node.name}' connected")
+
+    @lavalink.listener(lavalink.NodeDisconnectedEvent)
+    async def on_node_disconnected(self, event: lavalink.NodeDisconnectedEvent):
+        print(f"{Emotes.WARNING} Lavalink node '{event.node.name}' disconnected ({event.code}: {event.reason}); "
+              f"moving {len(event.node.players)} players")
+
+    @lavalink.listener(lavalink.NodeChangedEvent)
+    async def on_node_changed(self, event: lavalink.NodeChangedEvent):
+        self.failovers += 1
+
+    # ---------- commands ---------- #
+    @commands.command(name="play", aliases=["p"])
+    async def play(self, ctx, *, query: str = None):
+        """Play a song or playlist from a URL or search, or import a list of them"""
+        queries = parse_playlist(query or "")
+        for attachment in ctx.message.attachments:
+            if attachment.size > Config.MUSIC_IMPORT_MAX_FILE_BYTES:
+                return await ctx.send(f"❌ `{attachment.filename}` is too large to import!")
+            queries += parse_playlist((await attachment.read()).decode("utf-8", errors="ignore"))
+        if not queries:
+            return await ctx.send(f"❌ Usage: `{ctx.prefix}play <song or URL>`, one per line, or attach a playlist file")
+
+        player = await self.ensure_voice(ctx, connect=True)
+        if not player:
+            return
+        if len(queries) > 1:
+            return await self.start_import(ctx, player, queries[:Config.MUSIC_IMPORT_MAX_TRACKS])
+        query = queries[0]
+
+        # Cached searches and playlists come back as raw blobs - no AudioTrack is built to queue them
+        results = await self.resolver.resolve(query)
+        if results.load_type == LoadType.PLAYLIST and results.blobs:
+            player.queue.extend(QueueEntry(blob, ctx.author.id) for blob in results.blobs)
+            await ctx.send(f"✅ Queued **{len(results.blobs)}** tracks from **{results.playlist_name}**")
+        elif results.load_type in (LoadType.TRACK, LoadType.SEARCH) and results.blobs:
+            entry = QueueEntry(results.blobs[0], ctx.author.id)
+            player.add(entry)
+            if player.is_playing:
+                await ctx.send(f"✅ Queued **{entry.decode().title}** (position {len(player.queue)})")
+        elif results.load_type == LoadType.ERROR:
+            return await ctx.send(f"❌ Failed to load tracks: {results.error or 'unknown error'}")
+        else:
+            return await ctx.send("❌ Nothing found!")
+
+        if not player.is_playing:
+            await player.play()
+
+    async def start_import(self, ctx, player: QueuePlayer, queries):
+        """Stream a list of queries into the queue, editing one progress message as it goes"""
+        if ctx.guild.id in self.imports:
+            return await ctx.send(f"❌ A playlist import is already running here - `{ctx.prefix}stop` cancels it")
+
+        message = await ctx.send(f"📥 Importing **{len(queries)}** tracks...")
+
+        async def progress(job: PlaylistImport):
+            try:
+                await message.edit(content=(
+                    f"📥 Importing **{job.total}** tracks... `{job.resolved + job.failed}/{job.total}` resolved"
+                    f" • `{job.queued}` queued • `{job.failed}` not found • `{job.rate:.1f}/s`"
+                ))
+            except discord.HTTPException:
+                pass
+
+        job = PlaylistImport(self.resolver, player, queries, ctx.author.id, progress=progress)
+        task = asyncio.create_task(job.run())
+        self.imports[ctx.guild.id] = task
+        try:
+            await task
+            summary = f"✅ Imported **{job.queued}** tracks"
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise  # the command itself was cancelled
+            summary = f"⏹️ Import cancelled after **{job.queued}** tracks"
+        finally:
+            self.imports.pop(ctx.guild.id, None)
+        if job.failed:
+            summary += f" ({job.failed} not found)"
+        try:
+            await message.edit(content=f"{summary} in `{job.elapsed:.1f}s`")
+        except discord.HTTPException:
+            pass
+
+    @commands.command(name="pause", aliases=["resume"])
+    async def pause(self, ctx):
+        """Pause or resume playback"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        await player.set_pause(not player.paused)
+        await ctx.send("⏸️ Paused" if player.paused else "▶️ Resumed")
+
+    @commands.command(name="skip", aliases=["s"])
+    async def skip(self, ctx):
+        """Skip the current song"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        if not player.current:
+            return await ctx.send("❌ Nothing is playing!")
+        title = player.current.title
+        await player.skip()
+        await ctx.send(f"⏭️ Skipped **{title}**")
+
+    @commands.command(name="stop", aliases=["leave", "disconnect"])
+    async def stop(self, ctx):
+        """Stop playback, clear the queue and leave"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        task = self.imports.get(ctx.guild.id)
+        if task:
+            task.cancel()
+        player.queue.clear()
+        await player.stop()
+        self.cancel_idle_disconnect(ctx.guild.id)
+        if ctx.voice_client:
+            await ctx.voice_client.disconnect(force=True)
+        await ctx.send("⏹️ Stopped and cleared the queue")
+
+    @commands.command(name="queue", aliases=["q"])
+    async def queue(self, ctx, page: int = 1):
+        """Show the queue"""
+        player = self.get_player(ctx.guild.id)
+        if not player or (not player.current and not player.queue):
+            return await ctx.send("❌ The queue is empty!")
+
+        size = Config.MUSIC_QUEUE_PAGE_SIZE
+        pages = max(1, -(-len(player.queue) // size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * size
+        # Only the shown entries are decoded
+        tracks = [entry.decode() for entry in player.queue.page(start, size)]
+        lines = [
+            f"`{start + i + 1}.` {track_link(track)} `{lavalink.format_time(track.duration)}`"
+            for i, track in enumerate(tracks)
+        ]
+        embed = discord.Embed(
+            title=f"{Emotes.MUSIC} Queue",
+            description="\n".join(lines) or "Nothing queued after the current song.",
+            color=discord.Color.pink(),
+            timestamp=datetime.utcnow()
+        )
+        if player.current:
+            embed.add_field(name="Now Playing", value=track_link(player.current), inline=False)
+        embed.set_footer(text=f"Page {page}/{pages} • {len(player.queue)} tracks • Loop {LOOP_NAMES[player.queue.loop]}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="remove")
+    async def remove(self, ctx, position: int):
+        """Remove a track from the queue by its position"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        if not 1 <= position <= len(player.queue):
+            return await ctx.send(f"❌ Position must be between 1 and {len(player.queue)}!")
+        track = player.queue.remove(position - 1).decode()
+        await ctx.send(f"🗑️ Removed **{track.title}**")
+
+    @commands.command(name="move")
+    async def move(self, ctx, source: int, destination: int):
+        """Move a queued track to another position"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        size = len(player.queue)
+        if not (1 <= source <= size and 1 <= destination <= size):
+            return await ctx.send(f"❌ Positions must be between 1 and {size}!")
+        track = player.queue.move(source - 1, destination - 1).decode()
+        await ctx.send(f"↕️ Moved **{track.title}** to position {destination}")
+
+    @commands.command(name="nowplaying", aliases=["np"])
+    async def nowplaying(self, ctx):
+        """Show the current song"""
+        player = self.get_player(ctx.guild.id)
+        if not player or not player.current:
+            return await ctx.send("❌ Nothing is playing!")
+        track = player.current
+        position = "🔴 LIVE" if track.is_stream else f"{lavalink.format_time(player.position)} / {lavalink.format_time(track.duration)}"
+        embed = discord.Embed(
+            title=f"{Emotes.MUSIC} Now Playing",
+            description=f"{track_link(track)}\n`{position}` • <@{track.requester}>",
+            color=discord.Color.pink()
+        )
+        embed.set_footer(text=f"Volume {player.volume}% • Loop {LOOP_NAMES[player.queue.loop]} • Node {player.node.name}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="volume", aliases=["vol"])
+    async def volume(self, ctx, volume: Optional[int] = None):
+        """Set the volume (0-200)"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        if volume is None:
+            return await ctx.send(f"🔊 Volume: **{player.volume}%**")
+        if not 0 <= volume <= 200:
+            return await ctx.send("❌ Volume must be between 0 and 200!")
+        await player.set_volume(volume)
+        await ctx.send(f"🔊 Volume set to **{volume}%**")
+
+    @commands.command(name="shuffle")
+    async def shuffle(self, ctx):
+        """Shuffle the queue"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        if len(player.queue) < 2:
+            return await ctx.send("❌ Not enough tracks in the queue to shuffle!")
+        player.queue.shuffle()
+        await ctx.send(f"🔀 Shuffled **{len(player.queue)}** tracks")
+
+    @commands.command(name="loop", aliases=["repeat"])
+    async def loop(self, ctx, mode: str = None):
+        """Set the repeat mode (off/track/queue)"""
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        if mode is None or mode.lower() not in LOOP_MODES:
+            return await ctx.send(f"❌ Usage: `{ctx.prefix}loop <off/track/queue>`")
+        player.set_loop(LOOP_MODES[mode.lower()])
+        await ctx.send(f"🔁 Loop: **{mode.lower()}**")
+
+    # ---------- filter presets ---------- #
+    async def find_preset(self, guild_id: int, kind: str, name: str) -> Optional[FilterPreset]:
+        name = name.lower()
+        preset = BUILTIN_PRESETS[kind].get(name)
+        if preset:
+            return preset
+        try:
+            payload = (await MusicPresetManager.get_presets(guild_id)).get((kind, name))
+        except DatabaseUnavailable:
+            return None
+        return FilterPreset(name, kind, payload, custom=True) if payload is not None else None
+
+    async def preset_names(self, guild_id: int, kind: str) -> str:
+        names = list(BUILTIN_PRESETS[kind])
+        try:
+            custom = await MusicPresetManager.get_presets(guild_id)
+            names += sorted(name for preset_kind, name in custom if preset_kind == kind)
+        except DatabaseUnavailable:
+            pass
+        return ", ".join(names)
+
+    async def save_preset(self, ctx, preset: FilterPreset):
+        if preset.name in BUILTIN_PRESETS[preset.kind] or preset.name in ("create", "delete") or len(preset.name) > 32:
+            return await ctx.send(f"❌ `{preset.name}` can't be used as a preset name!")
+        try:
+            existing = await MusicPresetManager.get_presets(ctx.guild.id)
+            if (preset.kind, preset.name) not in existing and len(existing) >= Config.MUSIC_MAX_CUSTOM_PRESETS:
+                return await ctx.send(f"❌ This server already has {Config.MUSIC_MAX_CUSTOM_PRESETS} custom presets!")
+            await MusicPresetManager.save_preset(ctx.guild.id, preset.kind, preset.name, preset.payload, ctx.author.id)
+        except DatabaseUnavailable:
+            return await ctx.send("❌ The database is unavailable right now, try again shortly.")
+        await ctx.send(f"✅ Saved {preset.kind} preset **{preset.name}** - apply it with `{ctx.prefix}{preset.kind} {preset.name}`")
+
+    async def delete_preset(self, ctx, kind: str, name: str):
+        try:
+            deleted = await MusicPresetManager.delete_preset(ctx.guild.id, kind, name.lower())
+        except DatabaseUnavailable:
+            return await ctx.send("❌ The database is unavailable right now, try again shortly.")
+        await ctx.send(f"🗑️ Deleted {kind} preset **{name.lower()}**" if deleted else f"❌ No custom {kind} preset named `{name}`")
+
+    async def apply_preset(self, ctx, kind: str, name: Optional[str], icon: str):
+        player = await self.ensure_voice(ctx)
+        if not player:
+            return
+        preset = await self.find_preset(ctx.guild.id, kind, name) if name else None
+        if preset is None:
+            names = await self.preset_names(ctx.guild.id, kind)
+            return await ctx.send(f"❌ Usage: `{ctx.prefix}{kind} <name>` - available: {names}")
+        # Combined with the other half (filter/equalizer) into one update, coalesced with any quick follow-ups
+        player.mixer.set(preset)
+        await ctx.send(f"{icon} {kind.capitalize()}: **{preset.name}**")
+
+    @commands.group(name="filter", invoke_without_command=True)
+    async def filter(self, ctx, name: str = None):
+        """Apply an audio filter preset (or off)"""
+        await self.apply_preset(ctx, KIND_FILTER, name, "🎛️")
+
+    @filter.command(name="create")
+    @commands.has_permissions(manage_guild=True)
+    async def filter_create(self, ctx, name: str, *, options: str = ""):
+        """Save a custom filter preset, e.g. `filter create chipmunk speed=1.05 pitch=1.5`"""
+        try:
+            preset = filter_preset_from_spec(name.lower(), options)
+        except ValueError as e:
+            return await ctx.send(f"❌ {e}")
+        await self.save_preset(ctx, preset)
+
+    @filter.command(name="delete")
+    @commands.has_permissions(manage_guild=True)
+    async def filter_delete(self, ctx, name: str):
+        """Delete a custom filter preset"""
+        await self.delete_preset(ctx, KIND_FILTER, name)
+
+    @commands.group(name="equalizer", aliases=["eq"], invoke_without_command=True)
+    async def equalizer(self, ctx, preset: str = None):
+        """Apply an equalizer preset"""
+        await self.apply_preset(ctx, KIND_EQUALIZER, preset, "🎚️")
+
+    @equalizer.command(name="create")
+    @commands.has_permissions(manage_guild=True)
+    async def equalizer_create(self, ctx, name: str, *gains: float):
+        """Save a custom equalizer preset from up to 15 band gains (25Hz .. 16kHz, -0.25 to 1.0)"""
+        try:
+            preset = equalizer_preset(name.lower(), list(gains), custom=True)
+        except ValueError as e:
+            return await ctx.send(f"❌ {e}")
+        await self.save_preset(ctx, preset)
+
+    @equalizer.command(name="delete")
+    @commands.has_permissions(manage_guild=True)
+    async def equalizer_delete(self, ctx, name: str):
+        """Delete a custom equalizer preset"""
+        await self.delete_preset(ctx, KIND_EQUALIZER, name)
+
+    @commands.command(name="musicnodes")
+    @commands.is_owner()
+    async def music_nodes(self, ctx):
+        """Lavalink node load and player placement"""
+        embed = discord.Embed(
+            title="🎛️ Lavalink Nodes",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        for node in self.lavalink.node_summary():
+            status = "🟢" if node['available'] else "🔴"
+            embed.add_field(
+                name=f"{status} {node['name']} ({node['region']})",
+                value=(
+                    f"`{node['players']}` players here • `{node['playing']}` playing on node\n"
+                    f"CPU `{node['cpu'] * 100:.0f}%` • deficit `{node['deficit']}` • nulled `{node['nulled']}`\n"
+                    f"penalty `{node['penalty']:.1f}` • `{node['placed']}` placed since last stats"
+                ),
+                inline=False
+            )
+        embed.set_footer(text=f"{len(self.lavalink.player_manager.players)} players • {self.failovers} moved by failover")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="musiccache")
+    @commands.is_owner()
+    async def music_cache(self, ctx):
+        """Search cache hit rates and the node time they saved"""
+        stats = self.resolver.stats()
+        embed = discord.Embed(
+            title="🔎 Search Cache",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(
+            name="Lookups",
+            value=(
+                f"`{stats['lookups']}` total • `{stats['hit_rate'] * 100:.1f}%` without a node load\n"
+                f"memory `{stats['memory_hits']}` • database `{stats['db_hits']}` • "
+                f"shared in flight `{stats['collapsed']}` • node `{stats['node_loads']}`"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Latency",
+            value=(
+                f"node avg `{stats['node_avg_ms']:.0f}ms` • p99 `{stats['node_p99_ms']:.0f}ms`\n"
+                f"cache hit avg `{stats['hit_avg_ms']:.1f}ms` • `{stats['saved_seconds']:.1f}s` saved"
+            ),
+            inline=False
+        )
+        embed.set_footer(text=f"{stats['cached']}/{Config.MUSIC_SEARCH_CACHE_SIZE} queries in memory")
+        await ctx.send(embed=embed)
+
+
+# ======================= SETUP =======================
+async def setup(bot):
+    await bot.add_cog(Music(bot))
@@ -1,13 +1,42 @@
 import discord
 from discord.ext import commands
 import asyncio
-from datetime import datetime
-from typing import Optional
-import io
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple
 
-from utils.models.customutils import TicketManager
+from utils.models.customutils import TicketManager, TranscriptManager, LatencyTracker, DatabaseUnavailable
 from utils.config import Config
 from utils.emotes import Emotes
+from utils.transcripts import TranscriptExporter, send_transcript, upload_parts
+from utils.archive import BlobStore, archive_channel, attachment_name
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Human readable duration for stats, e.g. 2h 5m"""
+    if seconds is None:
+        return "N/A"
+    seconds = int(seconds)
+    days, rem = divmod(seconds, 86400)
+    h, rem = divmod(rem, 3600)
+    m, s = divmod(rem, 60)
+    if days:
+        return f"{days}d {h}h"
+    if h:
+        return f"{h}h {m}m"
+    if m:
+        return f"{m}m {s}s"
+    return f"{s}s"
+
+class TicketGuildConfig:
+    """A guild's ticket settings resolved to IDs, so lookups never scan by name"""
+
+    __slots__ = ("manager_role_id", "category_id", "log_channel_id")
+
+    def __init__(self, settings: Optional[dict] = None):
+        settings = settings or {}
+        self.manager_role_id: Optional[int] = settings.get("manager_role_id")
+        self.category_id: Optional[int] = settings.get("category_id")
+        self.log_channel_id: Optional[int] = settings.get("log_channel_id")
 
 # ======================= MAIN TICKET PANEL =======================
 class TicketMainPanel(discord.ui.View):
@@ -35,6 +64,15 @@ class TicketMainPanel(discord.ui.View):
         embed.add_field(name="Total Tickets", value=f"`{stats['total']}`", inline=True)
         embed.add_field(name="Open Tickets", value=f"`{stats['open']}`", inline=True)
         embed.add_field(name="Closed Tickets", value=f"`{stats['closed']}`", inline=True)
+        embed.add_field(name="Avg. Time to Claim", value=f"`{format_duration(stats['avg_claim_seconds'])}`", inline=True)
+        embed.add_field(name="Avg. Time to Close", value=f"`{format_duration(stats['avg_close_seconds'])}`", inline=True)
+        if stats['categories']:
+            top = sorted(stats['categories'].items(), key=lambda item: item[1], reverse=True)
+            embed.add_field(
+                name="Tickets per Category",
+                value="\n".join(f"• {name}: `{total}`" for name, total in top[:10]),
+                inline=False
+            )
         embed.set_footer(text=f"Requested by {interaction.user}", icon_url=interaction.user.display_avatar.url)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -65,13 +103,8 @@ class ChannelSelectModal(discord.ui.Modal, title="Setup Ticket Panel"):
             return await interaction.response.send_message("❌ Channel not found!", ephemeral=True)
 
         # Create Ticket Manager Role
-        role = discord.utils.get(interaction.guild.roles, name="Ticket Manager")
-        if not role:
-            role = await interaction.guild.create_role(
-                name="Ticket Manager",
-                color=discord.Color.blue(),
-                permissions=discord.Permissions(manage_channels=True, manage_messages=True)
-            )
+        cog = interaction.client.get_cog("Ticket")
+        await cog.ensure_manager_role(interaction.guild)
 
         # Send appropriate panel
         if self.ticket_type == "button":
@@ -142,15 +175,15 @@ class TicketControlView(discord.ui.View):
 
     @discord.ui.button(label="Claim", style=discord.ButtonStyle.grey, emoji="✋", custom_id="ticket:claim")
     async def claim_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        ticket = await TicketManager.get_ticket_by_channel(interaction.channel.id)
-        if not ticket:
-            return await interaction.response.send_message("❌ Not a valid ticket channel!", ephemeral=True)
-
-        if ticket.get("claimed_by"):
-            claimer = interaction.guild.get_member(ticket["claimed_by"])
-            return await interaction.response.send_message(f"❌ Ticket already claimed by {claimer.mention if claimer else 'someone'}!", ephemeral=True)
-
-        await TicketManager.claim_ticket(interaction.channel.id, interaction.user.id)
+        # One conditional UPDATE decides the winner; no read-then-write race
+        claimed = await TicketManager.claim_ticket(interaction.channel.id, interaction.user.id)
+        if not claimed:
+            ticket = await TicketManager.get_ticket_by_channel(interaction.channel.id)
+            if not ticket:
+                return await interaction.response.send_message("❌ Not a valid ticket channel!", ephemeral=True)
+            # A raw mention needs no member cache
+            claimer = f"<@{ticket['claimed_by']}>" if ticket.get("claimed_by") else "someone"
+            return await interaction.response.send_message(f"❌ Ticket already claimed by {claimer}!", ephemeral=True)
 
         # Update embed to show claimed status
         embed = discord.Embed(
@@ -160,11 +193,17 @@ class TicketControlView(discord.ui.View):
             timestamp=datetime.utcnow()
         )
         
-        # Get original message and update it
-        async for message in interaction.channel.history(limit=10):
-            if message.author == self.bot.user and message.embeds:
-                await message.edit(embed=embed)
-                break
+        if claimed["panel_message_id"]:
+            try:
+                await interaction.channel.get_partial_message(claimed["panel_message_id"]).edit(embed=embed)
+            except discord.NotFound:
+                pass
+        else:
+            # Tickets created before panel IDs were stored
+            async for message in interaction.channel.history(limit=10):
+                if message.author == self.bot.user and message.embeds:
+                    await message.edit(embed=embed)
+                    break
 
         await interaction.response.send_message(f"✅ {interaction.user.mention} has claimed this ticket!", ephemeral=False)
 
@@ -179,7 +218,13 @@ class CloseConfirmView(discord.ui.View):
         await interaction.response.defer()
         
         # Update ticket in database
+        ticket = await TicketManager.get_ticket_by_channel(interaction.channel.id)
         await TicketManager.close_ticket(interaction.channel.id, interaction.user.id)
+
+        # Snapshot the transcript into the local archive while the channel still exists
+        cog = interaction.client.get_cog("Ticket")
+        if cog and ticket:
+            cog.start_archive(interaction.channel, ticket, interaction.user.id)
         
         # Rename channel
         await interaction.channel.edit(name=f"closed-ticket-{self.ticket_number}")
@@ -208,111 +253,495 @@ class TranscriptDeleteView(discord.ui.View):
     async def transcript(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer(ephemeral=True)
         
-        # Generate transcript
-        messages = []
-        async for message in interaction.channel.history(limit=500, oldest_first=True):
-            timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            content = message.content or "[Embed/Attachment]"
-            messages.append(f"[{timestamp}] {message.author}: {content}")
-        
-        transcript_text = "\n".join(messages)
-        file = discord.File(io.BytesIO(transcript_text.encode()), filename=f"transcript-{interaction.channel.name}.txt")
-        
-        await interaction.followup.send("📜 Ticket transcript:", file=file, ephemeral=True)
+        # Stream the full history into a temp file (no message cap, flat memory)
+        exporter = TranscriptExporter(
+            interaction.channel,
+            fmt=Config.TRANSCRIPT_FORMAT,
+            compress=Config.TRANSCRIPT_COMPRESS
+        )
+        await send_transcript(interaction, exporter, "📜 Ticket transcript:")
 
     @discord.ui.button(label="Delete Channel", style=discord.ButtonStyle.red, emoji="🗑️", custom_id="ticket:delete")
     async def delete_channel(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_message("🗑️ Deleting channel in 5 seconds...", ephemeral=False)
         await asyncio.sleep(5)
+
+        # Never delete history that is still being archived
+        cog = interaction.client.get_cog("Ticket")
+        archiving = cog.archive_tasks.get(interaction.channel.id) if cog else None
+        if archiving:
+            await asyncio.wait([archiving])
         await interaction.channel.delete(reason=f"Ticket deleted by {interaction.user}")
 
 # ======================= TICKET COG =======================
 class Ticket(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ticket_manager_role_id = None
+        self.guild_configs: Dict[int, TicketGuildConfig] = {}
+        self.inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+        self.latency = LatencyTracker()
+        self.archive = BlobStore(Config.ARCHIVE_DIR)
+        self.archive_tasks: Dict[int, asyncio.Task] = {}
+        self.provision_task: Optional[asyncio.Task] = None
+        self.provision_stats = {"done": 0, "total": 0, "created": 0, "failed": 0, "seconds": 0.0}
+        self.lifecycle_task: Optional[asyncio.Task] = None
+        self.sweep_stats = {"runs": 0, "seconds": 0.0, "scanned": 0, "orphans_closed": 0, "idle_closed": 0, "channels_deleted": 0, "purge_failed": 0, "moved_to_history": 0}
 
     async def cog_load(self):
-        await TicketManager.init_db()
-
-        # Auto-create Ticket Manager role for all guilds
-        for guild in self.bot.guilds:
-            role = discord.utils.get(guild.roles, name="Ticket Manager")
-            if not role:
-                role = await guild.create_role(
-                    name="Ticket Manager",
-                    color=discord.Color.blue(),
-                    permissions=discord.Permissions(manage_channels=True, manage_messages=True)
-                )
-            self.ticket_manager_role_id = role.id
+        # Role provisioning needs the guild cache, so it runs after ready without blocking startup
+        self.provision_task = asyncio.create_task(self.provision_manager_roles())
+        self.lifecycle_task = asyncio.create_task(self.lifecycle_loop())
 
         # Register persistent views
         self.bot.add_view(TicketMainPanel())
         self.bot.add_view(ButtonTicketPanel())
         self.bot.add_view(DropdownTicketPanel())
 
+    async def cog_unload(self):
+        for task in (self.provision_task, self.lifecycle_task):
+            if task:
+                task.cancel()
+
+    # ---------- Ticket Manager role provisioning ---------- #
+    async def provision_manager_roles(self):
+        """Ensure every guild has a Ticket Manager role, with bounded concurrency"""
+        await self.bot.wait_until_ready()
+        guilds = list(self.bot.guilds)
+        self.provision_stats.update(done=0, total=len(guilds), created=0, failed=0)
+        start = time.perf_counter()
+        await self.preload_configs(guilds)
+
+        # discord.py already queues per-route buckets (role creation is bucketed per guild);
+        # the semaphore just keeps us from flooding the global limit and the DB pool
+        semaphore = asyncio.Semaphore(Config.TICKET_PROVISION_CONCURRENCY)
+
+        async def run(guild: discord.Guild):
+            async with semaphore:
+                await self.provision_guild(guild)
+            self.provision_stats["done"] += 1
+            if self.provision_stats["done"] % 500 == 0:
+                print(f"{Emotes.LOADING} Ticket roles: {self.provision_stats['done']}/{len(guilds)} guilds")
+
+        await asyncio.gather(*(run(guild) for guild in guilds))
+        self.provision_stats["seconds"] = time.perf_counter() - start
+        print(
+            f"{Emotes.SUCCESS} Ticket roles provisioned for {len(guilds)} guilds in "
+            f"{self.provision_stats['seconds']:.1f}s ({self.provision_stats['created']} created, "
+            f"{self.provision_stats['failed']} failed)"
+        )
+
+    async def provision_guild(self, guild: discord.Guild):
+        try:
+            await self.ensure_manager_role(guild)
+        except Exception as e:
+            self.provision_stats["failed"] += 1
+            print(f"{Emotes.ERROR} Failed to provision Ticket Manager role in {guild.name}: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        await self.provision_guild(guild)
+
+    # ---------- lifecycle scheduler ---------- #
+    async def lifecycle_loop(self):
+        """Periodically reconcile, auto-close and purge tickets"""
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            try:
+                await self.sweep_tickets()
+            except Exception as e:
+                print(f"{Emotes.ERROR} Ticket sweep failed: {e}")
+            await asyncio.sleep(Config.TICKET_SWEEP_INTERVAL)
+
+    async def sweep_tickets(self):
+        """One pass over open and expired-closed tickets, batch by batch"""
+        start = time.perf_counter()
+        idle_cutoff = None
+        if Config.TICKET_IDLE_CLOSE_HOURS:
+            idle_cutoff = discord.utils.utcnow() - timedelta(hours=Config.TICKET_IDLE_CLOSE_HOURS)
+        semaphore = asyncio.Semaphore(Config.TICKET_SWEEP_CONCURRENCY)
+        counts = {"scanned": 0, "orphans_closed": 0, "idle_closed": 0, "channels_deleted": 0, "purge_failed": 0, "moved_to_history": 0}
+
+        # shard_ids is None when this process runs every shard
+        shard_ids = self.bot.shard_ids
+        shard_count = self.bot.shard_count if shard_ids is not None else None
+
+        last_id = 0
+        while True:
+            rows = await TicketManager.get_sweep_batch(
+                last_id, Config.TICKET_CLOSED_RETENTION_HOURS or None, Config.TICKET_SWEEP_BATCH,
+                shard_count, shard_ids
+            )
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            counts["scanned"] += len(rows)
+
+            orphans, idle, expired = [], [], []
+            for row in rows:
+                guild = self.bot.get_guild(row["guild_id"])
+                if guild is None or guild.unavailable:
+                    continue  # not ours (other shard) or not loaded yet
+                channel = guild.get_channel(row["channel_id"])
+                if row["status"] == "open":
+                    if channel is None:
+                        orphans.append(row["channel_id"])
+                    elif idle_cutoff and discord.utils.snowflake_time(channel.last_message_id or channel.id) < idle_cutoff:
+                        idle.append((channel, row))
+                else:
+                    expired.append((channel, row))
+
+            if orphans:
+                await TicketManager.close_tickets(orphans, None)
+                counts["orphans_closed"] += len(orphans)
+
+            if idle:
+                await TicketManager.close_tickets([channel.id for channel, _ in idle], self.bot.user.id)
+                await asyncio.gather(*(self._bounded(semaphore, self.close_idle_channel(channel, row)) for channel, row in idle))
+                counts["idle_closed"] += len(idle)
+
+            if expired:
+                results = await asyncio.gather(*(self._bounded(semaphore, self.purge_channel(channel)) for channel, _ in expired))
+                # Failed deletes stay unpurged so the next sweep retries them
+                done = [row["channel_id"] for (_, row), deleted in zip(expired, results) if deleted is not None]
+                if done:
+                    await TicketManager.mark_purged(done)
+                counts["channels_deleted"] += sum(1 for deleted in results if deleted)
+                counts["purge_failed"] += len(expired) - len(done)
+
+            if len(rows) < Config.TICKET_SWEEP_BATCH:
+                break
+
+        # History moves are table-wide, so only the process owning shard 0 runs them
+        if Config.TICKET_HISTORY_AFTER_DAYS and (shard_ids is None or 0 in shard_ids):
+            counts["moved_to_history"] = await TicketManager.move_to_history(Config.TICKET_HISTORY_AFTER_DAYS)
+
+        self.sweep_stats["runs"] += 1
+        self.sweep_stats["seconds"] = time.perf_counter() - start
+        self.sweep_stats.update(counts)
+
+    @staticmethod
+    async def _bounded(semaphore: asyncio.Semaphore, coro):
+        async with semaphore:
+            return await coro
+
+    async def close_idle_channel(self, channel: discord.TextChannel, row: dict):
+        try:
+            self.start_archive(channel, row, self.bot.user.id)
+            await channel.edit(name=f"closed-ticket-{row['ticket_number']}")
+            embed = discord.Embed(
+                title="🔒 Ticket Closed",
+                description=f"This ticket was closed automatically after {Config.TICKET_IDLE_CLOSE_HOURS}h without activity.",
+                color=discord.Color.red(),
+                timestamp=datetime.utcnow()
+            )
+            await channel.send(embed=embed, view=TranscriptDeleteView())
+        except discord.HTTPException as e:
+            print(f"{Emotes.ERROR} Failed to auto-close {channel.name}: {e}")
+
+    async def purge_channel(self, channel: Optional[discord.TextChannel]) -> Optional[bool]:
+        """Delete a closed ticket's channel once its archive snapshot is done.
+
+        True if deleted, False if it was already gone, None if the delete failed.
+        """
+        if channel is None:
+            return False
+        archiving = self.archive_tasks.get(channel.id)
+        if archiving:
+            await asyncio.wait([archiving])
+        try:
+            await channel.delete(reason="Closed ticket retention period expired")
+            return True
+        except discord.NotFound:
+            return False
+        except discord.HTTPException as e:
+            print(f"{Emotes.ERROR} Failed to delete closed ticket {channel.name}: {e}")
+            return None
+
+    # ---------- per-guild config cache ---------- #
+    async def get_config(self, guild: discord.Guild) -> TicketGuildConfig:
+        """Resolved ticket config for a guild, loaded from ticket_settings once"""
+        config = self.guild_configs.get(guild.id)
+        if config is None:
+            config = TicketGuildConfig(await TicketManager.load_settings(guild.id))
+            self.guild_configs[guild.id] = config
+        return config
+
+    async def preload_configs(self, guilds: List[discord.Guild]):
+        """Fill the config cache for many guilds with a few bulk queries instead of one each"""
+        try:
+            settings = await TicketManager.load_settings_many([guild.id for guild in guilds])
+        except DatabaseUnavailable:
+            return  # get_config falls back to per-guild snapshots
+        for guild in guilds:
+            self.guild_configs.setdefault(guild.id, TicketGuildConfig(settings.get(guild.id)))
+
+    async def save_config(self, guild_id: int, config: TicketGuildConfig):
+        await TicketManager.save_settings(guild_id, config.manager_role_id, config.log_channel_id, config.category_id)
+        self.guild_configs[guild_id] = config
+
+    async def ensure_manager_role(self, guild: discord.Guild) -> discord.Role:
+        config = await self.get_config(guild)
+        role = guild.get_role(config.manager_role_id) if config.manager_role_id else None
+        if role is None:
+            # One-time adoption of roles created before IDs were stored
+            role = discord.utils.get(guild.roles, name="Ticket Manager")
+        if role is None:
+            role = await guild.create_role(
+                name="Ticket Manager",
+                color=discord.Color.blue(),
+                permissions=discord.Permissions(manage_channels=True, manage_messages=True)
+            )
+            self.provision_stats["created"] += 1
+        if role.id != config.manager_role_id:
+            config.manager_role_id = role.id
+            await self.save_config(guild.id, config)
+        return role
+
+    async def ensure_ticket_category(self, guild: discord.Guild,
+                                     config: Optional[TicketGuildConfig] = None) -> discord.CategoryChannel:
+        """The guild's ticket category, created if needed; pass `config` when the caller already holds it"""
+        config = config or await self.get_config(guild)
+        category = guild.get_channel(config.category_id) if config.category_id else None
+        if not isinstance(category, discord.CategoryChannel):
+            category = discord.utils.get(guild.categories, name="Tickets") if config.category_id is None else None
+            if category is None:
+                category = await guild.create_category("Tickets")
+            config.category_id = category.id
+            await self.save_config(guild.id, config)
+        return category
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        config = self.guild_configs.get(role.guild.id)
+        if config and config.manager_role_id == role.id:
+            self.guild_configs.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        config = self.guild_configs.get(channel.guild.id)
+        if config and channel.id in (config.category_id, config.log_channel_id):
+            self.guild_configs.pop(channel.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.guild_configs.pop(guild.id, None)
+
     async def create_ticket_from_panel(self, interaction: discord.Interaction, category_name: str):
         await interaction.response.defer(ephemeral=True)
 
-        # Check for existing ticket
-        existing = await TicketManager.get_user_ticket(interaction.guild.id, interaction.user.id)
-        if existing:
-            channel = interaction.guild.get_channel(existing['channel_id'])
-            if channel:
-                return await interaction.followup.send(f"❌ You already have an open ticket: {channel.mention}", ephemeral=True)
-
-        # Get or create Tickets category
-        cat = discord.utils.get(interaction.guild.categories, name="Tickets")
-        if not cat:
-            cat = await interaction.guild.create_category("Tickets")
-
-        # Get ticket count
-        count = await TicketManager.get_ticket_count(interaction.guild.id) + 1
-
-        # Get Ticket Manager role
-        manager_role = discord.utils.get(interaction.guild.roles, name="Ticket Manager")
-
-        # Create ticket channel with proper permissions
-        overwrites = {
-            interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-            interaction.guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-        }
-        
-        if manager_role:
-            overwrites[manager_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
+        # Double clicks share the first click's pipeline instead of starting another
+        key = (interaction.guild.id, interaction.user.id)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self.run_ticket_pipeline(interaction.guild, interaction.user, category_name))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        try:
+            result = await asyncio.shield(task)
+        except DatabaseUnavailable:
+            result = "❌ Tickets are temporarily unavailable, please try again in a minute."
+
+        with self.latency.stage("reply"):
+            await interaction.followup.send(result, ephemeral=True)
+
+    async def run_ticket_pipeline(self, guild: discord.Guild, user: discord.Member, category_name: str) -> str:
+        """Create a ticket, overlapping independent steps; returns the reply for the user"""
+        with self.latency.stage("total"):
+            # Existence check overlaps with the config load; the category then resolves from that
+            # one config object, so a cold cache can't load it twice and lose the category write
+            with self.latency.stage("lookup"):
+                existing, config = await asyncio.gather(
+                    TicketManager.get_user_ticket(guild.id, user.id),
+                    self.get_config(guild)
+                )
+                cat = await self.ensure_ticket_category(guild, config)
+            if existing:
+                channel = guild.get_channel(existing['channel_id'])
+                if channel:
+                    return f"❌ You already have an open ticket: {channel.mention}"
+                # Its channel is gone; close the row like the lifecycle sweep would, or the insert
+                # below trips the one-open-ticket-per-user index on every retry until the sweep runs
+                await TicketManager.close_tickets([existing['channel_id']], None)
+
+            # Allocate ticket number (atomic per-guild counter)
+            with self.latency.stage("number"):
+                count = await TicketManager.next_ticket_number(guild.id)
+
+            manager_role = guild.get_role(config.manager_role_id) if config.manager_role_id else None
+
+            # Create ticket channel with proper permissions
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                user: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+                guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+            }
+            
+            if manager_role:
+                overwrites[manager_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
+
+            with self.latency.stage("channel"):
+                ticket_channel = await cat.create_text_channel(
+                    name=f"{user.name}-ticket-{count}",
+                    overwrites=overwrites
+                )
 
-        ticket_channel = await cat.create_text_channel(
-            name=f"{interaction.user.name}-ticket-{count}",
-            overwrites=overwrites
-        )
+            # Create embed
+            embed = discord.Embed(
+                title=f"🎫 {category_name}",
+                description=(
+                    f"**Ticket Number:** `#{count}`\n"
+                    f"**Created by:** {user.mention}\n"
+                    f"**Category:** {category_name}\n\n"
+                    "Our support team will assist you shortly!\n"
+                    "Use the buttons below to manage this ticket."
+                ),
+                color=discord.Color.green(),
+                timestamp=datetime.utcnow()
+            )
+            embed.set_footer(text=f"Ticket #{count}")
+
+            # Save to database while the panel is being sent
+            with self.latency.stage("save_and_panel"):
+                saved, panel = await asyncio.gather(
+                    TicketManager.create_ticket(guild.id, user.id, ticket_channel.id, count, category_name),
+                    ticket_channel.send(
+                        f"{user.mention} {manager_role.mention if manager_role else ''}",
+                        embed=embed,
+                        view=TicketControlView(self.bot, count)
+                    ),
+                    return_exceptions=True
+                )
+            if isinstance(saved, BaseException):
+                # Lost a race with another process; don't leave an untracked channel behind
+                await ticket_channel.delete(reason="Ticket could not be saved")
+                print(f"{Emotes.ERROR} Failed to save ticket for {user} in {guild.name}: {saved}")
+                return "❌ Could not create your ticket, please try again."
+            if isinstance(panel, BaseException):
+                # A ticket without its controls can't be closed; undo it so the user can open another
+                await TicketManager.close_tickets([ticket_channel.id], None)
+                await ticket_channel.delete(reason="Ticket panel could not be sent")
+                print(f"{Emotes.ERROR} Failed to send ticket panel for {user} in {guild.name}: {panel}")
+                return "❌ Could not create your ticket, please try again."
+
+            # Remember the panel so claims can edit it by ID
+            with self.latency.stage("panel_id"):
+                await TicketManager.set_panel_message(ticket_channel.id, panel.id)
+
+            return f"✅ Ticket created: {ticket_channel.mention}"
+
+    def start_archive(self, channel: discord.TextChannel, ticket: dict, closed_by: int):
+        """Archive a closed ticket in the background; delete_channel waits for it"""
+        task = asyncio.create_task(self.archive_ticket(channel, ticket, closed_by))
+        self.archive_tasks[channel.id] = task
+        task.add_done_callback(lambda _: self.archive_tasks.pop(channel.id, None))
+
+    async def archive_ticket(self, channel: discord.TextChannel, ticket: dict, closed_by: int):
+        try:
+            snapshot = await archive_channel(channel, self.archive)
+            await TranscriptManager.save_transcript(
+                guild_id=channel.guild.id,
+                channel_id=channel.id,
+                ticket_number=ticket.get("ticket_number"),
+                user_id=ticket.get("user_id"),
+                closed_by=closed_by,
+                blob_hash=snapshot.blob_hash,
+                attachment_hashes=snapshot.attachment_hashes,
+                participants=list(snapshot.participants),
+                message_count=snapshot.message_count,
+                search_text=snapshot.search_text
+            )
+        except Exception as e:
+            print(f"{Emotes.ERROR} Failed to archive ticket {channel.name}: {e}")
 
-        # Save to database
-        await TicketManager.create_ticket(interaction.guild.id, interaction.user.id, ticket_channel.id, count)
+    @commands.command(name="ticketsearch", aliases=["tsearch"])
+    @commands.has_permissions(manage_channels=True)
+    async def ticket_search(self, ctx, member: Optional[discord.Member] = None, *, query: Optional[str] = None):
+        """Search archived tickets by keyword and/or participant"""
+        if not member and not query:
+            return await ctx.send(f"❌ Usage: `{ctx.prefix}ticketsearch [@user] [keywords]`")
 
-        # Create embed
+        results = await TranscriptManager.search(ctx.guild.id, query=query, user_id=member.id if member else None)
         embed = discord.Embed(
-            title=f"🎫 {category_name}",
-            description=(
-                f"**Ticket Number:** `#{count}`\n"
-                f"**Created by:** {interaction.user.mention}\n"
-                f"**Category:** {category_name}\n\n"
-                "Our support team will assist you shortly!\n"
-                "Use the buttons below to manage this ticket."
-            ),
-            color=discord.Color.green(),
+            title="🔍 Archived Tickets",
+            color=discord.Color.blue(),
             timestamp=datetime.utcnow()
         )
-        embed.set_footer(text=f"Ticket #{count}")
+        if not results:
+            embed.description = "No archived tickets matched."
+        else:
+            embed.description = "\n".join(
+                f"`{row['id']}` • Ticket #{row['ticket_number']} • <@{row['user_id']}> • "
+                f"{row['message_count']} messages • {row['archived_at'].strftime('%Y-%m-%d')}"
+                for row in results
+            )
+        embed.set_footer(text=f"Use {ctx.prefix}tickettranscript <id> [digest] to download • Requested by {ctx.author}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="tickettranscript", aliases=["ttranscript"])
+    @commands.has_permissions(manage_channels=True)
+    async def ticket_transcript(self, ctx, transcript_id: int, attachment: Optional[str] = None):
+        """Download an archived transcript, or one of its stored attachments by the digest listed in it"""
+        row = await TranscriptManager.get_transcript(ctx.guild.id, transcript_id)
+        if not row or not self.archive.exists(row["blob_hash"]):
+            return await ctx.send("❌ Archived transcript not found!")
+        if attachment:
+            return await self.send_archived_attachment(ctx, row, attachment.lower())
 
-        # Send ticket message
-        await ticket_channel.send(
-            f"{interaction.user.mention} {manager_role.mention if manager_role else ''}",
-            embed=embed,
-            view=TicketControlView(self.bot, count)
+        try:
+            with self.archive.open(row["blob_hash"]) as fp:
+                await upload_parts(
+                    ctx.send, fp,
+                    filename=f"transcript-ticket-{row['ticket_number']}.txt.gz",
+                    size=self.archive.size(row["blob_hash"]),
+                    limit=ctx.guild.filesize_limit,
+                    content=f"📜 Archived transcript `{row['id']}` ({row['message_count']} messages):"
+                )
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ Could not upload the transcript: {e}")
+
+    async def send_archived_attachment(self, ctx, row: dict, digest: str):
+        """Upload an attachment stored with an archived transcript; a unique digest prefix is enough"""
+        matches = [h for h in row["attachment_hashes"] if h.startswith(digest)]
+        if len(digest) < 8 or len(matches) != 1 or not self.archive.exists(matches[0]):
+            return await ctx.send("❌ No stored attachment with that digest in this transcript!")
+        digest = matches[0]
+
+        name = await asyncio.to_thread(attachment_name, self.archive, row["blob_hash"], digest) or digest[:16]
+        data = await asyncio.to_thread(self.archive.load, digest)
+        size = len(data.getbuffer())
+        if size > ctx.guild.filesize_limit:
+            return await ctx.send(f"❌ `{name}` is too large to upload here ({size / 1048576:.1f} MB).")
+        try:
+            await ctx.send(f"📎 `{name}` from archived transcript `{row['id']}`:", file=discord.File(data, filename=name))
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ Could not upload the attachment: {e}")
+
+    @commands.command(name="ticketperf")
+    @commands.is_owner()
+    async def ticket_perf(self, ctx):
+        """Ticket creation latency per pipeline stage"""
+        summary = self.latency.percentiles()
+        embed = discord.Embed(
+            title="⏱️ Ticket Pipeline Latency",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
         )
-
-        await interaction.followup.send(f"✅ Ticket created: {ticket_channel.mention}", ephemeral=True)
+        embed.description = "\n".join(
+            f"• **{name}**: p50 `{data['p50_ms']:.0f}ms` • p99 `{data['p99_ms']:.0f}ms` ({data['count']} samples)"
+            for name, data in summary.items()
+        ) or "No tickets created yet."
+        sweep = self.sweep_stats
+        embed.add_field(
+            name="Lifecycle Sweep",
+            value=(
+                f"`{sweep['seconds'] * 1000:.0f}ms` last run • `{sweep['scanned']}` scanned\n"
+                f"`{sweep['orphans_closed']}` orphans • `{sweep['idle_closed']}` idle closed • "
+                f"`{sweep['channels_deleted']}` channels deleted • `{sweep['purge_failed']}` retrying • "
+                f"`{sweep['moved_to_history']}` moved to history"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
 
     @commands.command(name="ticket", aliases=["t"])
     async def ticket_command(self, ctx):
@@ -1,13 +1,163 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
 import asyncio
+import logging
+import time
+import re
 
-from utils.models.customutils import WelcomeManager
+from utils.models.customutils import WelcomeManager, LRUCache, DatabaseUnavailable
 from utils.config import Config
 from utils.emotes import Emotes
 
+# ======================= WELCOME TEMPLATES =======================
+COLOR_MAP = {
+    'red': discord.Color.red(),
+    'green': discord.Color.green(),
+    'blue': discord.Color.blue(),
+    'gold': discord.Color.gold(),
+    'purple': discord.Color.purple(),
+    'orange': discord.Color.orange(),
+    'teal': discord.Color.teal(),
+    'magenta': discord.Color.magenta(),
+    'dark_red': discord.Color.dark_red(),
+    'dark_green': discord.Color.dark_green(),
+    'dark_blue': discord.Color.dark_blue(),
+    'dark_purple': discord.Color.dark_purple(),
+    'dark_teal': discord.Color.dark_teal(),
+    'dark_magenta': discord.Color.dark_magenta(),
+    'dark_gold': discord.Color.dark_gold(),
+    'dark_orange': discord.Color.dark_orange(),
+}
+
+DEFAULT_TITLE = "👋 Welcome to {server}!"
+DEFAULT_DESCRIPTION = "Welcome {user}! We're glad to have you here. 🎉"
+DEFAULT_FOOTER = "Enjoy your stay!"
+
+
+def parse_color(color_str: Optional[str]) -> discord.Color:
+    """Parse a hex or named color, falling back to green"""
+    try:
+        if color_str.startswith('#'):
+            return discord.Color(int(color_str[1:], 16))
+        return COLOR_MAP.get(color_str.lower(), discord.Color.green())
+    except:
+        return discord.Color.green()
+
+
+def normalize_color(color_str: str) -> str:
+    """Resolve a color once at save time so rendering never has to parse names"""
+    return f"#{parse_color(color_str).value:06x}"
+
+
+def ordinal(n: int) -> str:
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n:,}{suffix}"
+
+
+def account_age(created_at: datetime) -> str:
+    days = (discord.utils.utcnow() - created_at).days
+    if days >= 365:
+        years = days // 365
+        return f"{years} year{'s' if years != 1 else ''}"
+    if days >= 30:
+        months = days // 30
+        return f"{months} month{'s' if months != 1 else ''}"
+    return f"{days} day{'s' if days != 1 else ''}"
+
+
+# Placeholder name -> value factory; only the ones a template uses are evaluated.
+# `count` is the guild's member count as of the member's join, not as of rendering.
+PLACEHOLDERS = {
+    "user": lambda member, inviter, count: member.mention,
+    "username": lambda member, inviter, count: str(member),
+    "server": lambda member, inviter, count: member.guild.name,
+    "membercount": lambda member, inviter, count: str(count),
+    "joinposition": lambda member, inviter, count: ordinal(count or 0),
+    "accountage": lambda member, inviter, count: account_age(member.created_at),
+    "inviter": lambda member, inviter, count: inviter.mention if inviter else "Unknown",
+}
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class WelcomeTemplate:
+    """Template text split once into literal chunks and placeholder slots"""
+
+    __slots__ = ("parts", "names")
+
+    def __init__(self, text: str):
+        # Even indices are literal text, odd indices are placeholder names
+        self.parts: List[str] = []
+        self.names = set()
+        literal_start = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(text):
+            name = match.group(1)
+            if name not in PLACEHOLDERS:
+                continue
+            self.parts.append(text[literal_start:match.start()])
+            self.parts.append(name)
+            self.names.add(name)
+            literal_start = match.end()
+        self.parts.append(text[literal_start:])
+
+    def render(self, values: Dict[str, str]) -> str:
+        if len(self.parts) == 1:
+            return self.parts[0]
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+
+class CompiledWelcome:
+    """A guild's welcome settings compiled once for fast per-join rendering"""
+
+    __slots__ = ("settings", "title", "description", "footer", "color", "thumbnail", "image", "names")
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.title = WelcomeTemplate(settings.get('title') or DEFAULT_TITLE)
+        self.description = WelcomeTemplate(settings.get('description') or DEFAULT_DESCRIPTION)
+        self.footer = WelcomeTemplate(settings.get('footer') or DEFAULT_FOOTER)
+        self.color = parse_color(settings.get('color') or "#00ff00")
+        self.thumbnail = settings.get('thumbnail')
+        self.image = settings.get('image')
+        self.names = self.title.names | self.description.names | self.footer.names
+
+    def render(self, member: discord.Member, inviter: Optional[discord.abc.User] = None,
+               member_count: Optional[int] = None) -> discord.Embed:
+        """`member_count` is the count recorded at join time; defaults to the guild's current count"""
+        if member_count is None:
+            member_count = member.guild.member_count
+        values = {name: PLACEHOLDERS[name](member, inviter, member_count) for name in self.names}
+        embed = discord.Embed(
+            title=self.title.render(values),
+            description=self.description.render(values),
+            color=self.color,
+            timestamp=datetime.utcnow()
+        )
+
+        # Set thumbnail (custom or user avatar)
+        if self.thumbnail:
+            embed.set_thumbnail(url=self.thumbnail)
+        elif member.avatar:
+            embed.set_thumbnail(url=member.display_avatar.url)
+
+        # Set main image (banner)
+        if self.image:
+            embed.set_image(url=self.image)
+
+        # Mentions don't render in footers, so {user} falls back to the plain name there
+        if "user" in self.footer.names:
+            values["user"] = str(member)
+        embed.set_footer(text=self.footer.render(values), icon_url=member.display_avatar.url if member.avatar else None)
+        return embed
+
 # ======================= WELCOME SETUP PANEL =======================
 class WelcomeSetupPanel(discord.ui.View):
     def __init__(self):
@@ -138,7 +288,7 @@ class ManualWelcomeModal(discord.ui.Modal, title="Manual Welcome Setup"):
         title = self.title_input.value.strip()
         description = self.description_input.value.strip()
         footer = self.footer_input.value.strip() or "Welcome!"
-        color = self.color_input.value.strip() or "#00ff00"
+        color = normalize_color(self.color_input.value.strip() or "#00ff00")
 
         await WelcomeManager.update_settings(
             guild_id=interaction.guild.id,
@@ -159,7 +309,7 @@ class ManualWelcomeModal(discord.ui.Modal, title="Manual Welcome Setup"):
         embed.add_field(name="Description", value=description[:1024], inline=False)
         embed.add_field(name="Footer", value=footer, inline=False)
         embed.add_field(name="Color", value=color, inline=False)
-        embed.set_footer(text="Placeholders: {user} {username} {server} {membercount}")
+        embed.set_footer(text="Placeholders: {user} {username} {server} {membercount} {joinposition} {accountage} {inviter}")
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -215,18 +365,321 @@ class BannerThumbnailModal(discord.ui.Modal, title="Banner & Thumbnail Setup"):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+# ======================= WELCOME DELIVERY =======================
+class RateLimitWaits(logging.Filter):
+    """Totals the 429 retry sleeps discord.py takes on welcome sends, read from its `discord.http` warnings.
+
+    Only message sends to channels in `sending` are counted; the records themselves pass through untouched.
+    """
+
+    FORMAT = 'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.'
+    MESSAGES_URL = re.compile(r'/channels/(\d+)/messages$')
+
+    def __init__(self, sending: set):
+        super().__init__()
+        self.sending = sending
+        self.hits = 0
+        self.wait_total = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.msg == self.FORMAT and len(record.args) == 3:
+            method, url, retry_after = record.args
+            match = self.MESSAGES_URL.search(str(url))
+            if method == 'POST' and match and int(match.group(1)) in self.sending:
+                self.hits += 1
+                self.wait_total += retry_after
+        return True
+
+
+class WelcomeBatcher:
+    """Collects joins per channel and delivers each window as a single message"""
+
+    MAX_EMBEDS = 10  # Discord's per-message embed limit
+    MAX_EMBED_CHARS = 6000  # Discord's limit on the combined text of a message's embeds
+    MAX_SUMMARY_LENGTH = 4000
+
+    def __init__(self, cog: "Welcome"):
+        self.cog = cog
+        self.pending: Dict[int, List[Tuple[discord.Member, dict, int]]] = {}
+        self.first_queued: Dict[int, float] = {}
+        self.timers: Dict[int, asyncio.Task] = {}
+        self.background: set = set()
+
+        self.messages_sent = 0
+        self.members_delivered = 0
+        self.flush_latency_total = 0.0
+        self.flush_latency_max = 0.0
+        self.send_time_total = 0.0  # wall time of channel.send: round-trips plus any rate-limit waits
+        self.sending: set = set()  # channel ids with a send in flight
+        self.rate_limits = RateLimitWaits(self.sending)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(batch) for batch in self.pending.values())
+
+    def add(self, channel: discord.TextChannel, member: discord.Member, settings: dict):
+        """Queue a join; flushes after the window or once the batch is full"""
+        batch = self.pending.setdefault(channel.id, [])
+        if not batch:
+            self.first_queued[channel.id] = time.perf_counter()
+        # Recorded now: the batch renders later, when the guild's count already includes later joins
+        batch.append((member, settings, member.guild.member_count))
+
+        if len(batch) >= Config.WELCOME_BATCH_MAX_MEMBERS:
+            timer = self.timers.pop(channel.id, None)
+            if timer:
+                timer.cancel()
+            task = asyncio.create_task(self.deliver(channel, *self._take(channel.id)))
+            self.background.add(task)
+            task.add_done_callback(self.background.discard)
+        elif channel.id not in self.timers:
+            self.timers[channel.id] = asyncio.create_task(self._flush_later(channel))
+
+    def _take(self, channel_id: int):
+        return self.pending.pop(channel_id, []), self.first_queued.pop(channel_id, time.perf_counter())
+
+    async def _flush_later(self, channel: discord.TextChannel):
+        await asyncio.sleep(Config.WELCOME_BATCH_WINDOW)
+        self.timers.pop(channel.id, None)
+        await self.deliver(channel, *self._take(channel.id))
+
+    async def deliver(self, channel: discord.TextChannel, batch: list, queued_at: float):
+        """Send the batch as few messages as Discord's embed limits allow"""
+        if not batch:
+            return
+        try:
+            # Only guilds whose templates use {inviter} pay for an invite lookup, once per batch
+            inviters = {}
+            if any("inviter" in self.cog.get_compiled(member.guild.id, settings).names for member, settings, _ in batch):
+                inviters = await self.cog.invites.attribute(channel.guild, [member for member, _, _ in batch])
+
+            if len(batch) <= self.MAX_EMBEDS:
+                rendered = [
+                    (member, await self.cog.create_welcome_embed(member, settings, inviters.get(member.id), member_count))
+                    for member, settings, member_count in batch
+                ]
+                messages = self.split_by_size(rendered)
+            else:
+                messages = [([], [await self.create_summary_embed(batch, inviters)])]
+
+            for members, embeds in messages:
+                content = " ".join(member.mention for member in members) or None
+                # A summary message has no per-member mentions but covers the whole batch
+                if not await self.send(channel, content, embeds, len(members) or len(batch)):
+                    break
+        finally:
+            latency = time.perf_counter() - queued_at
+            self.flush_latency_total += latency
+            self.flush_latency_max = max(self.flush_latency_max, latency)
+
+    def split_by_size(self, rendered: List[Tuple[discord.Member, discord.Embed]]) -> List[Tuple[list, list]]:
+        """Group (member, embed) pairs into messages that stay within the embed character limit"""
+        messages = []
+        size = 0
+        for member, embed in rendered:
+            if not messages or size + len(embed) > self.MAX_EMBED_CHARS:
+                messages.append(([], []))
+                size = 0
+            messages[-1][0].append(member)
+            messages[-1][1].append(embed)
+            size += len(embed)
+        return messages
+
+    async def send(self, channel: discord.TextChannel, content: Optional[str], embeds: list, members: int) -> bool:
+        """Send one welcome message; False when the channel can't be written to at all"""
+        send_start = time.perf_counter()
+        self.sending.add(channel.id)
+        try:
+            await channel.send(content=content, embeds=embeds)
+        except discord.Forbidden:
+            print(f"{Emotes.ERROR} No permission to send welcome message in {channel.name}")
+            return False
+        except discord.HTTPException as e:
+            print(f"{Emotes.ERROR} Failed to send welcome batch in {channel.name}: {e}")
+            return True
+        finally:
+            self.sending.discard(channel.id)
+            self.send_time_total += time.perf_counter() - send_start
+        self.messages_sent += 1
+        self.members_delivered += members
+        return True
+
+    async def create_summary_embed(self, batch: list, inviters: Dict[int, discord.abc.User]) -> discord.Embed:
+        """One embed welcoming a large wave of members by mention"""
+        member, settings, member_count = batch[-1]
+        embed = await self.cog.create_welcome_embed(member, settings, inviters.get(member.id), member_count)
+        embed.title = f"👋 Welcome to {member.guild.name}, {len(batch)} new members!"
+
+        mentions = []
+        length = 0
+        for joined, _, _ in batch:
+            if length + len(joined.mention) + 1 > self.MAX_SUMMARY_LENGTH:
+                mentions.append(f"...and {len(batch) - len(mentions)} more")
+                break
+            mentions.append(joined.mention)
+            length += len(joined.mention) + 1
+        embed.description = " ".join(mentions)
+
+        if member.guild.icon:
+            embed.set_thumbnail(url=member.guild.icon.url)
+        return embed
+
+    async def drain(self):
+        """Deliver everything still queued (used on unload)"""
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        for channel_id in list(self.pending):
+            channel = self.cog.bot.get_channel(channel_id)
+            batch, queued_at = self._take(channel_id)
+            if channel:
+                await self.deliver(channel, batch, queued_at)
+
+    def stats(self) -> Dict:
+        flushes = self.messages_sent or 1
+        return {
+            "queue_depth": self.queue_depth,
+            "messages_sent": self.messages_sent,
+            "members_delivered": self.members_delivered,
+            "flush_latency_avg_ms": self.flush_latency_total / flushes * 1000,
+            "flush_latency_max_ms": self.flush_latency_max * 1000,
+            "send_time_total_s": self.send_time_total,
+            "rate_limited": self.rate_limits.hits,
+            "rate_limit_wait_s": self.rate_limits.wait_total
+        }
+
+# ======================= INVITE TRACKING =======================
+class InviteTracker:
+    """Invite use counts per guild, kept warm from gateway events, for attributing joins to inviters.
+
+    The join path never calls the API: a delivered batch costs one invites fetch for its guild,
+    diffed under the guild's lock. A batch is attributed only when exactly one invite gained
+    exactly as many uses as the batch has members - anything else is ambiguous and gives None.
+    """
+
+    def __init__(self):
+        self.uses: Dict[int, Dict[str, int]] = {}
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.warming: set = set()
+
+    @staticmethod
+    def can_track(guild: discord.Guild) -> bool:
+        return guild.me is not None and guild.me.guild_permissions.manage_guild
+
+    def forget(self, guild_id: int):
+        self.uses.pop(guild_id, None)
+        self.locks.pop(guild_id, None)
+
+    async def warm(self, guild: discord.Guild):
+        if not self.can_track(guild):
+            self.forget(guild.id)
+            return
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            try:
+                invites = await guild.invites()
+            except discord.HTTPException:
+                self.uses.pop(guild.id, None)
+                return
+            self.uses[guild.id] = {invite.code: invite.uses or 0 for invite in invites}
+
+    def warm_later(self, guild: discord.Guild):
+        """Background warm for a guild seen cold at delivery; that batch itself gets no inviter"""
+        if guild.id in self.warming or not self.can_track(guild):
+            return
+        self.warming.add(guild.id)
+        task = asyncio.create_task(self.warm(guild))
+        task.add_done_callback(lambda _: self.warming.discard(guild.id))
+
+    def invite_created(self, invite: discord.Invite):
+        if invite.guild and invite.guild.id in self.uses:
+            self.uses[invite.guild.id][invite.code] = invite.uses or 0
+
+    def invite_deleted(self, invite: discord.Invite):
+        if invite.guild and invite.guild.id in self.uses:
+            self.uses[invite.guild.id].pop(invite.code, None)
+
+    async def attribute(self, guild: discord.Guild, members: List[discord.Member]) -> Dict[int, discord.abc.User]:
+        """member id -> inviter for the members that can be attributed unambiguously"""
+        if guild.id not in self.uses:
+            self.warm_later(guild)
+            return {}
+        if not self.can_track(guild):
+            self.forget(guild.id)
+            return {}
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            previous = self.uses.get(guild.id)
+            if previous is None:
+                return {}
+            try:
+                invites = await guild.invites()
+            except discord.HTTPException:
+                return {}
+            self.uses[guild.id] = {invite.code: invite.uses or 0 for invite in invites}
+
+        grown = [invite for invite in invites if (invite.uses or 0) > previous.get(invite.code, 0)]
+        if len(grown) != 1 or grown[0].inviter is None:
+            return {}
+        invite = grown[0]
+        if (invite.uses or 0) - previous.get(invite.code, 0) != len(members):
+            return {}
+        return {member.id: invite.inviter for member in members}
+
+
 # ======================= WELCOME COG =======================
 class Welcome(commands.Cog):
     """Advanced welcome system with customization"""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.batcher = WelcomeBatcher(self)
+        self.compiled = LRUCache(Config.WELCOME_CACHE_SIZE)
+        self.invites = InviteTracker()
     
     async def cog_load(self):
         """Called when the cog is loaded"""
-        await WelcomeManager.init_db()
+        await WelcomeManager.listen_for_changes()
+        logging.getLogger("discord.http").addFilter(self.batcher.rate_limits)
         self.bot.add_view(WelcomeSetupPanel())
         print(f"{Emotes.SUCCESS} Welcome system loaded!")
+
+    async def cog_unload(self):
+        await self.batcher.drain()
+        logging.getLogger("discord.http").removeFilter(self.batcher.rate_limits)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Warm the settings cache for every guild in bulk (on_ready also fires after reconnects)"""
+        try:
+            settings = await WelcomeManager.get_settings_many([guild.id for guild in self.bot.guilds])
+        except DatabaseUnavailable:
+            return  # warms lazily once the database is back
+        for guild in self.bot.guilds:
+            if self.uses_inviter(guild.id, settings.get(guild.id)):
+                self.invites.warm_later(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        try:
+            settings = await WelcomeManager.get_settings(guild.id)
+        except DatabaseUnavailable:
+            return
+        if self.uses_inviter(guild.id, settings):
+            self.invites.warm_later(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invites.forget(guild.id)
+
+    @commands.Cog.listener()
+    async def on_invite_create(self, invite: discord.Invite):
+        self.invites.invite_created(invite)
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite: discord.Invite):
+        self.invites.invite_deleted(invite)
+
+    def uses_inviter(self, guild_id: int, settings: Optional[dict]) -> bool:
+        return bool(settings and settings.get('enabled')) and "inviter" in self.get_compiled(guild_id, settings).names
     
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -234,7 +687,10 @@ class Welcome(commands.Cog):
         if member.bot:
             return
         
-        settings = await WelcomeManager.get_settings(member.guild.id)
+        try:
+            settings = await WelcomeManager.get_settings(member.guild.id)
+        except DatabaseUnavailable:
+            return
         if not settings or not settings.get('enabled'):
             return
         
@@ -246,90 +702,26 @@ class Welcome(commands.Cog):
         if not channel:
             return
         
-        # Create welcome embed with custom settings
-        embed = await self.create_welcome_embed(member, settings)
-        
-        try:
-            await channel.send(content=member.mention, embed=embed)
-        except discord.Forbidden:
-            print(f"{Emotes.ERROR} No permission to send welcome message in {channel.name}")
+        # Joins are merged per channel and sent once per batch window; inviters are resolved there
+        self.batcher.add(channel, member, settings)
     
-    async def create_welcome_embed(self, member: discord.Member, settings: dict) -> discord.Embed:
+    async def create_welcome_embed(self, member: discord.Member, settings: dict, inviter: Optional[discord.abc.User] = None,
+                                   member_count: Optional[int] = None) -> discord.Embed:
         """Create welcome embed with custom settings"""
-        # Get custom values or use defaults
-        title = settings.get('title', f"👋 Welcome to {member.guild.name}!")
-        description = settings.get('description', f"Welcome {{user}}! We're glad to have you here. 🎉")
-        footer = settings.get('footer', "Enjoy your stay!")
-        color = self.parse_color(settings.get('color', "#00ff00"))
-        
-        # Replace placeholders in title
-        title = title.replace("{user}", member.mention)
-        title = title.replace("{username}", str(member))
-        title = title.replace("{server}", member.guild.name)
-        title = title.replace("{membercount}", str(member.guild.member_count))
-        
-        # Replace placeholders in description
-        description = description.replace("{user}", member.mention)
-        description = description.replace("{username}", str(member))
-        description = description.replace("{server}", member.guild.name)
-        description = description.replace("{membercount}", str(member.guild.member_count))
-        
-        # Replace placeholders in footer
-        footer = footer.replace("{user}", str(member))
-        footer = footer.replace("{username}", str(member))
-        footer = footer.replace("{server}", member.guild.name)
-        footer = footer.replace("{membercount}", str(member.guild.member_count))
-        
-        embed = discord.Embed(
-            title=title,
-            description=description,
-            color=color,
-            timestamp=datetime.utcnow()
-        )
-        
-        # Set thumbnail (custom or user avatar)
-        if settings.get('thumbnail'):
-            embed.set_thumbnail(url=settings['thumbnail'])
-        elif member.avatar:
-            embed.set_thumbnail(url=member.display_avatar.url)
-        
-        # Set main image (banner)
-        if settings.get('image'):
-            embed.set_image(url=settings['image'])
-        
-        # Set footer
-        embed.set_footer(text=footer, icon_url=member.display_avatar.url if member.avatar else None)
-        
-        return embed
-    
+        return self.get_compiled(member.guild.id, settings).render(member, inviter, member_count)
+
+    def get_compiled(self, guild_id: int, settings: dict) -> CompiledWelcome:
+        """Compiled templates for a guild, rebuilt only when its settings change"""
+        compiled = self.compiled.get(guild_id)
+        # update_settings swaps in a new settings dict, so identity tells us it changed
+        if compiled is None or compiled.settings is not settings:
+            compiled = CompiledWelcome(settings)
+            self.compiled.set(guild_id, compiled)
+        return compiled
+
     def parse_color(self, color_str: str) -> discord.Color:
         """Parse color string to discord.Color"""
-        try:
-            if color_str.startswith('#'):
-                return discord.Color(int(color_str[1:], 16))
-            else:
-                color_lower = color_str.lower()
-                color_map = {
-                    'red': discord.Color.red(),
-                    'green': discord.Color.green(),
-                    'blue': discord.Color.blue(),
-                    'gold': discord.Color.gold(),
-                    'purple': discord.Color.purple(),
-                    'orange': discord.Color.orange(),
-                    'teal': discord.Color.teal(),
-                    'magenta': discord.Color.magenta(),
-                    'dark_red': discord.Color.dark_red(),
-                    'dark_green': discord.Color.dark_green(),
-                    'dark_blue': discord.Color.dark_blue(),
-                    'dark_purple': discord.Color.dark_purple(),
-                    'dark_teal': discord.Color.dark_teal(),
-                    'dark_magenta': discord.Color.dark_magenta(),
-                    'dark_gold': discord.Color.dark_gold(),
-                    'dark_orange': discord.Color.dark_orange(),
-                }
-                return color_map.get(color_lower, discord.Color.green())
-        except:
-            return discord.Color.green()
+        return parse_color(color_str)
     
     @commands.command(name="welcomesetup", aliases=["wsetup", "ws"])
     @commands.has_permissions(administrator=True)
@@ -346,7 +738,10 @@ class Welcome(commands.Cog):
                 "• `{user}` - Mentions the user\n"
                 "• `{username}` - User's name\n"
                 "• `{server}` - Server name\n"
-                "• `{membercount}` - Member count"
+                "• `{membercount}` - Member count\n"
+                "• `{joinposition}` - Join position (e.g. 1,234th)\n"
+                "• `{accountage}` - Account age\n"
+                "• `{inviter}` - Who invited the user"
             ),
             color=discord.Color.blue(),
             timestamp=datetime.utcnow()
@@ -482,6 +877,16 @@ class Welcome(commands.Cog):
             inline=True
         )
         
+        delivery = self.batcher.stats()
+        embed.add_field(
+            name="Delivery Queue",
+            value=(
+                f"`{delivery['queue_depth']}` queued • `{delivery['flush_latency_avg_ms']:.0f}ms` avg flush\n"
+                f"`{delivery['rate_limit_wait_s']:.1f}s` rate-limited ({delivery['rate_limited']} hits)"
+            ),
+            inline=True
+        )
+        
         embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
         
         await ctx.send(embed=embed)
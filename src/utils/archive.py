@@ -0,0 +1,143 @@
+"""
+Closed-ticket archive
+Snapshots transcripts into a content-addressed, gzip-compressed store on local disk
+"""
+
+import discord
+import asyncio
+import gzip
+import hashlib
+import io
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from utils.config import Config
+from utils.transcripts import TranscriptExporter, TEXT
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Transcript line recording where a stored attachment went; staff download it by digest
+_ARCHIVED_LINE = "    [Archived] {filename} -> {digest}"
+_ARCHIVED_PREFIX = "    [Archived] "
+
+
+# ====================== BLOB STORE ====================== #
+class BlobStore:
+    """Files stored gzip-compressed under their SHA-256, so identical content is kept once"""
+
+    def __init__(self, root: str):
+        root = Path(root)
+        self.root = root if root.is_absolute() else _PROJECT_ROOT / root
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest[2:]}.gz"
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+    def put_file(self, fileobj) -> str:
+        """Store a readable binary file object and return its digest (blocking)"""
+        fileobj.seek(0)
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: fileobj.read(1 << 16), b""):
+            sha.update(chunk)
+        digest = sha.hexdigest()
+
+        path = self.path_for(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            fileobj.seek(0)
+            with gzip.open(tmp, "wb") as out:
+                shutil.copyfileobj(fileobj, out)
+            os.replace(tmp, path)
+        return digest
+
+    def put_bytes(self, data: bytes) -> str:
+        return self.put_file(io.BytesIO(data))
+
+    def open(self, digest: str):
+        """Open the compressed blob as stored (callers can upload it as-is)"""
+        return open(self.path_for(digest), "rb")
+
+    def size(self, digest: str) -> int:
+        """Size of the blob as stored (compressed)"""
+        return self.path_for(digest).stat().st_size
+
+    def load(self, digest: str) -> io.BytesIO:
+        """The original contents, decompressed into memory (blocking); meant for small blobs"""
+        with gzip.open(self.path_for(digest), "rb") as fp:
+            return io.BytesIO(fp.read())
+
+
+# ====================== ARCHIVER ====================== #
+class ArchivingExporter(TranscriptExporter):
+    """Text exporter that also collects search text, participants and attachments"""
+
+    def __init__(self, channel: discord.TextChannel, store: BlobStore):
+        super().__init__(channel, fmt=TEXT)
+        self.store = store
+        self.participants: Set[int] = set()
+        self.attachment_hashes: List[str] = []
+        self._stored: Dict[int, str] = {}  # attachment id -> digest, for the transcript lines
+        self.blob_hash: Optional[str] = None
+        self._index_parts: List[str] = []
+        self._index_length = 0
+
+    @property
+    def search_text(self) -> str:
+        return "\n".join(self._index_parts)
+
+    async def on_message(self, message: discord.Message):
+        self.participants.add(message.author.id)
+
+        texts = [message.content] + [f"{e.title or ''} {e.description or ''}" for e in message.embeds]
+        for text in texts:
+            if text and self._index_length < Config.ARCHIVE_INDEX_CHARS:
+                self._index_parts.append(text)
+                self._index_length += len(text)
+
+        for attachment in message.attachments:
+            if attachment.size > Config.ARCHIVE_MAX_ATTACHMENT_SIZE:
+                continue
+            try:
+                data = await attachment.read()
+            except discord.HTTPException:
+                continue
+            digest = await asyncio.to_thread(self.store.put_bytes, data)
+            self._stored[attachment.id] = digest
+            if digest not in self.attachment_hashes:
+                self.attachment_hashes.append(digest)
+
+    def _render_text(self, message: discord.Message) -> str:
+        # on_message has already run for this message, so its stored attachments are known
+        text = super()._render_text(message)
+        for attachment in message.attachments:
+            digest = self._stored.pop(attachment.id, None)
+            if digest:
+                text += _ARCHIVED_LINE.format(filename=attachment.filename, digest=digest) + "\n"
+        return text
+
+
+def attachment_name(store: BlobStore, transcript_hash: str, digest: str) -> Optional[str]:
+    """The filename an archived transcript recorded for a stored attachment (blocking)"""
+    suffix = f" -> {digest}"
+    with gzip.open(store.path_for(transcript_hash), "rt", encoding="utf-8", errors="replace") as fp:
+        for line in fp:
+            line = line.rstrip("\n")
+            if line.startswith(_ARCHIVED_PREFIX) and line.endswith(suffix):
+                return line[len(_ARCHIVED_PREFIX):-len(suffix)]
+    return None
+
+
+async def archive_channel(channel: discord.TextChannel, store: BlobStore) -> ArchivingExporter:
+    """Snapshot a channel's history into the store; returns the exporter with its findings"""
+    exporter = ArchivingExporter(channel, store)
+    spool = await exporter.export()
+    try:
+        exporter.blob_hash = await asyncio.to_thread(store.put_file, spool)
+    finally:
+        spool.close()
+    return exporter
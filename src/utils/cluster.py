@@ -0,0 +1,161 @@
+"""
+Multi-process cluster support
+A parent supervisor runs one AutoShardedBot per worker process, each over its own shard range,
+and aggregates the workers' stats so any shard can report on the whole bot
+"""
+
+import asyncio
+import math
+import multiprocessing
+import queue
+import time
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+from utils.config import Config
+from utils.emotes import Emotes
+
+# Discord allows one IDENTIFY per 5 seconds per max_concurrency bucket
+IDENTIFY_INTERVAL = 5
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split shard IDs into `clusters` contiguous, near-equal ranges"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_gateway_info(token: str) -> Tuple[int, int]:
+    """Discord's recommended shard count and identify max_concurrency"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+# ====================== WORKER SIDE ====================== #
+class ClusterLink:
+    """A worker's connection to the supervisor: push our stats, read everyone's"""
+
+    def __init__(self, cluster_id: int, shard_ids: List[int], shard_count: int, reports, shared):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.reports = reports
+        self.shared = shared
+
+    def report(self, snapshot: Dict):
+        self.reports.put_nowait(snapshot)
+
+    async def aggregate(self) -> Dict:
+        """Latest cluster-wide totals from the supervisor (manager proxies block, so use a thread)"""
+        return await asyncio.to_thread(lambda: dict(self.shared))
+
+
+# ====================== SUPERVISOR ====================== #
+class ClusterSupervisor:
+    """Starts, watches and restarts worker processes; aggregates their stats reports"""
+
+    def __init__(self, target, shard_count: int, clusters: int, max_concurrency: int = 1):
+        self.target = target
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, clusters)
+        self.max_concurrency = max(1, max_concurrency)
+        self.ctx = multiprocessing.get_context("spawn")
+        self.manager = self.ctx.Manager()
+        self.reports = self.ctx.Queue()
+        self.shared = self.manager.dict()
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.snapshots: Dict[int, Dict] = {}
+        self.restarts = 0
+        self.stopping = False
+
+    def identify_delay(self, shard_ids: List[int]) -> float:
+        """How long a worker needs to identify all its shards"""
+        return math.ceil(len(shard_ids) / self.max_concurrency) * IDENTIFY_INTERVAL
+
+    def start(self, cluster_id: int):
+        shard_ids = self.ranges[cluster_id]
+        link = ClusterLink(cluster_id, shard_ids, self.shard_count, self.reports, self.shared)
+        process = self.ctx.Process(target=self.target, args=(link,), name=f"cluster-{cluster_id}", daemon=True)
+        process.start()
+        self.processes[cluster_id] = process
+        print(f"{Emotes.LOADING} Cluster {cluster_id} started (pid {process.pid}, shards {shard_ids[0]}-{shard_ids[-1]})")
+
+    def run(self):
+        print(f"{Emotes.INFO} {self.shard_count} shards across {len(self.ranges)} clusters")
+        try:
+            # Stagger launches so the clusters don't exceed the identify rate limit together
+            for cluster_id, shard_ids in enumerate(self.ranges):
+                self.start(cluster_id)
+                if cluster_id < len(self.ranges) - 1:
+                    self._pump(self.identify_delay(shard_ids))
+            while True:
+                self._pump(Config.CLUSTER_STATS_INTERVAL)
+                self._restart_dead()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+        self.manager.shutdown()
+
+    def _pump(self, seconds: float):
+        """Collect stats reports for `seconds`"""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                snapshot = self.reports.get(timeout=remaining)
+            except queue.Empty:
+                return
+            snapshot["reported_at"] = time.time()
+            self.snapshots[snapshot["cluster_id"]] = snapshot
+            self._publish()
+
+    def _publish(self):
+        stale_after = Config.CLUSTER_STATS_INTERVAL * 3
+        now = time.time()
+        clusters = {
+            cluster_id: dict(snapshot, alive=now - snapshot["reported_at"] < stale_after)
+            for cluster_id, snapshot in self.snapshots.items()
+        }
+        self.shared.update(
+            clusters=clusters,
+            guilds=sum(c["guilds"] for c in clusters.values()),
+            users=sum(c["users"] for c in clusters.values()),
+            shards=sum(len(c["latencies"]) for c in clusters.values()),
+            shard_count=self.shard_count,
+            cluster_count=len(self.ranges),
+            restarts=self.restarts
+        )
+
+    def _restart_dead(self):
+        for cluster_id, process in list(self.processes.items()):
+            if process.is_alive() or self.stopping:
+                continue
+            print(f"{Emotes.ERROR} Cluster {cluster_id} exited ({process.exitcode}); restarting in {Config.CLUSTER_RESTART_DELAY}s")
+            self.snapshots.pop(cluster_id, None)
+            time.sleep(Config.CLUSTER_RESTART_DELAY)
+            self.restarts += 1
+            self.start(cluster_id)
@@ -2,8 +2,95 @@
 class Config:
    BOT_TOKEN = ""
    BOT_PREFIX = ""
+
+   # Gateway intents / member cache: "lean", "standard" or "full" (see utils/intents.py)
+   GATEWAY_PROFILE = "lean"
+
+   # Slash commands are only re-synced when this stored tree hash changes
+   COMMAND_SYNC_CACHE = "data/command_tree.sha256"
    DB_NAME = ""
    DB_USER = ""
    DB_PASSWORD = ""
    DB_HOST = ""
    DB_PORT = 
+
+   # Connection pool
+   DB_POOL_MIN_SIZE = 2
+   DB_POOL_MAX_SIZE = 10
+   DB_STATEMENT_CACHE_SIZE = 100
+   DB_ACQUIRE_TIMEOUT = 10
+   DB_BULK_CHUNK = 5000  # guild IDs per bulk-load query
+
+   # Degraded mode while PostgreSQL is unreachable
+   DB_LOCAL_STORE = "data/offline.sqlite3"  # last-known reads + journal of deferred writes
+   DB_RECONNECT_MIN_DELAY = 1               # seconds; doubles per failed attempt
+   DB_RECONNECT_MAX_DELAY = 60
+   DB_REPLAY_BATCH = 100                    # journaled writes applied per transaction
+   DB_REPLAY_WAIT = 10                      # seconds other statements wait for a pending replay
+   DB_SNAPSHOT_FLUSH_INTERVAL = 30          # seconds between saving read snapshots locally
+
+   # Clustering (python cluster.py) - ignored when running python main.py
+   CLUSTER_COUNT = 0            # worker processes (0 = one per CPU core)
+   SHARD_COUNT = 0              # total shards (0 = Discord's recommendation)
+   CLUSTER_STATS_INTERVAL = 15  # seconds between each cluster's stats report
+   CLUSTER_RESTART_DELAY = 5    # seconds before restarting a crashed cluster
+
+   # Music - Lavalink nodes do all the audio work; new players go to the least-loaded node
+   LAVALINK_NODES = [
+      {"host": "localhost", "port": 2333, "password": "youshallnotpass", "region": "us", "name": "main", "ssl": False},
+   ]
+   LAVALINK_CONNECT_BACK = True      # move players back to their original node once it recovers
+   MUSIC_FAILOVER_CONCURRENCY = 50   # players moved at once when a node goes down
+   MUSIC_SEARCH_PREFIX = "ytsearch"  # used when play is given plain text instead of a URL
+   MUSIC_DEFAULT_VOLUME = 100
+   MUSIC_IDLE_DISCONNECT = 300       # seconds to stay in voice after the queue ends
+   MUSIC_QUEUE_PAGE_SIZE = 10
+   MUSIC_SNAPSHOT_INTERVAL = 15      # seconds between saving sessions/queue changes to PostgreSQL
+   MUSIC_RESTORE_CONCURRENCY = 10    # saved sessions rejoined at once after a restart
+
+   # Search cache for play (memory LRU, then the shared music_search_cache table)
+   MUSIC_SEARCH_CACHE_SIZE = 5000          # queries kept in memory per process
+   MUSIC_SEARCH_CACHE_TTL = 6 * 60 * 60    # seconds a resolved query is reused
+   MUSIC_SEARCH_CACHE_RESULTS = 5          # search results kept per query
+   MUSIC_SEARCH_CACHE_MAX_TRACKS = 1000    # larger playlists are always loaded fresh
+   MUSIC_SEARCH_PURGE_INTERVAL = 60 * 60   # seconds between deleting expired rows
+
+   # Playlist imports (a playlist file, or one query per line passed to play)
+   MUSIC_IMPORT_CONCURRENCY = 8            # lookups in flight per import
+   MUSIC_IMPORT_MAX_TRACKS = 1000          # queries read from one import
+   MUSIC_IMPORT_MAX_FILE_BYTES = 256_000   # largest playlist attachment accepted
+   MUSIC_IMPORT_PROGRESS_INTERVAL = 3.0    # seconds between progress message edits
+
+   # Audio filter/equalizer presets
+   MUSIC_FILTER_DEBOUNCE = 1.0             # at most one filters update per player per window (seconds)
+   MUSIC_MAX_CUSTOM_PRESETS = 25           # custom presets per guild, filters and equalizers together
+   MUSIC_PRESET_CACHE_SIZE = 1000          # guilds whose custom presets are kept in memory
+
+   # Welcome settings cache
+   WELCOME_CACHE_SIZE = 10000
+   WELCOME_CACHE_NOTIFY = True  # keep caches in sync across processes via LISTEN/NOTIFY
+
+   # Welcome delivery batching
+   WELCOME_BATCH_WINDOW = 2.0        # seconds to collect joins before sending
+   WELCOME_BATCH_MAX_MEMBERS = 50    # send immediately once this many joins are queued
+
+   # Ticket transcripts
+   TRANSCRIPT_FORMAT = "html"           # "html" or "txt"
+   TRANSCRIPT_COMPRESS = False          # always gzip (large transcripts are gzipped automatically)
+   TRANSCRIPT_SPOOL_SIZE = 1024 * 1024  # bytes kept in memory before spilling to disk
+
+   # Closed-ticket archive
+   ARCHIVE_DIR = "data/transcripts"                    # relative paths resolve from the project root
+   ARCHIVE_MAX_ATTACHMENT_SIZE = 8 * 1024 * 1024       # larger attachments are linked, not stored
+   ARCHIVE_INDEX_CHARS = 500_000                       # text per transcript fed to the search index
+
+   # Ticket Manager role provisioning
+   TICKET_PROVISION_CONCURRENCY = 10  # guilds provisioned at once after ready
+
+   # Ticket lifecycle sweeps
+   TICKET_SWEEP_INTERVAL = 300          # seconds between sweeps
+   TICKET_SWEEP_BATCH = 500             # rows fetched per query
+   TICKET_SWEEP_CONCURRENCY = 5         # Discord calls in flight per sweep
+   TICKET_IDLE_CLOSE_HOURS = 72         # auto-close open tickets idle this long (0 = off)
+   TICKET_CLOSED_RETENTION_HOURS = 24   # delete closed ticket channels after this long (0 = off)
+   TICKET_HISTORY_AFTER_DAYS = 30       # move purged tickets to the partitioned history table (0 = off)
@@ -0,0 +1,60 @@
+"""
+Gateway intent and member-cache profiles
+Picks what Discord sends us and what discord.py keeps in memory (Config.GATEWAY_PROFILE)
+"""
+
+import discord
+from typing import Dict
+
+from utils.config import Config
+
+PROFILES = ("lean", "standard", "full")
+
+
+def gateway_options(profile: str) -> Dict:
+    """Client kwargs for a profile: intents, member cache policy, chunking and message cache.
+
+    full     - every intent, every member cached and chunked at startup (the old behaviour)
+    standard - default intents plus members/message content; no presences or typing;
+               only joined/voice members cached, no startup chunking
+    lean     - just what the cogs use: guilds, member joins and invites (welcome), messages for
+               prefix commands, voice states (music); only voice members cached, no message cache
+    """
+    if profile == "full":
+        return {
+            "intents": discord.Intents.all(),
+            "member_cache_flags": discord.MemberCacheFlags.all(),
+            "chunk_guilds_at_startup": True
+        }
+
+    if profile == "standard":
+        intents = discord.Intents.default()
+        intents.members = True
+        intents.message_content = True
+        intents.typing = False
+        return {
+            "intents": intents,
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": False
+        }
+
+    if profile == "lean":
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.members = True            # on_member_join for welcome messages
+        intents.guild_messages = True     # prefix commands
+        intents.dm_messages = True
+        intents.voice_states = True       # music player
+        intents.invites = True            # invite create/delete keep {inviter} use counts current
+        # Message content is only needed to read prefix commands; mention-only bots can drop it
+        intents.message_content = bool(Config.BOT_PREFIX)
+        cache = discord.MemberCacheFlags.none()
+        cache.voice = True
+        return {
+            "intents": intents,
+            "member_cache_flags": cache,
+            "chunk_guilds_at_startup": False,
+            "max_messages": None
+        }
+
+    raise ValueError(f"Unknown gateway profile {profile!r} (expected one of {', '.join(PROFILES)})")
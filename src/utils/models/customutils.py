@@ -1,157 +1,305 @@
 import asyncpg
+import json
 from datetime import datetime
 from typing import Optional, Dict, List
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 import os
 import shutil
+import time
+import uuid
 
 from utils.config import Config
+from utils.models.database import DatabasePool, DatabaseUnavailable
+from utils.models.migrations import run_migrations, ensure_history_partition
+from utils.models.queries import WELCOME_COLUMNS
 
-_db_pool: Optional[asyncpg.Pool] = None
+_db_pool: Optional[DatabasePool] = None
+
+# Identifies this process in NOTIFY payloads so we skip our own cache updates
+_PROCESS_TOKEN = uuid.uuid4().hex
 
 
 # ====================== DATABASE CONNECTION ====================== #
-async def get_pool() -> asyncpg.Pool:
-    """Ensure a connection pool exists"""
+def use_pool(pool: DatabasePool):
+    """Register the bot's shared DatabasePool for every manager"""
     global _db_pool
+    _db_pool = pool
+
+
+async def get_pool() -> DatabasePool:
+    """Return the shared connection pool"""
     if _db_pool is None:
-        _db_pool = await asyncpg.create_pool(
-            user=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            database=Config.DB_NAME,
-            host=Config.DB_HOST,
-            port=Config.DB_PORT,
-            min_size=1,
-            max_size=5
-        )
+        raise RuntimeError("Database pool not set - CustomBot.setup_hook must connect first")
     return _db_pool
 
 
+# ====================== CACHES ====================== #
+class LRUCache:
+    """Bounded in-memory cache with least-recently-used eviction and hit/miss counters"""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        value = self._data.get(key, self._MISSING)
+        if value is self._MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# ====================== METRICS ====================== #
+class LatencyTracker:
+    """Rolling latency samples per named stage, summarised as p50/p99"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def percentiles(self) -> Dict[str, Dict]:
+        summary = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            last = len(ordered) - 1
+            summary[name] = {
+                "count": len(ordered),
+                "p50_ms": ordered[int(last * 0.50)] * 1000,
+                "p99_ms": ordered[int(last * 0.99)] * 1000
+            }
+        return summary
+
+
 # ====================== TICKET MANAGER ====================== #
 class TicketManager:
     """Handles all ticket-related database operations"""
 
     @staticmethod
-    async def init_db():
-        """Initialize the tickets table"""
+    async def create_ticket(guild_id: int, user_id: int, channel_id: int, ticket_number: int,
+                            category: Optional[str] = None, panel_message_id: Optional[int] = None) -> int:
+        """Create a new ticket and bump the guild's stats counters in the same statement"""
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS tickets (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL,
-                    user_id BIGINT NOT NULL,
-                    channel_id BIGINT NOT NULL UNIQUE,
-                    ticket_number INTEGER NOT NULL,
-                    claimed_by BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    closed_at TIMESTAMP,
-                    closed_by BIGINT,
-                    status TEXT DEFAULT 'open',
-                    UNIQUE(guild_id, user_id, status)
-                );
-            """)
-            await conn.execute("""
-            CREATE TABLE IF NOT EXISTS ticket_settings (
-                guild_id BIGINT PRIMARY KEY,
-                manager_role_id BIGINT,
-                log_channel_id BIGINT
-               );
-            """)
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_guild_user ON tickets(guild_id, user_id, status);")
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_channel ON tickets(channel_id);")
-
-    @staticmethod
-    async def create_ticket(guild_id: int, user_id: int, channel_id: int, ticket_number: int) -> int:
-        """Create a new ticket"""
+        return await pool.fetchval("ticket_create", guild_id, user_id, channel_id, ticket_number, category, panel_message_id)
+
+    @staticmethod
+    async def set_panel_message(channel_id: int, panel_message_id: int):
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            result = await conn.fetchrow("""
-                INSERT INTO tickets (guild_id, user_id, channel_id, ticket_number)
-                VALUES ($1, $2, $3, $4)
-                RETURNING id;
-            """, guild_id, user_id, channel_id, ticket_number)
-            return result["id"]
+        await pool.execute("ticket_set_panel", panel_message_id, channel_id)
 
     @staticmethod
     async def get_ticket_by_channel(channel_id: int) -> Optional[Dict]:
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT * FROM tickets WHERE channel_id = $1 AND status = 'open';
-            """, channel_id)
-            return dict(row) if row else None
+        row = await pool.fetchrow("ticket_by_channel", channel_id)
+        return dict(row) if row else None
 
     @staticmethod
     async def get_user_ticket(guild_id: int, user_id: int) -> Optional[Dict]:
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT * FROM tickets WHERE guild_id = $1 AND user_id = $2 AND status = 'open';
-            """, guild_id, user_id)
-            return dict(row) if row else None
+        row = await pool.fetchrow("ticket_by_user", guild_id, user_id)
+        return dict(row) if row else None
 
     @staticmethod
     async def get_ticket_count(guild_id: int) -> int:
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            count = await conn.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1;", guild_id)
-            return count or 0
+        count = await pool.fetchval("ticket_count", guild_id)
+        return count or 0
 
     @staticmethod
-    async def claim_ticket(channel_id: int, user_id: int):
+    async def next_ticket_number(guild_id: int) -> int:
+        """Atomically allocate the next ticket number for a guild in one round-trip"""
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("UPDATE tickets SET claimed_by = $1 WHERE channel_id = $2;", user_id, channel_id)
+        return await pool.fetchval("ticket_next_number", guild_id)
+
+    @staticmethod
+    async def claim_ticket(channel_id: int, user_id: int) -> Optional[Dict]:
+        """Claim an open, unclaimed ticket atomically.
+
+        Returns the claimed ticket's panel_message_id (and number), or None if the
+        ticket doesn't exist or someone else got there first.
+        """
+        pool = await get_pool()
+        row = await pool.fetchrow("ticket_claim", user_id, channel_id)
+        return dict(row) if row else None
 
     @staticmethod
     async def close_ticket(channel_id: int, closed_by: int):
+        await TicketManager.close_tickets([channel_id], closed_by)
+
+    @staticmethod
+    async def close_tickets(channel_ids: List[int], closed_by: Optional[int]):
+        """Close many open tickets in one statement, keeping the stats counters in step"""
+        pool = await get_pool()
+        await pool.execute("ticket_close_many", closed_by, channel_ids)
+
+    @staticmethod
+    async def get_sweep_batch(after_id: int, retention_hours: Optional[int], limit: int,
+                              shard_count: Optional[int] = None, shard_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Open tickets plus closed tickets past retention, in id order (keyset paginated).
+
+        Pass shard_count/shard_ids to only see guilds on those shards.
+        """
+        pool = await get_pool()
+        rows = await pool.fetch("ticket_sweep_batch", after_id, retention_hours, limit, shard_count, shard_ids)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def move_to_history(after_days: int) -> int:
+        """Move purged closed tickets older than `after_days` into the partitioned history table"""
         pool = await get_pool()
         async with pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE tickets 
-                SET status = 'closed', closed_at = CURRENT_TIMESTAMP, closed_by = $1
-                WHERE channel_id = $2;
-            """, closed_by, channel_id)
+            async with conn.transaction():
+                months = await conn.fetch("""
+                    SELECT DISTINCT date_trunc('month', created_at) AS month FROM tickets
+                    WHERE purged_at IS NOT NULL AND purged_at < CURRENT_TIMESTAMP - $1::integer * INTERVAL '1 day';
+                """, after_days)
+                for row in months:
+                    await ensure_history_partition(conn, row["month"])
+                status = await conn.execute("""
+                    WITH moved AS (
+                        DELETE FROM tickets
+                        WHERE purged_at IS NOT NULL AND purged_at < CURRENT_TIMESTAMP - $1::integer * INTERVAL '1 day'
+                        RETURNING id, guild_id, user_id, channel_id, ticket_number, claimed_by, created_at,
+                                  closed_at, closed_by, status, category, claimed_at, panel_message_id, purged_at
+                    )
+                    INSERT INTO tickets_history (id, guild_id, user_id, channel_id, ticket_number, claimed_by, created_at,
+                                                 closed_at, closed_by, status, category, claimed_at, panel_message_id, purged_at)
+                    SELECT * FROM moved;
+                """, after_days)
+                return int(status.split()[-1])
+
+    @staticmethod
+    async def mark_purged(channel_ids: List[int]):
+        pool = await get_pool()
+        await pool.execute("ticket_mark_purged", channel_ids)
 
     @staticmethod
     async def get_open_tickets(guild_id: int) -> List[Dict]:
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM tickets WHERE guild_id = $1 AND status = 'open'
-                ORDER BY created_at DESC;
-            """, guild_id)
-            return [dict(row) for row in rows]
+        rows = await pool.fetch("ticket_open_list", guild_id)
+        return [dict(row) for row in rows]
 
     @staticmethod
     async def get_ticket_stats(guild_id: int) -> Dict:
+        """Read the guild's maintained counters - a primary-key lookup, no table scans"""
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            total = await conn.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1;", guild_id)
-            open_count = await conn.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1 AND status = 'open';", guild_id)
-            closed = await conn.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1 AND status = 'closed';", guild_id)
-            return {"total": total or 0, "open": open_count or 0, "closed": closed or 0}
+        row = await pool.fetchrow("ticket_stats", guild_id)
+        return TicketManager._stats_from_row(row)
+
+    @staticmethod
+    async def get_ticket_stats_many(guild_ids: List[int]) -> Dict[int, Dict]:
+        """Stats for many guilds in one query per chunk; guilds without tickets get zeroed stats"""
+        pool = await get_pool()
+        stats = {guild_id: TicketManager._stats_from_row(None) for guild_id in guild_ids}
+        for chunk in _chunks(guild_ids):
+            for row in await pool.fetch("ticket_stats_many", chunk):
+                stats[row["guild_id"]] = TicketManager._stats_from_row(row)
+        return stats
+
+    @staticmethod
+    def _stats_from_row(row) -> Dict:
+        if not row:
+            return {"total": 0, "open": 0, "closed": 0, "avg_claim_seconds": None, "avg_close_seconds": None, "categories": {}}
+        return {
+            "total": row["total"],
+            "open": row["open_count"],
+            "closed": row["closed_count"],
+            "avg_claim_seconds": row["claim_seconds_total"] / row["claim_count"] if row["claim_count"] else None,
+            "avg_close_seconds": row["close_seconds_total"] / row["closed_count"] if row["closed_count"] else None,
+            "categories": json.loads(row["categories"]) if row["categories"] else {}
+        }
     
     @staticmethod
-    async def save_settings(guild_id: int, manager_role_id: int, log_channel_id: int):
+    async def save_settings(guild_id: int, manager_role_id: int, log_channel_id: int, category_id: Optional[int] = None):
         pool = await get_pool()
-        async with pool.acquire() as conn:
-         await conn.execute("""
-            INSERT INTO ticket_settings (guild_id, manager_role_id, log_channel_id)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (guild_id)
-            DO UPDATE SET 
-                manager_role_id = EXCLUDED.manager_role_id,
-                log_channel_id = EXCLUDED.log_channel_id;""", guild_id, manager_role_id, log_channel_id)
+        await pool.execute("ticket_save_settings", guild_id, manager_role_id, log_channel_id, category_id)
 
     @staticmethod
     async def load_settings(guild_id: int):
         pool = await get_pool()
-        async with pool.acquire() as conn:
-         row = await conn.fetchrow("""
-            SELECT manager_role_id, log_channel_id
-            FROM ticket_settings
-            WHERE guild_id = $1;""", guild_id)
+        row = await pool.fetchrow("ticket_load_settings", guild_id)
+        return dict(row) if row else None
+
+    @staticmethod
+    async def load_settings_many(guild_ids: List[int]) -> Dict[int, Dict]:
+        """Settings rows keyed by guild ID; guilds without a row are absent"""
+        pool = await get_pool()
+        settings = {}
+        for chunk in _chunks(guild_ids):
+            for row in await pool.fetch("ticket_load_settings_many", chunk):
+                row = dict(row)
+                settings[row.pop("guild_id")] = row
+        return settings
+
+
+# ====================== TRANSCRIPT ARCHIVE ====================== #
+class TranscriptManager:
+    """Index of archived ticket transcripts stored in the local blob store"""
+
+    @staticmethod
+    async def save_transcript(guild_id: int, channel_id: int, ticket_number: Optional[int], user_id: Optional[int],
+                              closed_by: int, blob_hash: str, attachment_hashes: List[str],
+                              participants: List[int], message_count: int, search_text: str) -> int:
+        pool = await get_pool()
+        return await pool.fetchval("transcript_save", guild_id, channel_id, ticket_number, user_id, closed_by,
+                                   blob_hash, attachment_hashes, participants, message_count, search_text)
+
+    @staticmethod
+    async def search(guild_id: int, query: Optional[str] = None, user_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """Keyword and/or participant search, answered entirely from the indexes"""
+        pool = await get_pool()
+        rows = await pool.fetch("transcript_search", guild_id, query, user_id, limit)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def get_transcript(guild_id: int, transcript_id: int) -> Optional[Dict]:
+        pool = await get_pool()
+        row = await pool.fetchrow("transcript_get", guild_id, transcript_id)
         return dict(row) if row else None
 
 
@@ -159,84 +307,220 @@ class TicketManager:
 class WelcomeManager:
     """Handles all welcome/goodbye related database operations"""
 
+    NOTIFY_CHANNEL = "welcome_settings_changed"
+    _cache = LRUCache(Config.WELCOME_CACHE_SIZE)
+
     @staticmethod
-    async def init_db():
+    async def get_settings(guild_id: int) -> Optional[Dict]:
+        """Return a guild's settings, served from cache after the first load.
+
+        The returned dict is shared with the cache - treat it as read-only.
+        Guilds without a row are cached as None so they cost nothing either.
+        """
+        cached = WelcomeManager._cache.get(guild_id, LRUCache._MISSING)
+        if cached is not LRUCache._MISSING:
+            return cached
+
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS welcome_settings (
-                    guild_id BIGINT PRIMARY KEY,
-                    enabled BOOLEAN DEFAULT TRUE,
-                    channel_id BIGINT,
-                    message TEXT,
-                    auto_role_id BIGINT,
-                    show_buttons BOOLEAN DEFAULT TRUE,
-                    auto_delete_after INTEGER,
-                    goodbye_enabled BOOLEAN DEFAULT FALSE,
-                    goodbye_channel_id BIGINT,
-                    goodbye_message TEXT,
-                    title TEXT,
-                    description TEXT,
-                    footer TEXT,
-                    thumbnail TEXT,
-                    image TEXT,
-                    footer_icon TEXT,
-                    color TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
+        row = await pool.fetchrow("welcome_get", guild_id)
+        settings = dict(row) if row else None
+        WelcomeManager._cache.set(guild_id, settings)
+        return settings
 
     @staticmethod
-    async def get_settings(guild_id: int) -> Optional[Dict]:
+    async def get_settings_many(guild_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """Like get_settings for many guilds - only cache misses hit the database, in bulk"""
+        result = {}
+        missing = []
+        for guild_id in guild_ids:
+            cached = WelcomeManager._cache.get(guild_id, LRUCache._MISSING)
+            if cached is LRUCache._MISSING:
+                missing.append(guild_id)
+            else:
+                result[guild_id] = cached
+
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow("SELECT * FROM welcome_settings WHERE guild_id = $1;", guild_id)
-            return dict(row) if row else None
+        for chunk in _chunks(missing):
+            rows = {row["guild_id"]: dict(row) for row in await pool.fetch("welcome_get_many", chunk)}
+            for guild_id in chunk:
+                result[guild_id] = rows.get(guild_id)
+                WelcomeManager._cache.set(guild_id, result[guild_id])
+        return result
 
     @staticmethod
     async def update_settings(guild_id: int, **kwargs):
+        """Upsert only the given columns - one fixed-shape statement, no read-then-write race"""
+        unknown = set(kwargs) - set(WELCOME_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown welcome setting(s): {', '.join(sorted(unknown))}")
+
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            existing = await conn.fetchval("SELECT guild_id FROM welcome_settings WHERE guild_id = $1;", guild_id)
-
-            if existing:
-                fields = [f"{k} = ${i+2}" for i, k in enumerate(kwargs.keys())]
-                query = f"""
-                    UPDATE welcome_settings
-                    SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP
-                    WHERE guild_id = $1;
-                """
-                await conn.execute(query, guild_id, *kwargs.values())
-            else:
-                columns = ["guild_id"] + list(kwargs.keys())
-                values = [guild_id] + list(kwargs.values())
-                placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
-                query = f"""
-                    INSERT INTO welcome_settings ({', '.join(columns)})
-                    VALUES ({placeholders});
-                """
-                await conn.execute(query, *values)
+        row = await pool.fetchrow(
+            "welcome_upsert", guild_id, *(kwargs.get(column) for column in WELCOME_COLUMNS),
+            list(kwargs), *WelcomeManager._notify_args(guild_id)
+        )
+        if row is None:
+            # Journaled while the database is down - apply the change to what we last knew
+            current = await WelcomeManager.get_settings(guild_id) or {"guild_id": guild_id}
+            row = {**current, **kwargs}
+        WelcomeManager._cache.set(guild_id, dict(row) if row else None)
 
     @staticmethod
     async def delete_settings(guild_id: int):
         pool = await get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("DELETE FROM welcome_settings WHERE guild_id = $1;", guild_id)
+        await pool.execute("welcome_delete", guild_id, *WelcomeManager._notify_args(guild_id))
+        WelcomeManager._cache.set(guild_id, None)
+
+    # ---------- cache coherence ---------- #
+    @staticmethod
+    def _notify_args(guild_id: int) -> tuple:
+        """NOTIFY channel and payload for the write statements (channel None = don't notify)"""
+        if not Config.WELCOME_CACHE_NOTIFY:
+            return None, None
+        return WelcomeManager.NOTIFY_CHANNEL, f"{guild_id}:{_PROCESS_TOKEN}"
+
+    @staticmethod
+    def _on_notify(conn, pid, channel, payload: str):
+        guild_id, _, origin = payload.partition(":")
+        if origin != _PROCESS_TOKEN:
+            WelcomeManager._cache.invalidate(int(guild_id))
+
+    @staticmethod
+    async def listen_for_changes():
+        """Drop cached settings when another process changes them"""
+        if not Config.WELCOME_CACHE_NOTIFY:
+            return
+        pool = await get_pool()
+        await pool.listen(WelcomeManager.NOTIFY_CHANNEL, WelcomeManager._on_notify)
+
+    @staticmethod
+    def cache_stats() -> Dict:
+        return WelcomeManager._cache.stats()
+
+
+# ====================== MUSIC QUEUES ====================== #
+class MusicQueueManager:
+    """Snapshots of active music sessions and their queues, written in batches across guilds"""
+
+    @staticmethod
+    async def save_sessions(sessions: List[tuple]):
+        """Upsert (guild_id, voice_channel_id, text_channel_id, current_track, current_requester,
+        position, paused, volume, loop, shuffled, shuffle_end) tuples in one statement"""
+        if not sessions:
+            return
+        pool = await get_pool()
+        await pool.execute("music_session_save_many", *(list(column) for column in zip(*sessions)))
+
+    @staticmethod
+    async def save_queues(replaced: List[int], deletes: List[tuple], rows: List[tuple]):
+        """Apply queue deltas: `replaced` guilds keep only the given rows; deletes are (guild_id, sort_key);
+        rows are (guild_id, sort_key, track, requester)"""
+        if not (replaced or deletes or rows):
+            return
+        pool = await get_pool()
+        delete_guilds, delete_keys = (list(column) for column in zip(*deletes)) if deletes else ([], [])
+        guild_ids, keys, tracks, requesters = (list(column) for column in zip(*rows)) if rows else ([], [], [], [])
+        await pool.execute("music_queue_save", replaced, delete_guilds, delete_keys, guild_ids, keys, tracks, requesters)
+
+    @staticmethod
+    async def delete_sessions(guild_ids: List[int]):
+        if not guild_ids:
+            return
+        pool = await get_pool()
+        for chunk in _chunks(guild_ids):
+            await pool.execute("music_session_delete_many", chunk)
+
+    @staticmethod
+    async def load_sessions(guild_ids: List[int]) -> Dict[int, Dict]:
+        """Saved sessions keyed by guild, each with its queue rows as (sort_key, track, requester) in order"""
+        pool = await get_pool()
+        sessions = {}
+        for chunk in _chunks(guild_ids):
+            for row in await pool.fetch("music_session_load_many", chunk):
+                sessions[row["guild_id"]] = dict(row, queue=[])
+            if not sessions:
+                continue
+            for row in await pool.fetch("music_queue_load_many", chunk):
+                session = sessions.get(row["guild_id"])
+                if session is not None:
+                    session["queue"].append((row["sort_key"], row["track"], row["requester"]))
+        return sessions
+
+
+class MusicSearchManager:
+    """Resolved play queries shared by every process, expiring after a TTL"""
+
+    @staticmethod
+    async def get(query: str) -> Optional[Dict]:
+        pool = await get_pool()
+        row = await pool.fetchrow("music_search_get", query)
+        return dict(row) if row else None
+
+    @staticmethod
+    async def put(query: str, load_type: str, playlist_name: Optional[str], identifiers: List[str],
+                  tracks: List[bytes], ttl: int):
+        pool = await get_pool()
+        await pool.execute("music_search_put", query, load_type, playlist_name, identifiers, tracks, ttl)
+
+    @staticmethod
+    async def purge_expired() -> int:
+        pool = await get_pool()
+        return await pool.fetchval("music_search_purge")
+
+
+class MusicPresetManager:
+    """Per-guild custom filter/equalizer presets, cached after the first load"""
+
+    _cache = LRUCache(Config.MUSIC_PRESET_CACHE_SIZE)
+
+    @staticmethod
+    async def get_presets(guild_id: int) -> Dict[tuple, Dict]:
+        """(kind, name) -> serialized filters payload; the dict is shared with the cache"""
+        cached = MusicPresetManager._cache.get(guild_id)
+        if cached is not None:
+            return cached
+        pool = await get_pool()
+        rows = await pool.fetch("music_preset_list", guild_id)
+        presets = {(row["kind"], row["name"]): json.loads(row["payload"]) for row in rows}
+        MusicPresetManager._cache.set(guild_id, presets)
+        return presets
+
+    @staticmethod
+    async def save_preset(guild_id: int, kind: str, name: str, payload: Dict, created_by: int):
+        pool = await get_pool()
+        await pool.execute("music_preset_save", guild_id, kind, name, json.dumps(payload), created_by)
+        MusicPresetManager._cache.invalidate(guild_id)
+
+    @staticmethod
+    async def delete_preset(guild_id: int, kind: str, name: str) -> bool:
+        pool = await get_pool()
+        deleted = await pool.fetchval("music_preset_delete", guild_id, kind, name)
+        MusicPresetManager._cache.invalidate(guild_id)
+        return deleted is not None
 
 
 # ====================== UTILITIES ====================== #
 async def ensure_database_exists():
     pool = await get_pool()
-    await TicketManager.init_db()
-    await WelcomeManager.init_db()
-    print("✅ PostgreSQL Database initialized successfully!")
+    applied = await run_migrations(pool)
+    print(f"✅ PostgreSQL Database initialized successfully! ({len(applied)} migrations applied)")
 
 
 async def get_guild_data(guild_id: int) -> Dict:
+    """Open tickets, ticket stats and welcome settings for a guild in one round-trip"""
+    pool = await get_pool()
+    row = await pool.fetchrow("guild_data", guild_id)
+    stats = dict(row["stats"], categories=row["categories"]) if row["stats"] else None
     return {
         "tickets": {
-            "open": await TicketManager.get_open_tickets(guild_id),
-            "stats": await TicketManager.get_ticket_stats(guild_id)
+            "open": [dict(ticket) for ticket in row["open_tickets"]],
+            "stats": TicketManager._stats_from_row(stats)
         },
-        "welcome": await WelcomeManager.get_settings(guild_id)
+        "welcome": dict(row["welcome"]) if row["welcome"] else None
     }
+
+
+def _chunks(ids: List[int]):
+    """Split an ID list into bulk-query sized pieces"""
+    for i in range(0, len(ids), Config.DB_BULK_CHUNK):
+        yield ids[i:i + Config.DB_BULK_CHUNK]
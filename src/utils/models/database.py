@@ -0,0 +1,387 @@
+"""
+Shared PostgreSQL connection pool - one instrumented pool per bot process
+"""
+
+import asyncio
+import asyncpg
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict
+
+from utils.config import Config
+from utils.emotes import Emotes
+from utils.models.journal import LocalStore
+from utils.models.migrations import run_migrations
+from utils.models.queries import QUERIES, JOURNALED, SNAPSHOTTED
+
+# Errors that mean "the server is unreachable", as opposed to a bad query
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.AdminShutdownError,
+)
+
+
+class DatabaseUnavailable(RuntimeError):
+    """PostgreSQL is down and the request can't be answered from the local store"""
+
+
+_NO_SNAPSHOT = object()
+
+
+# ====================== POOL SERVICE ====================== #
+class DatabasePool:
+    """Owns the asyncpg pool and tracks live usage counters"""
+
+    QPS_WINDOW = 10  # seconds of history used for queries/sec
+
+    def __init__(self, local_store: str = Config.DB_LOCAL_STORE):
+        self.pool: Optional[asyncpg.Pool] = None
+        self.in_use = 0
+        self.acquire_count = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.query_count = 0
+        self._query_buckets = deque(maxlen=self.QPS_WINDOW)
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        # backend pid -> {statement name: PreparedStatement}
+        self._statements: Dict[int, Dict] = {}
+        self.schema_ready = False
+
+        # Degraded mode: last-known reads and deferred writes live in a local SQLite file
+        self.available = False
+        self.local = LocalStore(local_store)
+        self._lock: Optional[asyncio.Lock] = None
+        self.journal_size = 0
+        self.replayed = 0
+        self._snapshots: Dict[tuple, object] = {}  # written to SQLite by the supervisor
+        self._listeners: Dict[str, object] = {}
+        self._wake_event: Optional[asyncio.Event] = None
+        self._drained_event: Optional[asyncio.Event] = None
+        self._supervisor: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.pool is not None and not self.pool.is_closing()
+
+    async def connect(self):
+        """Create the pool and warm up its connections"""
+        if self.connected:
+            return
+        self.pool = await asyncpg.create_pool(
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.DB_POOL_MAX_SIZE,
+            statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
+            init=self._init_connection
+        )
+        # create_pool opens min_size connections; make sure they actually answer
+        async with self.acquire() as conn:
+            await conn.execute("SELECT 1;")
+        self.available = True
+
+    async def close(self):
+        if self._supervisor:
+            self._supervisor.cancel()
+            self._supervisor = None
+        await self._flush_snapshots()
+        if self._listen_conn:
+            await self._listen_conn.close()
+            self._listen_conn = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        self._statements.clear()
+        self.local.close()
+
+    async def listen(self, channel: str, callback):
+        """Subscribe to a NOTIFY channel on a dedicated connection outside the pool.
+
+        Subscriptions are remembered and re-established after an outage.
+        """
+        self._listeners[channel] = callback
+        if not self.available:
+            return
+        try:
+            await self._subscribe(channel, callback)
+        except CONNECTION_ERRORS:
+            self._mark_down()
+
+    async def _subscribe(self, channel: str, callback):
+        if self._listen_conn is None or self._listen_conn.is_closed():
+            self._listen_conn = await asyncpg.connect(
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                database=Config.DB_NAME,
+                host=Config.DB_HOST,
+                port=Config.DB_PORT
+            )
+        await self._listen_conn.add_listener(channel, callback)
+
+    async def _init_connection(self, conn: asyncpg.Connection):
+        """Runs once for every new physical connection"""
+        if hasattr(conn, "add_query_logger"):
+            conn.add_query_logger(self._record_query)
+        pid = conn.get_server_pid()
+        self._statements[pid] = {}
+        conn.add_termination_listener(lambda _: self._statements.pop(pid, None))
+        # Before migrations the tables may not exist yet; those connections prepare lazily
+        if self.schema_ready:
+            for name in QUERIES:
+                await self._prepare(conn, name)
+
+    def mark_schema_ready(self):
+        """Call once migrations have run so new connections prepare the registry up front"""
+        self.schema_ready = True
+
+    async def _prepare(self, conn, name: str):
+        statements = self._statements.setdefault(conn.get_server_pid(), {})
+        statement = statements.get(name)
+        if statement is None:
+            statement = statements[name] = await conn.prepare(QUERIES[name])
+        return statement
+
+    # ---------- named statements ---------- #
+    async def fetch(self, name: str, *args):
+        return await self._run("fetch", name, args)
+
+    async def fetchrow(self, name: str, *args):
+        return await self._run("fetchrow", name, args)
+
+    async def fetchval(self, name: str, *args):
+        return await self._run("fetchval", name, args)
+
+    async def execute(self, name: str, *args):
+        """Run a registered statement that returns no rows"""
+        await self._run("fetch", name, args)
+
+    def _record_query(self, *_):
+        """asyncpg query logger: counts every query a pool connection runs, in per-second buckets"""
+        self.query_count += 1
+        now = int(time.monotonic())
+        if self._query_buckets and self._query_buckets[-1][0] == now:
+            self._query_buckets[-1][1] += 1
+        else:
+            self._query_buckets.append([now, 1])
+
+    async def _run(self, method: str, name: str, args: tuple):
+        # Once anything is journaled, later writes queue behind it so replay keeps their order
+        if name in JOURNALED and (not self.available or self.journal_size):
+            return await self._journal(name, args)
+        # Everything else waits for the replay, or it would read (or conflict with) rows the
+        # journaled writes haven't changed yet - e.g. a ticket whose close is still queued
+        if self.available and self.journal_size and not await self._wait_for_replay():
+            return await self._from_snapshot(name, args)
+        if not self.available:
+            return await self._from_snapshot(name, args)
+        try:
+            async with self.acquire() as conn:
+                statement = await self._prepare(conn, name)
+                result = await getattr(statement, method)(*args)
+        except CONNECTION_ERRORS:
+            self._mark_down()
+            if name in JOURNALED:
+                return await self._journal(name, args)
+            return await self._from_snapshot(name, args)
+        if name in SNAPSHOTTED:
+            self._snapshots[(name, args)] = _plain(result)
+        return result
+
+    # ---------- degraded mode ---------- #
+    def start_supervisor(self):
+        """Background task: reconnect with backoff, replay the journal, persist snapshots"""
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    # Created on first use so they bind to the bot's running loop
+    def _local_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _wake(self) -> asyncio.Event:
+        if self._wake_event is None:
+            self._wake_event = asyncio.Event()
+        return self._wake_event
+
+    def _drained(self) -> asyncio.Event:
+        """Set while nothing is waiting in the journal"""
+        if self._drained_event is None:
+            self._drained_event = asyncio.Event()
+            if not self.journal_size:
+                self._drained_event.set()
+        return self._drained_event
+
+    async def _wait_for_replay(self) -> bool:
+        self._wake().set()  # the supervisor replays right away instead of at its next interval
+        try:
+            await asyncio.wait_for(self._drained().wait(), timeout=Config.DB_REPLAY_WAIT)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _mark_down(self):
+        if self.available:
+            print(f"{Emotes.WARNING} PostgreSQL unreachable - serving cached reads and journaling writes")
+        self.available = False
+        self._wake().set()
+
+    async def _journal(self, name: str, args: tuple):
+        async with self._local_lock():
+            await asyncio.to_thread(self.local.append, name, args)
+            self.journal_size += 1
+            self._drained().clear()
+        self._wake().set()
+        return None
+
+    async def _from_snapshot(self, name: str, args: tuple):
+        if name not in SNAPSHOTTED:
+            raise DatabaseUnavailable(f"Database unavailable for {name}")
+        value = self._snapshots.get((name, args), _NO_SNAPSHOT)
+        if value is _NO_SNAPSHOT:
+            async with self._local_lock():
+                value = await asyncio.to_thread(self.local.load_snapshot, name, args, _NO_SNAPSHOT)
+        if value is _NO_SNAPSHOT:
+            raise DatabaseUnavailable(f"Database unavailable and no local snapshot for {name}")
+        return value
+
+    async def _flush_snapshots(self):
+        if not self._snapshots:
+            return
+        items = [(name, args, value) for (name, args), value in self._snapshots.items()]
+        self._snapshots = {}
+        async with self._local_lock():
+            await asyncio.to_thread(self.local.save_snapshots, items)
+
+    async def _supervise(self):
+        async with self._local_lock():
+            self.journal_size = await asyncio.to_thread(self.local.journal_size)
+        if self.journal_size:
+            self._drained().clear()
+        delay = Config.DB_RECONNECT_MIN_DELAY
+        while True:
+            if not self.available:
+                try:
+                    await self._reconnect()
+                    delay = Config.DB_RECONNECT_MIN_DELAY
+                    print(f"{Emotes.SUCCESS} PostgreSQL reachable again")
+                except Exception as e:
+                    # Jitter keeps every shard from reconnecting in lockstep
+                    wait = delay + random.uniform(0, delay / 2)
+                    print(f"{Emotes.LOADING} PostgreSQL still unavailable ({e}); retrying in {wait:.0f}s")
+                    await asyncio.sleep(wait)
+                    delay = min(delay * 2, Config.DB_RECONNECT_MAX_DELAY)
+                    continue
+
+            try:
+                if self.journal_size:
+                    await self.replay_journal()
+                await self._flush_snapshots()
+            except CONNECTION_ERRORS:
+                self._mark_down()
+                continue
+            except Exception as e:
+                print(f"{Emotes.ERROR} Database supervisor error: {e}")
+
+            self._wake().clear()
+            try:
+                await asyncio.wait_for(self._wake().wait(), timeout=Config.DB_SNAPSHOT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _reconnect(self):
+        if self.pool is None:
+            await self.connect()
+        else:
+            # Pooled connections died with the server; make the pool open fresh ones
+            await self.pool.expire_connections()
+            async with self.acquire() as conn:
+                await conn.execute("SELECT 1;")
+            self.available = True
+        if not self.schema_ready:
+            await run_migrations(self)
+            self.mark_schema_ready()
+        for channel, callback in self._listeners.items():
+            await self._subscribe(channel, callback)
+
+    async def replay_journal(self):
+        """Apply journaled writes in order, a batch per transaction"""
+        while self.journal_size:
+            async with self._local_lock():
+                batch = await asyncio.to_thread(self.local.read_batch, Config.DB_REPLAY_BATCH)
+            if not batch:
+                self.journal_size = 0
+                break
+            async with self.acquire() as conn:
+                async with conn.transaction():
+                    for seq, name, args in batch:
+                        try:
+                            # Savepoint per entry: one bad write is dropped, not the batch
+                            async with conn.transaction():
+                                await (await self._prepare(conn, name)).fetch(*args)
+                        except CONNECTION_ERRORS:
+                            raise
+                        except asyncpg.PostgresError as e:
+                            print(f"{Emotes.ERROR} Dropped journaled write #{seq} ({name}): {e}")
+            async with self._local_lock():
+                await asyncio.to_thread(self.local.drop_through, batch[-1][0])
+                self.journal_size = max(0, self.journal_size - len(batch))
+            self.replayed += len(batch)
+        self._drained().set()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Acquire a connection, recording how long we waited for it"""
+        if self.pool is None:
+            raise RuntimeError("Database pool is not connected")
+        start = time.perf_counter()
+        async with self.pool.acquire(timeout=Config.DB_ACQUIRE_TIMEOUT) as conn:
+            waited = time.perf_counter() - start
+            self.acquire_count += 1
+            self.acquire_wait_total += waited
+            self.acquire_wait_max = max(self.acquire_wait_max, waited)
+            self.in_use += 1
+            try:
+                yield conn
+            finally:
+                self.in_use -= 1
+
+    def queries_per_second(self) -> float:
+        now = int(time.monotonic())
+        recent = sum(count for second, count in self._query_buckets if second > now - self.QPS_WINDOW)
+        return recent / self.QPS_WINDOW
+
+    def stats(self) -> Dict:
+        """Snapshot of the live pool counters"""
+        return {
+            "size": self.pool.get_size() if self.pool else 0,
+            "idle": self.pool.get_idle_size() if self.pool else 0,
+            "in_use": self.in_use,
+            "acquires": self.acquire_count,
+            "acquire_wait_avg_ms": (self.acquire_wait_total / self.acquire_count * 1000) if self.acquire_count else 0.0,
+            "acquire_wait_max_ms": self.acquire_wait_max * 1000,
+            "queries": self.query_count,
+            "prepared": sum(len(statements) for statements in self._statements.values()),
+            "available": self.available,
+            "journaled": self.journal_size,
+            "replayed": self.replayed,
+            "qps": self.queries_per_second()
+        }
+
+
+def _plain(result):
+    """Records -> dicts so snapshots can be pickled to the local store"""
+    if isinstance(result, asyncpg.Record):
+        return dict(result)
+    if isinstance(result, list):
+        return [_plain(item) for item in result]
+    return result
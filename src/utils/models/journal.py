@@ -0,0 +1,79 @@
+"""
+Local fallback store used while PostgreSQL is unreachable
+Keeps last-known read results and an append-only journal of deferred writes in one SQLite file
+"""
+
+import json
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _key(name: str, args: tuple) -> str:
+    return f"{name}:{json.dumps(list(args))}"
+
+
+class LocalStore:
+    """Blocking SQLite access - callers run these methods in a worker thread, one at a time"""
+
+    def __init__(self, path: str):
+        path = Path(path)
+        self.path = path if path.is_absolute() else _PROJECT_ROOT / path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL + synchronous=FULL: a committed journal entry survives a crash
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=FULL;")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    args TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL
+                );
+            """)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------- write journal ---------- #
+    def append(self, name: str, args: tuple):
+        with self._db() as db:
+            db.execute("INSERT INTO journal (name, args) VALUES (?, ?);", (name, json.dumps(list(args))))
+
+    def journal_size(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM journal;").fetchone()[0]
+
+    def read_batch(self, limit: int) -> List[Tuple[int, str, list]]:
+        rows = self._db().execute("SELECT seq, name, args FROM journal ORDER BY seq LIMIT ?;", (limit,)).fetchall()
+        return [(seq, name, json.loads(args)) for seq, name, args in rows]
+
+    def drop_through(self, seq: int):
+        """Forget every entry up to and including `seq` once it has been replayed"""
+        with self._db() as db:
+            db.execute("DELETE FROM journal WHERE seq <= ?;", (seq,))
+
+    # ---------- read snapshots ---------- #
+    def save_snapshots(self, items: Iterable[Tuple[str, tuple, Any]]):
+        with self._db() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO snapshots (key, value) VALUES (?, ?);",
+                [(_key(name, args), pickle.dumps(value)) for name, args, value in items]
+            )
+
+    def load_snapshot(self, name: str, args: tuple, default=None):
+        row = self._db().execute("SELECT value FROM snapshots WHERE key = ?;", (_key(name, args),)).fetchone()
+        return pickle.loads(row[0]) if row else default
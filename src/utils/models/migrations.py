@@ -0,0 +1,257 @@
+"""
+Versioned schema migrations - applied once at startup, in order, each in its own transaction
+"""
+
+from datetime import datetime
+from typing import List
+
+# Arbitrary constant so concurrent processes/shards don't migrate at the same time
+_LOCK_ID = 727_001
+
+# ====================== MIGRATIONS ====================== #
+# Append new migrations to the end; never edit one that has shipped.
+MIGRATIONS = [
+    (1, "baseline schema", """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id SERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL UNIQUE,
+            ticket_number INTEGER NOT NULL,
+            claimed_by BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            closed_by BIGINT,
+            status TEXT DEFAULT 'open',
+            category TEXT,
+            claimed_at TIMESTAMP,
+            panel_message_id BIGINT,
+            purged_at TIMESTAMP
+        );
+        -- Deployments created by the old init_db() may be missing these
+        ALTER TABLE tickets ADD COLUMN IF NOT EXISTS category TEXT;
+        ALTER TABLE tickets ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+        ALTER TABLE tickets ADD COLUMN IF NOT EXISTS panel_message_id BIGINT;
+        ALTER TABLE tickets ADD COLUMN IF NOT EXISTS purged_at TIMESTAMP;
+        -- UNIQUE(guild_id, user_id, status) allowed only one closed ticket per user
+        ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_guild_id_user_id_status_key;
+
+        CREATE TABLE IF NOT EXISTS ticket_settings (
+            guild_id BIGINT PRIMARY KEY,
+            manager_role_id BIGINT,
+            log_channel_id BIGINT,
+            category_id BIGINT
+        );
+        ALTER TABLE ticket_settings ADD COLUMN IF NOT EXISTS category_id BIGINT;
+
+        CREATE TABLE IF NOT EXISTS ticket_counters (
+            guild_id BIGINT PRIMARY KEY,
+            last_number INTEGER NOT NULL
+        );
+        INSERT INTO ticket_counters (guild_id, last_number)
+        SELECT guild_id, MAX(ticket_number) FROM tickets GROUP BY guild_id
+        ON CONFLICT (guild_id) DO NOTHING;
+
+        CREATE TABLE IF NOT EXISTS ticket_stats (
+            guild_id BIGINT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            open_count INTEGER NOT NULL DEFAULT 0,
+            closed_count INTEGER NOT NULL DEFAULT 0,
+            claim_count INTEGER NOT NULL DEFAULT 0,
+            claim_seconds_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+            close_seconds_total DOUBLE PRECISION NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS ticket_category_stats (
+            guild_id BIGINT NOT NULL,
+            category TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, category)
+        );
+        INSERT INTO ticket_stats (guild_id, total, open_count, closed_count, claim_count, claim_seconds_total, close_seconds_total)
+        SELECT guild_id,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE status = 'open'),
+               COUNT(*) FILTER (WHERE status = 'closed'),
+               COUNT(claimed_at),
+               COALESCE(SUM(EXTRACT(EPOCH FROM claimed_at - created_at)), 0),
+               COALESCE(SUM(EXTRACT(EPOCH FROM closed_at - created_at)), 0)
+        FROM tickets GROUP BY guild_id
+        ON CONFLICT (guild_id) DO NOTHING;
+
+        CREATE TABLE IF NOT EXISTS ticket_transcripts (
+            id SERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            ticket_number INTEGER,
+            user_id BIGINT,
+            closed_by BIGINT,
+            blob_hash TEXT NOT NULL,
+            attachment_hashes TEXT[] NOT NULL DEFAULT '{}',
+            participants BIGINT[] NOT NULL DEFAULT '{}',
+            message_count INTEGER NOT NULL DEFAULT 0,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            search TSVECTOR
+        );
+        CREATE INDEX IF NOT EXISTS idx_transcripts_guild ON ticket_transcripts(guild_id, archived_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_transcripts_search ON ticket_transcripts USING GIN(search);
+        CREATE INDEX IF NOT EXISTS idx_transcripts_participants ON ticket_transcripts USING GIN(participants);
+
+        CREATE TABLE IF NOT EXISTS welcome_settings (
+            guild_id BIGINT PRIMARY KEY,
+            enabled BOOLEAN DEFAULT TRUE,
+            channel_id BIGINT,
+            message TEXT,
+            auto_role_id BIGINT,
+            show_buttons BOOLEAN DEFAULT TRUE,
+            auto_delete_after INTEGER,
+            goodbye_enabled BOOLEAN DEFAULT FALSE,
+            goodbye_channel_id BIGINT,
+            goodbye_message TEXT,
+            title TEXT,
+            description TEXT,
+            footer TEXT,
+            thumbnail TEXT,
+            image TEXT,
+            footer_icon TEXT,
+            color TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+
+    (2, "compact ticket status and partial indexes on open tickets", """
+        -- idx_channel duplicated the UNIQUE(channel_id) index; idx_guild_user indexed every closed row too
+        DROP INDEX IF EXISTS idx_channel;
+        DROP INDEX IF EXISTS idx_guild_user;
+        -- these reference status and must be rebuilt after the type change
+        DROP INDEX IF EXISTS idx_open_user;
+        DROP INDEX IF EXISTS idx_sweep_open;
+        DROP INDEX IF EXISTS idx_sweep_unpurged;
+
+        DO $$ BEGIN
+            CREATE TYPE ticket_status AS ENUM ('open', 'closed');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$;
+        UPDATE tickets SET status = 'open' WHERE status IS NULL;
+        ALTER TABLE tickets ALTER COLUMN status DROP DEFAULT;
+        ALTER TABLE tickets ALTER COLUMN status TYPE ticket_status USING status::ticket_status;
+        ALTER TABLE tickets ALTER COLUMN status SET DEFAULT 'open';
+        ALTER TABLE tickets ALTER COLUMN status SET NOT NULL;
+
+        -- Open tickets are a tiny slice of the table; index only them
+        CREATE UNIQUE INDEX idx_open_user ON tickets(guild_id, user_id) WHERE status = 'open';
+        CREATE INDEX idx_open_guild ON tickets(guild_id, created_at DESC) WHERE status = 'open';
+        CREATE INDEX idx_sweep_open ON tickets(id) WHERE status = 'open';
+        CREATE INDEX idx_sweep_unpurged ON tickets(closed_at) WHERE status = 'closed' AND purged_at IS NULL;
+    """),
+
+    (3, "range-partitioned history for old closed tickets", """
+        CREATE TABLE IF NOT EXISTS tickets_history (
+            id INTEGER NOT NULL,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            ticket_number INTEGER NOT NULL,
+            claimed_by BIGINT,
+            created_at TIMESTAMP NOT NULL,
+            closed_at TIMESTAMP,
+            closed_by BIGINT,
+            status ticket_status NOT NULL,
+            category TEXT,
+            claimed_at TIMESTAMP,
+            panel_message_id BIGINT,
+            purged_at TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        CREATE INDEX IF NOT EXISTS idx_history_guild ON tickets_history(guild_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_purged ON tickets(purged_at) WHERE purged_at IS NOT NULL;
+    """),
+
+    (4, "music sessions and queues that survive a restart", """
+        CREATE TABLE IF NOT EXISTS music_sessions (
+            guild_id BIGINT PRIMARY KEY,
+            voice_channel_id BIGINT NOT NULL,
+            text_channel_id BIGINT,
+            current_track BYTEA,
+            current_requester BIGINT,
+            position INTEGER NOT NULL DEFAULT 0,
+            paused BOOLEAN NOT NULL DEFAULT FALSE,
+            volume SMALLINT NOT NULL DEFAULT 100,
+            loop SMALLINT NOT NULL DEFAULT 0,
+            shuffled INTEGER NOT NULL DEFAULT 0,
+            shuffle_end INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        -- One row per queued track, ordered by a sparse sort key so moves rewrite a single row
+        CREATE TABLE IF NOT EXISTS music_queue_tracks (
+            guild_id BIGINT NOT NULL,
+            sort_key BIGINT NOT NULL,
+            track BYTEA NOT NULL,
+            requester BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, sort_key)
+        );
+    """),
+
+    (5, "shared cache of resolved track searches", """
+        CREATE TABLE IF NOT EXISTS music_search_cache (
+            query TEXT PRIMARY KEY,
+            load_type TEXT NOT NULL,
+            playlist_name TEXT,
+            identifiers TEXT[] NOT NULL,
+            tracks BYTEA[] NOT NULL,
+            resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_expiry ON music_search_cache(expires_at);
+    """),
+
+    (6, "per-guild custom filter and equalizer presets", """
+        CREATE TABLE IF NOT EXISTS music_filter_presets (
+            guild_id BIGINT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('filter', 'equalizer')),
+            name TEXT NOT NULL,
+            payload JSONB NOT NULL,
+            created_by BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, kind, name)
+        );
+    """),
+]
+
+
+# ====================== RUNNER ====================== #
+async def run_migrations(pool) -> List[int]:
+    """Apply pending migrations; returns the versions applied by this call"""
+    async with pool.acquire() as conn:
+        await conn.execute("SELECT pg_advisory_lock($1);", _LOCK_ID)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations;")}
+
+            done = []
+            for version, name, sql in MIGRATIONS:
+                if version in applied:
+                    continue
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2);", version, name)
+                done.append(version)
+            return done
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1);", _LOCK_ID)
+
+
+async def ensure_history_partition(conn, month: datetime):
+    """Create the monthly tickets_history partition covering `month` if it doesn't exist"""
+    start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS tickets_history_{start:%Y_%m}
+        PARTITION OF tickets_history
+        FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}');
+    """)
@@ -0,0 +1,302 @@
+"""
+Named statement registry - every hot-path query has one fixed shape, prepared once per connection
+"""
+
+# Columns callers may pass to WelcomeManager.update_settings, in parameter order ($2..$17)
+WELCOME_COLUMNS = (
+    "enabled", "channel_id", "message", "auto_role_id", "show_buttons", "auto_delete_after",
+    "goodbye_enabled", "goodbye_channel_id", "goodbye_message", "title", "description",
+    "footer", "thumbnail", "image", "footer_icon", "color"
+)
+# Table defaults, applied on first insert when the caller didn't set the column
+_WELCOME_DEFAULTS = {"enabled": "TRUE", "show_buttons": "TRUE", "goodbye_enabled": "FALSE"}
+
+
+def _welcome_upsert() -> str:
+    """One statement for every combination of columns.
+
+    $18 lists the columns the caller actually set, so an explicit None still clears a
+    column while untouched columns keep their stored value. $19/$20 are the NOTIFY
+    channel and payload (channel NULL = don't notify).
+    """
+    flags = len(WELCOME_COLUMNS) + 2
+    values = []
+    updates = []
+    for i, column in enumerate(WELCOME_COLUMNS, start=2):
+        default = _WELCOME_DEFAULTS.get(column)
+        values.append(f"COALESCE(${i}, {default})" if default else f"${i}")
+        updates.append(
+            f"{column} = CASE WHEN '{column}' = ANY(${flags}::text[]) "
+            f"THEN EXCLUDED.{column} ELSE welcome_settings.{column} END"
+        )
+    return f"""
+        WITH upsert AS (
+            INSERT INTO welcome_settings (guild_id, {', '.join(WELCOME_COLUMNS)})
+            VALUES ($1, {', '.join(values)})
+            ON CONFLICT (guild_id) DO UPDATE SET
+                {', '.join(updates)},
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING *
+        ), notified AS (
+            SELECT pg_notify(${flags + 1}::text, ${flags + 2}::text) FROM upsert WHERE ${flags + 1}::text IS NOT NULL
+        )
+        -- the count forces the notify CTE to run inside this same round-trip
+        SELECT upsert.* FROM upsert WHERE (SELECT COUNT(*) FROM notified) >= 0;
+    """
+
+
+QUERIES = {
+    # ---------- tickets ---------- #
+    "ticket_create": """
+        WITH new_ticket AS (
+            INSERT INTO tickets (guild_id, user_id, channel_id, ticket_number, category, panel_message_id)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING id
+        ), stats AS (
+            INSERT INTO ticket_stats (guild_id, total, open_count)
+            VALUES ($1, 1, 1)
+            ON CONFLICT (guild_id)
+            DO UPDATE SET total = ticket_stats.total + 1, open_count = ticket_stats.open_count + 1
+        ), category_stats AS (
+            INSERT INTO ticket_category_stats (guild_id, category, total)
+            SELECT $1, $5, 1 WHERE $5 IS NOT NULL
+            ON CONFLICT (guild_id, category)
+            DO UPDATE SET total = ticket_category_stats.total + 1
+        )
+        SELECT id FROM new_ticket;
+    """,
+    "ticket_set_panel": "UPDATE tickets SET panel_message_id = $1 WHERE channel_id = $2;",
+    "ticket_by_channel": "SELECT * FROM tickets WHERE channel_id = $1 AND status = 'open';",
+    "ticket_by_user": "SELECT * FROM tickets WHERE guild_id = $1 AND user_id = $2 AND status = 'open';",
+    # Maintained counter; tickets may have moved to tickets_history
+    "ticket_count": "SELECT total FROM ticket_stats WHERE guild_id = $1;",
+    "ticket_next_number": """
+        INSERT INTO ticket_counters (guild_id, last_number)
+        VALUES ($1, 1)
+        ON CONFLICT (guild_id)
+        DO UPDATE SET last_number = ticket_counters.last_number + 1
+        RETURNING last_number;
+    """,
+    "ticket_claim": """
+        WITH claimed AS (
+            UPDATE tickets
+            SET claimed_by = $1, claimed_at = CURRENT_TIMESTAMP
+            WHERE channel_id = $2 AND status = 'open' AND claimed_by IS NULL
+            RETURNING guild_id, ticket_number, panel_message_id,
+                      EXTRACT(EPOCH FROM claimed_at - created_at) AS seconds
+        ), stats AS (
+            UPDATE ticket_stats
+            SET claim_count = ticket_stats.claim_count + 1,
+                claim_seconds_total = ticket_stats.claim_seconds_total + claimed.seconds
+            FROM claimed
+            WHERE ticket_stats.guild_id = claimed.guild_id
+        )
+        SELECT ticket_number, panel_message_id FROM claimed;
+    """,
+    "ticket_close_many": """
+        WITH closed AS (
+            UPDATE tickets
+            SET status = 'closed', closed_at = CURRENT_TIMESTAMP, closed_by = $1
+            WHERE channel_id = ANY($2::bigint[]) AND status = 'open'
+            RETURNING guild_id, EXTRACT(EPOCH FROM closed_at - created_at) AS seconds
+        ), per_guild AS (
+            SELECT guild_id, COUNT(*) AS closed, SUM(seconds) AS seconds
+            FROM closed GROUP BY guild_id
+        )
+        UPDATE ticket_stats
+        SET open_count = ticket_stats.open_count - per_guild.closed,
+            closed_count = ticket_stats.closed_count + per_guild.closed,
+            close_seconds_total = ticket_stats.close_seconds_total + per_guild.seconds
+        FROM per_guild
+        WHERE ticket_stats.guild_id = per_guild.guild_id;
+    """,
+    "ticket_sweep_batch": """
+        SELECT id, guild_id, user_id, channel_id, ticket_number, status
+        FROM tickets
+        WHERE id > $1
+          AND (status = 'open'
+               OR ($2::integer IS NOT NULL AND status = 'closed' AND purged_at IS NULL
+                   AND closed_at < CURRENT_TIMESTAMP - $2::integer * INTERVAL '1 hour'))
+          -- a clustered process only sweeps its own shards' guilds (Discord's shard formula)
+          AND ($4::integer IS NULL OR ((guild_id >> 22) % $4::integer)::integer = ANY($5::integer[]))
+        ORDER BY id
+        LIMIT $3;
+    """,
+    "ticket_mark_purged": "UPDATE tickets SET purged_at = CURRENT_TIMESTAMP WHERE channel_id = ANY($1::bigint[]);",
+    "ticket_open_list": """
+        SELECT * FROM tickets WHERE guild_id = $1 AND status = 'open'
+        ORDER BY created_at DESC;
+    """,
+    "ticket_stats": """
+        SELECT s.total, s.open_count, s.closed_count,
+               s.claim_count, s.claim_seconds_total, s.close_seconds_total,
+               (SELECT jsonb_object_agg(c.category, c.total)
+                FROM ticket_category_stats c WHERE c.guild_id = $1) AS categories
+        FROM ticket_stats s
+        WHERE s.guild_id = $1;
+    """,
+    "ticket_stats_many": """
+        SELECT s.guild_id, s.total, s.open_count, s.closed_count,
+               s.claim_count, s.claim_seconds_total, s.close_seconds_total, c.categories
+        FROM ticket_stats s
+        LEFT JOIN (
+            SELECT guild_id, jsonb_object_agg(category, total) AS categories
+            FROM ticket_category_stats WHERE guild_id = ANY($1::bigint[])
+            GROUP BY guild_id
+        ) c ON c.guild_id = s.guild_id
+        WHERE s.guild_id = ANY($1::bigint[]);
+    """,
+    "ticket_save_settings": """
+        INSERT INTO ticket_settings (guild_id, manager_role_id, log_channel_id, category_id)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (guild_id)
+        DO UPDATE SET
+            manager_role_id = EXCLUDED.manager_role_id,
+            log_channel_id = EXCLUDED.log_channel_id,
+            category_id = EXCLUDED.category_id;
+    """,
+    "ticket_load_settings": """
+        SELECT manager_role_id, log_channel_id, category_id
+        FROM ticket_settings
+        WHERE guild_id = $1;
+    """,
+    "ticket_load_settings_many": """
+        SELECT guild_id, manager_role_id, log_channel_id, category_id
+        FROM ticket_settings
+        WHERE guild_id = ANY($1::bigint[]);
+    """,
+
+    # ---------- transcripts ---------- #
+    "transcript_save": """
+        INSERT INTO ticket_transcripts (guild_id, channel_id, ticket_number, user_id, closed_by, blob_hash,
+                                       attachment_hashes, participants, message_count, search)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, to_tsvector('simple', $10))
+        RETURNING id;
+    """,
+    "transcript_search": """
+        SELECT id, channel_id, ticket_number, user_id, closed_by, message_count, archived_at
+        FROM ticket_transcripts
+        WHERE guild_id = $1
+          AND ($2::text IS NULL OR search @@ websearch_to_tsquery('simple', $2))
+          AND ($3::bigint IS NULL OR participants @> ARRAY[$3::bigint])
+        ORDER BY archived_at DESC
+        LIMIT $4;
+    """,
+    "transcript_get": """
+        SELECT id, channel_id, ticket_number, user_id, blob_hash, attachment_hashes, message_count, archived_at
+        FROM ticket_transcripts WHERE guild_id = $1 AND id = $2;
+    """,
+
+    # ---------- welcome ---------- #
+    "welcome_get": "SELECT * FROM welcome_settings WHERE guild_id = $1;",
+    "welcome_get_many": "SELECT * FROM welcome_settings WHERE guild_id = ANY($1::bigint[]);",
+    "welcome_upsert": _welcome_upsert(),
+    "welcome_delete": """
+        WITH deleted AS (
+            DELETE FROM welcome_settings WHERE guild_id = $1 RETURNING guild_id
+        ), notified AS (
+            SELECT pg_notify($2::text, $3::text) FROM deleted WHERE $2::text IS NOT NULL
+        )
+        SELECT COUNT(*) FROM notified;
+    """,
+
+    # ---------- music ---------- #
+    # Every active player in one statement; parallel arrays, one element per guild
+    "music_session_save_many": """
+        INSERT INTO music_sessions (guild_id, voice_channel_id, text_channel_id, current_track, current_requester,
+                                    position, paused, volume, loop, shuffled, shuffle_end)
+        SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::bigint[], $4::bytea[], $5::bigint[],
+                             $6::integer[], $7::boolean[], $8::smallint[], $9::smallint[], $10::integer[], $11::integer[])
+        ON CONFLICT (guild_id) DO UPDATE SET
+            voice_channel_id = EXCLUDED.voice_channel_id, text_channel_id = EXCLUDED.text_channel_id,
+            current_track = EXCLUDED.current_track, current_requester = EXCLUDED.current_requester,
+            position = EXCLUDED.position, paused = EXCLUDED.paused, volume = EXCLUDED.volume, loop = EXCLUDED.loop,
+            shuffled = EXCLUDED.shuffled, shuffle_end = EXCLUDED.shuffle_end, updated_at = CURRENT_TIMESTAMP;
+    """,
+    # Queue deltas for many guilds at once. $1: guilds whose stored queue is replaced by the rows given here;
+    # $2/$3: (guild, sort_key) rows to delete; $4..$7: rows to write. Deletes and writes never share a row.
+    "music_queue_save": """
+        WITH incoming AS (
+            SELECT * FROM unnest($4::bigint[], $5::bigint[], $6::bytea[], $7::bigint[])
+                AS r(guild_id, sort_key, track, requester)
+        ), replaced AS (
+            DELETE FROM music_queue_tracks t
+            WHERE t.guild_id = ANY($1::bigint[])
+              AND NOT EXISTS (SELECT 1 FROM incoming r WHERE r.guild_id = t.guild_id AND r.sort_key = t.sort_key)
+        ), removed AS (
+            DELETE FROM music_queue_tracks t
+            USING unnest($2::bigint[], $3::bigint[]) AS d(guild_id, sort_key)
+            WHERE t.guild_id = d.guild_id AND t.sort_key = d.sort_key
+        )
+        INSERT INTO music_queue_tracks (guild_id, sort_key, track, requester)
+        SELECT * FROM incoming
+        ON CONFLICT (guild_id, sort_key) DO UPDATE SET track = EXCLUDED.track, requester = EXCLUDED.requester;
+    """,
+    "music_session_delete_many": """
+        WITH sessions AS (
+            DELETE FROM music_sessions WHERE guild_id = ANY($1::bigint[])
+        )
+        DELETE FROM music_queue_tracks WHERE guild_id = ANY($1::bigint[]);
+    """,
+    "music_session_load_many": "SELECT * FROM music_sessions WHERE guild_id = ANY($1::bigint[]);",
+    "music_queue_load_many": """
+        SELECT guild_id, sort_key, track, requester FROM music_queue_tracks
+        WHERE guild_id = ANY($1::bigint[])
+        ORDER BY guild_id, sort_key;
+    """,
+    "music_search_get": """
+        SELECT load_type, playlist_name, tracks,
+               EXTRACT(EPOCH FROM expires_at - CURRENT_TIMESTAMP)::float8 AS ttl
+        FROM music_search_cache WHERE query = $1 AND expires_at > CURRENT_TIMESTAMP;
+    """,
+    "music_search_put": """
+        INSERT INTO music_search_cache (query, load_type, playlist_name, identifiers, tracks, expires_at)
+        VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP + $6::integer * INTERVAL '1 second')
+        ON CONFLICT (query) DO UPDATE SET
+            load_type = EXCLUDED.load_type, playlist_name = EXCLUDED.playlist_name,
+            identifiers = EXCLUDED.identifiers, tracks = EXCLUDED.tracks,
+            resolved_at = CURRENT_TIMESTAMP, expires_at = EXCLUDED.expires_at;
+    """,
+    "music_search_purge": """
+        WITH purged AS (
+            DELETE FROM music_search_cache WHERE expires_at <= CURRENT_TIMESTAMP RETURNING 1
+        )
+        SELECT COUNT(*) FROM purged;
+    """,
+    "music_preset_list": "SELECT kind, name, payload FROM music_filter_presets WHERE guild_id = $1;",
+    "music_preset_save": """
+        INSERT INTO music_filter_presets (guild_id, kind, name, payload, created_by)
+        VALUES ($1, $2, $3, $4::jsonb, $5)
+        ON CONFLICT (guild_id, kind, name)
+        DO UPDATE SET payload = EXCLUDED.payload, created_by = EXCLUDED.created_by, created_at = CURRENT_TIMESTAMP;
+    """,
+    "music_preset_delete": """
+        DELETE FROM music_filter_presets WHERE guild_id = $1 AND kind = $2 AND name = $3
+        RETURNING name;
+    """,
+
+    # ---------- dashboards ---------- #
+    # Whole rows come back as composite values, which asyncpg decodes into Records
+    "guild_data": """
+        SELECT ARRAY(SELECT t FROM tickets t
+                     WHERE t.guild_id = $1 AND t.status = 'open'
+                     ORDER BY t.created_at DESC) AS open_tickets,
+               (SELECT s FROM ticket_stats s WHERE s.guild_id = $1) AS stats,
+               (SELECT jsonb_object_agg(c.category, c.total)
+                FROM ticket_category_stats c WHERE c.guild_id = $1) AS categories,
+               (SELECT w FROM welcome_settings w WHERE w.guild_id = $1) AS welcome;
+    """,
+}
+
+# While PostgreSQL is down these writes are journaled locally and replayed in order later;
+# their callers must not depend on the statement's result
+JOURNALED = frozenset({
+    "ticket_set_panel", "ticket_close_many", "ticket_mark_purged", "ticket_save_settings",
+    "transcript_save", "welcome_upsert", "welcome_delete",
+})
+
+# Reads whose last result is kept locally and served while PostgreSQL is down
+SNAPSHOTTED = frozenset({
+    "ticket_by_channel", "ticket_by_user", "ticket_count", "ticket_open_list", "ticket_stats",
+    "ticket_load_settings", "welcome_get",
+})
@@ -0,0 +1,188 @@
+"""
+Audio filter and equalizer presets
+Every preset is validated and serialized to its Lavalink filters payload once - built-ins at import,
+custom presets when they're created - so applying one is a dict merge and a single player update.
+A player's changes are pushed at most once per Config.MUSIC_FILTER_DEBOUNCE seconds.
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import lavalink
+from lavalink.abc import Filter
+from lavalink.filters import Equalizer, Timescale, Karaoke, Tremolo, Vibrato, Rotation, LowPass
+
+from utils.config import Config
+from utils.emotes import Emotes
+
+KIND_FILTER = "filter"
+KIND_EQUALIZER = "equalizer"
+EQ_BANDS = 15
+
+
+class FilterPreset:
+    """A named, already-serialized filters payload"""
+
+    __slots__ = ("name", "kind", "payload", "custom")
+
+    def __init__(self, name: str, kind: str, payload: Dict, custom: bool = False):
+        self.name = name
+        self.kind = kind
+        self.payload = payload
+        self.custom = custom
+
+    @classmethod
+    def build(cls, name: str, kind: str, filters: Iterable[Filter], custom: bool = False) -> "FilterPreset":
+        payload = {}
+        for filter_ in filters:
+            payload.update(filter_.serialize())
+        return cls(name, kind, payload, custom)
+
+
+class PresetPayload(Filter):
+    """Carries a pre-serialized payload through DefaultPlayer.set_filters, which only accepts Filter objects"""
+
+    def __init__(self, payload: Dict):
+        super().__init__(payload)
+
+    def update(self, **kwargs):
+        # Nothing to do: the payload was validated when its preset was built, and changes
+        # are made by applying another preset through FilterMixer, never by editing this one
+        pass
+
+    def serialize(self) -> Dict:
+        return self.values
+
+
+# ====================== BUILDERS ====================== #
+def _checked(filter_type, **values) -> Filter:
+    # The constructors accept anything; update() is where lavalink.py range-checks values
+    filter_ = filter_type()
+    filter_.update(**values)
+    return filter_
+
+
+def equalizer_preset(name: str, gains: List[float], custom: bool = False) -> FilterPreset:
+    """Gains for bands 0..14 (25Hz .. 16kHz), each -0.25 to 1.0; missing bands stay at 0"""
+    if not 0 < len(gains) <= EQ_BANDS:
+        raise ValueError(f"Give between 1 and {EQ_BANDS} band gains")
+    if not any(gains):
+        return FilterPreset(name, KIND_EQUALIZER, {}, custom)
+    return FilterPreset.build(name, KIND_EQUALIZER, [_checked(Equalizer, bands=list(enumerate(gains)))], custom)
+
+
+def _pair(value: str) -> Dict[str, float]:
+    frequency, _, depth = value.partition(",")
+    return {"frequency": float(frequency), "depth": float(depth) if depth else 0.5}
+
+
+# key in a custom spec -> (filter type, values for update())
+_SPEC_KEYS = {
+    "speed": (Timescale, lambda v: {"speed": float(v)}),
+    "pitch": (Timescale, lambda v: {"pitch": float(v)}),
+    "rate": (Timescale, lambda v: {"rate": float(v)}),
+    "rotation": (Rotation, lambda v: {"rotation_hz": float(v)}),
+    "tremolo": (Tremolo, _pair),
+    "vibrato": (Vibrato, _pair),
+    "lowpass": (LowPass, lambda v: {"smoothing": float(v)}),
+    "karaoke": (Karaoke, lambda v: {"level": float(v)}),
+}
+SPEC_HELP = "speed= pitch= rate= rotation= tremolo=<hz>,<depth> vibrato=<hz>,<depth> lowpass= karaoke="
+
+
+def filter_preset_from_spec(name: str, spec: str) -> FilterPreset:
+    """Parse `speed=1.1 pitch=1.2 rotation=0.2 ...` into a validated custom preset"""
+    values: Dict[type, Dict[str, float]] = {}
+    for token in spec.split():
+        key, sep, raw = token.partition("=")
+        option = _SPEC_KEYS.get(key.lower())
+        if not sep or option is None:
+            raise ValueError(f"Unknown option `{token}` - use {SPEC_HELP}")
+        filter_type, parse = option
+        try:
+            values.setdefault(filter_type, {}).update(parse(raw))
+        except ValueError:
+            raise ValueError(f"`{token}` needs a number")
+    if not values:
+        raise ValueError(f"Give at least one option: {SPEC_HELP}")
+    return FilterPreset.build(name, KIND_FILTER, [_checked(t, **v) for t, v in values.items()], custom=True)
+
+
+# ====================== BUILT-IN PRESETS ====================== #
+FILTER_PRESETS: Dict[str, FilterPreset] = {preset.name: preset for preset in (
+    FilterPreset("off", KIND_FILTER, {}),
+    FilterPreset.build("nightcore", KIND_FILTER, [_checked(Timescale, speed=1.25, pitch=1.3)]),
+    FilterPreset.build("vaporwave", KIND_FILTER, [_checked(Timescale, speed=0.8, pitch=0.85)]),
+    FilterPreset.build("8d", KIND_FILTER, [_checked(Rotation, rotation_hz=0.2)]),
+    FilterPreset.build("karaoke", KIND_FILTER, [
+        _checked(Karaoke, level=1.0, mono_level=1.0, filter_band=220.0, filter_width=100.0)
+    ]),
+    FilterPreset.build("tremolo", KIND_FILTER, [_checked(Tremolo, frequency=4.0, depth=0.75)]),
+    FilterPreset.build("vibrato", KIND_FILTER, [_checked(Vibrato, frequency=4.0, depth=0.75)]),
+    FilterPreset.build("lowpass", KIND_FILTER, [_checked(LowPass, smoothing=20.0)]),
+)}
+
+EQUALIZER_PRESETS: Dict[str, FilterPreset] = {preset.name: preset for preset in (
+    equalizer_preset("flat", [0.0] * EQ_BANDS),
+    equalizer_preset("bass", [0.2, 0.15, 0.1, 0.05, 0.0, -0.05, -0.05, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+    equalizer_preset("bassboost", [0.4, 0.35, 0.3, 0.2, 0.1, 0.0, -0.05, -0.05, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+    equalizer_preset("pop", [-0.02, -0.01, 0.08, 0.1, 0.15, 0.1, 0.03, -0.02, -0.035, -0.05, -0.05, -0.05, -0.05, -0.05, -0.05]),
+    equalizer_preset("rock", [0.15, 0.1, 0.05, 0.0, -0.05, -0.05, 0.0, 0.05, 0.1, 0.12, 0.12, 0.12, 0.1, 0.1, 0.1]),
+    equalizer_preset("treble", [-0.1, -0.1, -0.08, -0.05, 0.0, 0.0, 0.05, 0.1, 0.15, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2]),
+)}
+
+BUILTIN_PRESETS = {KIND_FILTER: FILTER_PRESETS, KIND_EQUALIZER: EQUALIZER_PRESETS}
+
+
+# ====================== PER-PLAYER MIXER ====================== #
+class FilterMixer:
+    """A player's active filter and equalizer presets, sent as one combined update.
+
+    Changes are coalesced: the first change after a quiet period goes out on the next loop
+    iteration, later ones wait for the end of the debounce window and only the latest
+    combination is sent.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.filter = FILTER_PRESETS["off"]
+        self.equalizer = EQUALIZER_PRESETS["flat"]
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._last_sent = 0.0
+        self._applied: Dict = {}
+        self.updates = 0
+        self.coalesced = 0
+
+    def set(self, preset: FilterPreset):
+        if preset.kind == KIND_EQUALIZER:
+            self.equalizer = preset
+        else:
+            self.filter = preset
+        if self._pending is not None:
+            self.coalesced += 1  # the scheduled update will carry this change too
+            return
+        delay = max(0.0, self._last_sent + Config.MUSIC_FILTER_DEBOUNCE - time.monotonic())
+        self._pending = asyncio.get_running_loop().call_later(delay, lambda: asyncio.create_task(self.flush()))
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    async def flush(self):
+        self._pending = None
+        payload = {**self.filter.payload, **self.equalizer.payload}
+        if payload == self._applied or not self.player.is_connected:
+            return
+        self._last_sent = time.monotonic()
+        self._applied = payload
+        self.updates += 1
+        try:
+            if payload:
+                await self.player.set_filters(PresetPayload(payload), replace=True)
+            else:
+                await self.player.clear_filters()
+        except lavalink.RequestError as e:
+            self._applied = {}  # unknown state on the node; resend on the next change
+            print(f"{Emotes.ERROR} Failed to apply filters in guild {self.player.guild_id}: {e}")
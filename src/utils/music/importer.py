@@ -0,0 +1,121 @@
+"""
+Streaming playlist import
+Resolves a list of queries (a playlist file, or several lines passed to play) into a player's
+queue in their original order. At most `concurrency` lookups are in flight; each track is queued
+as soon as everything before it has resolved, so playback starts with the first one.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from lavalink import LoadType
+
+from utils.config import Config
+from utils.music.queue import QueueEntry
+from utils.music.search import ResolvedTracks
+
+
+def parse_playlist(text: str) -> List[str]:
+    """One query per line; blank lines and M3U directives (#EXTM3U, #EXTINF, ...) are skipped"""
+    queries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            queries.append(line)
+    return queries
+
+
+class PlaylistImport:
+    """One running import into one player"""
+
+    def __init__(self, resolver, player, queries: Iterable[str], requester: int,
+                 concurrency: int = Config.MUSIC_IMPORT_CONCURRENCY,
+                 progress: Optional[Callable[["PlaylistImport"], Awaitable[None]]] = None,
+                 progress_interval: float = Config.MUSIC_IMPORT_PROGRESS_INTERVAL):
+        self.resolver = resolver
+        self.player = player
+        self.queries = list(queries)
+        self.requester = requester
+        self.concurrency = max(1, concurrency)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.resolved = 0
+        self.failed = 0
+        self.queued = 0
+        self.started_at = 0.0
+        self.first_track_seconds: Optional[float] = None  # until the first track was queued
+        self.finished_at: Optional[float] = None
+        self._last_progress = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.queries)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Queries resolved per second"""
+        elapsed = self.elapsed
+        return (self.resolved + self.failed) / elapsed if elapsed else 0.0
+
+    async def run(self):
+        self.started_at = time.perf_counter()
+        self._last_progress = self.started_at
+        queries = iter(self.queries)
+        pending = deque()
+
+        def refill():
+            while len(pending) < self.concurrency:
+                query = next(queries, None)
+                if query is None:
+                    return
+                pending.append(asyncio.ensure_future(self.resolver.resolve(query)))
+
+        try:
+            refill()
+            while pending:
+                task = pending.popleft()
+                try:
+                    result = await task
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    result = None
+                refill()
+                if not self.player.is_connected:
+                    break  # left voice (stop, idle disconnect) - nothing left to queue into
+                self._queue(result)
+                if not self.player.is_playing and self.player.queue:
+                    await self.player.play()
+                await self._report()
+        finally:
+            for task in pending:
+                task.cancel()
+            self.finished_at = time.perf_counter()
+
+    def _queue(self, result: Optional[ResolvedTracks]):
+        if result is None or not result.blobs:
+            self.failed += 1
+            return
+        self.resolved += 1
+        if result.load_type == LoadType.PLAYLIST:
+            self.player.queue.extend(QueueEntry(blob, self.requester) for blob in result.blobs)
+            self.queued += len(result.blobs)
+        else:
+            self.player.queue.append(QueueEntry(result.blobs[0], self.requester))
+            self.queued += 1
+        if self.first_track_seconds is None:
+            self.first_track_seconds = time.perf_counter() - self.started_at
+
+    async def _report(self):
+        # Throttled: one message edit per interval however fast tracks resolve
+        now = time.perf_counter()
+        if self.progress is None or now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        await self.progress(self)
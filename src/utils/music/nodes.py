@@ -0,0 +1,136 @@
+"""
+Lavalink node pool
+Spreads players over every configured node by load, and spreads a dead node's players back out
+over the healthy ones instead of piling them onto a single replacement
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import lavalink
+from lavalink import ClientError, Node, NodeManager
+
+from utils.config import Config
+from utils.music.queue import QueuePlayer
+
+_log = logging.getLogger(__name__)
+
+
+class BalancedNodeManager(NodeManager):
+    """NodeManager whose node choice also counts players placed since each node's last stats report.
+
+    Lavalink only reports stats about once a minute, so a burst of new players (a startup wave,
+    a failover) would otherwise all see the same penalties and land on the same node.
+    """
+    __slots__ = ('_placed',)
+
+    def __init__(self, client, regions, connect_back: bool):
+        super().__init__(client, regions, connect_back)
+        self._placed: Dict[str, Tuple[object, int]] = {}  # node name -> (stats it was counted against, players)
+
+    def placed(self, node: Node) -> int:
+        """Players given to `node` since its current stats report arrived"""
+        stats, count = self._placed.get(node.name, (None, 0))
+        return count if stats is node.stats else 0
+
+    def load(self, node: Node) -> float:
+        # penalty = playing players + CPU + null/deficit frame penalties; each new player adds one point
+        return node.penalty + self.placed(node)
+
+    def region_for(self, rtc_region: Optional[str]) -> Optional[str]:
+        """Map a voice channel's RTC region to the node region it belongs to"""
+        if rtc_region:
+            for region, rtc_regions in self.regions.items():
+                if rtc_region in rtc_regions:
+                    return region
+        return None
+
+    def count_placement(self, node: Node, delta: int = 1):
+        """Count (or with -1, give back) a player placed on `node` against its current stats report"""
+        self._placed[node.name] = (node.stats, max(self.placed(node) + delta, 0))
+
+    def best_node(self, region: Optional[str] = None, exclude: Optional[Sequence[Node]] = None) -> Optional[Node]:
+        """The least loaded available node, preferring `region`; counts nothing"""
+        exclusions = exclude or []
+        nodes = [n for n in self.available_nodes if n not in exclusions]
+        if region:
+            nodes = [n for n in nodes if n.region == region] or nodes
+        return min(nodes, key=self.load) if nodes else None
+
+    def find_ideal_node(self, region: Optional[str] = None, exclude: Optional[Sequence[Node]] = None) -> Optional[Node]:
+        best = self.best_node(region, exclude)
+        if best is not None:
+            self.count_placement(best)
+        return best
+
+    async def _handle_node_disconnect(self, node: Node):
+        players = node.players
+        for player in players:
+            try:
+                await player.node_unavailable()
+            except Exception:
+                _log.exception('An error occurred whilst calling player.node_unavailable()')
+
+        if not any(n is not node for n in self.available_nodes):
+            self._player_queue.extend(players)
+            _log.warning('Unable to move %d players off node \'%s\', no available nodes', len(players), node.name)
+            return
+
+        # Each player picks its own target, so they spread by load; moves run concurrently
+        # (each is a couple of REST calls) instead of one after another
+        semaphore = asyncio.Semaphore(Config.MUSIC_FAILOVER_CONCURRENCY)
+
+        async def move(player):
+            target = self.best_node(node.region, exclude=[node])
+            if target is None:
+                self._player_queue.append(player)
+                return
+            # Counted before the move so concurrent moves spread out; given back if it fails
+            self.count_placement(target)
+            async with semaphore:
+                try:
+                    await player.change_node(target)  # resumes the current track at its last position
+                    if self._connect_back:
+                        player._original_node = node
+                except ClientError:
+                    self.count_placement(target, -1)
+                    _log.error('Failed to move player %d from node \'%s\' to \'%s\'', player.guild_id, node.name, target.name)
+
+        await asyncio.gather(*(move(player) for player in players))
+
+
+class MusicClient(lavalink.Client):
+    """lavalink.Client using BalancedNodeManager and QueuePlayer, with the nodes from Config.LAVALINK_NODES"""
+
+    def __init__(self, user_id: int):
+        super().__init__(user_id, player=QueuePlayer, connect_back=Config.LAVALINK_CONNECT_BACK)
+        self.node_manager = BalancedNodeManager(self, None, Config.LAVALINK_CONNECT_BACK)
+        for node in Config.LAVALINK_NODES:
+            self.add_node(
+                host=node["host"],
+                port=node["port"],
+                password=node["password"],
+                region=node.get("region", "us"),
+                name=node.get("name") or f"{node['host']}:{node['port']}",
+                ssl=node.get("ssl", False)
+            )
+
+    def node_summary(self) -> List[Dict]:
+        """Per-node load, as used for player placement"""
+        summary = []
+        for node in self.node_manager.nodes:
+            stats = node.stats
+            summary.append({
+                "name": node.name,
+                "region": node.region,
+                "available": node.available,
+                "players": len(node.players),
+                "playing": stats.playing_players if stats else 0,
+                "cpu": stats.system_load if stats else 0.0,
+                "deficit": stats.frames_deficit if stats else 0,
+                "nulled": stats.frames_nulled if stats else 0,
+                "penalty": node.penalty,
+                "placed": self.node_manager.placed(node)
+            })
+        return summary
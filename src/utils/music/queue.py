@@ -0,0 +1,304 @@
+"""
+Compact per-guild music queue
+Entries hold Lavalink's encoded track blob and little else; metadata is decoded only for the
+entries actually being played or displayed. Every queue operation works in place, and changes
+are recorded so the queue can be snapshotted to PostgreSQL incrementally.
+"""
+
+import base64
+from random import randrange
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import lavalink
+from lavalink import AudioTrack, DefaultPlayer, QueueEndEvent
+from lavalink.common import MISSING
+
+from utils.music.filters import FilterMixer
+
+LOOP_OFF = DefaultPlayer.LOOP_NONE
+LOOP_TRACK = DefaultPlayer.LOOP_SINGLE
+LOOP_QUEUE = DefaultPlayer.LOOP_QUEUE
+
+# Persisted sort keys are spaced out so a move can usually take a key between its neighbours
+KEY_STEP = 1 << 16
+# Popped slots at the front are reclaimed once there are this many and they are half the list
+_COMPACT_AFTER = 4096
+
+
+class QueueEntry:
+    """One queued track: the raw (base64-decoded) Lavalink track blob, who asked for it, and its sort key"""
+
+    __slots__ = ("blob", "requester", "key")
+
+    def __init__(self, blob: bytes, requester: int = 0, key: int = 0):
+        self.blob = blob
+        self.requester = requester
+        self.key = key
+
+    @classmethod
+    def from_track(cls, track: AudioTrack, requester: Optional[int] = None) -> "QueueEntry":
+        return cls(base64.b64decode(track.track), track.requester if requester is None else requester)
+
+    @property
+    def encoded(self) -> str:
+        return base64.b64encode(self.blob).decode()
+
+    def decode(self) -> AudioTrack:
+        """Full track metadata, decoded locally from the blob (no Lavalink round-trip)"""
+        track = lavalink.decode_track(self.encoded)
+        track.requester = self.requester
+        return track
+
+
+class TrackQueue:
+    """Upcoming tracks for one guild.
+
+    append / pop_next / peek and shuffle are O(1); a page costs only its own entries.
+    remove and move shift the tail in place (one pointer memmove, no per-entry work).
+
+    Shuffle is a lazy Fisher-Yates permutation over the entries present when it was requested:
+    a position is only drawn the first time it is played, shown or edited.
+    """
+
+    def __init__(self):
+        self._items: List[Optional[QueueEntry]] = []
+        self._head = 0            # index of the next entry; slots before it have been popped
+        self._shuffled = 0        # positions [_head, _shuffled) are settled
+        self._shuffle_end = 0     # positions [_shuffled, _shuffle_end) are still to be drawn
+        self.loop = LOOP_OFF
+        self._next_key = KEY_STEP
+
+        # Changes since the last snapshot: sort key -> entry to write, and sort keys to delete
+        self._upserts: Dict[int, QueueEntry] = {}
+        self._deletes: Set[int] = set()
+        self.rewrite = False      # the stored copy must be replaced wholesale
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def __bool__(self) -> bool:
+        return len(self._items) > self._head
+
+    @property
+    def dirty(self) -> bool:
+        return self.rewrite or bool(self._upserts) or bool(self._deletes)
+
+    @property
+    def shuffling(self) -> bool:
+        return self._shuffled < self._shuffle_end
+
+    # ---------- internals ---------- #
+    def _index(self, index: int) -> int:
+        if not 0 <= index < len(self):
+            raise IndexError("queue index out of range")
+        return self._head + index
+
+    def _settle(self, position: int):
+        """Draw shuffled positions up to and including absolute `position`"""
+        items = self._items
+        while self._shuffled <= position and self._shuffled < self._shuffle_end:
+            i = self._shuffled
+            j = randrange(i, self._shuffle_end)
+            if i != j:
+                a, b = items[i], items[j]
+                # Sort keys stay with the position, so the stored order follows the swap
+                a.key, b.key = b.key, a.key
+                items[i], items[j] = b, a
+                self._mark_upsert(a)
+                self._mark_upsert(b)
+            self._shuffled += 1
+
+    def _mark_upsert(self, entry: QueueEntry):
+        self._deletes.discard(entry.key)
+        self._upserts[entry.key] = entry
+
+    def _mark_delete(self, key: int):
+        self._upserts.pop(key, None)
+        self._deletes.add(key)
+
+    def _compact(self):
+        head = self._head
+        if head < _COMPACT_AFTER or head * 2 < len(self._items):
+            return
+        del self._items[:head]
+        self._head = 0
+        self._shuffled = max(0, self._shuffled - head)
+        self._shuffle_end = max(0, self._shuffle_end - head)
+
+    def _renumber(self):
+        for i, entry in enumerate(self._items[self._head:], start=1):
+            entry.key = i * KEY_STEP
+        self._next_key = (len(self) + 1) * KEY_STEP
+        self.rewrite = True
+        self._upserts.clear()
+        self._deletes.clear()
+
+    # ---------- operations ---------- #
+    def append(self, entry: QueueEntry):
+        entry.key = self._next_key
+        self._next_key += KEY_STEP
+        self._items.append(entry)
+        self._mark_upsert(entry)
+
+    def extend(self, entries: Iterable[QueueEntry]):
+        for entry in entries:
+            self.append(entry)
+
+    def pop_next(self) -> Optional[QueueEntry]:
+        if not self:
+            return None
+        head = self._head
+        self._settle(head)
+        entry = self._items[head]
+        self._items[head] = None
+        self._head += 1
+        self._mark_delete(entry.key)
+        self._compact()
+        return entry
+
+    def peek(self, index: int = 0) -> QueueEntry:
+        position = self._index(index)
+        self._settle(position)
+        return self._items[position]
+
+    def page(self, start: int, count: int) -> List[QueueEntry]:
+        """Entries [start, start + count), settling only those positions"""
+        start = max(0, start)
+        end = min(len(self), start + count)
+        if start >= end:
+            return []
+        self._settle(self._head + end - 1)
+        return self._items[self._head + start:self._head + end]
+
+    def remove(self, index: int) -> QueueEntry:
+        position = self._index(index)
+        self._settle(position)
+        entry = self._items.pop(position)
+        if self._shuffled > position:
+            self._shuffled -= 1
+        if self._shuffle_end > position:
+            self._shuffle_end -= 1
+        self._mark_delete(entry.key)
+        return entry
+
+    def move(self, source: int, destination: int) -> QueueEntry:
+        src = self._index(source)
+        dst = self._index(destination)
+        # Both ends settled, so the move stays inside the settled prefix
+        self._settle(max(src, dst))
+        entry = self._items.pop(src)
+        self._items.insert(dst, entry)
+        self._mark_delete(entry.key)
+
+        lower = self._items[dst - 1].key if dst > self._head else None
+        upper = self._items[dst + 1].key if dst + 1 < len(self._items) else None
+        if upper is None:
+            entry.key = self._next_key
+            self._next_key += KEY_STEP
+        elif lower is None:
+            entry.key = upper - KEY_STEP
+        elif upper - lower > 1:
+            entry.key = (lower + upper) // 2
+        else:
+            self._renumber()
+            return entry
+        self._mark_upsert(entry)
+        return entry
+
+    def shuffle(self):
+        """Shuffle everything queued now; tracks added later still play after them"""
+        self._shuffled = self._head
+        self._shuffle_end = len(self._items)
+
+    def clear(self):
+        self._items = []
+        self._head = self._shuffled = self._shuffle_end = 0
+        self._next_key = KEY_STEP
+        self.rewrite = True
+        self._upserts.clear()
+        self._deletes.clear()
+
+    def advance(self, current: Optional[QueueEntry]) -> Optional[QueueEntry]:
+        """The entry to play after `current`, applying the loop mode"""
+        if current is not None:
+            if self.loop == LOOP_TRACK:
+                return current
+            if self.loop == LOOP_QUEUE:
+                self.append(QueueEntry(current.blob, current.requester))
+        return self.pop_next()
+
+    # ---------- persistence ---------- #
+    def shuffle_state(self) -> Tuple[int, int]:
+        """Unsettled shuffle range, relative to the front of the queue"""
+        return max(0, self._shuffled - self._head), max(0, self._shuffle_end - self._head)
+
+    def take_changes(self) -> Tuple[bool, List[Tuple[int, bytes, int]], List[int]]:
+        """(replace everything?, rows to write, keys to delete) since the last call"""
+        if self.rewrite:
+            rows = [(entry.key, entry.blob, entry.requester) for entry in self._items[self._head:]]
+            deletes = []
+        else:
+            rows = [(key, entry.blob, entry.requester) for key, entry in self._upserts.items()]
+            deletes = list(self._deletes)
+        rewrite = self.rewrite
+        self.rewrite = False
+        self._upserts = {}
+        self._deletes = set()
+        return rewrite, rows, deletes
+
+    @classmethod
+    def restore(cls, rows: Iterable[Tuple[int, bytes, int]], shuffled: int = 0, shuffle_end: int = 0,
+                loop: int = LOOP_OFF) -> "TrackQueue":
+        """Rebuild from stored (key, blob, requester) rows in key order"""
+        queue = cls()
+        for key, blob, requester in rows:
+            queue._items.append(QueueEntry(bytes(blob), requester, key))
+        if queue._items:
+            queue._next_key = queue._items[-1].key + KEY_STEP
+        queue._shuffle_end = min(shuffle_end, len(queue._items))
+        queue._shuffled = min(shuffled, queue._shuffle_end)
+        queue.loop = loop
+        return queue
+
+
+class QueuePlayer(DefaultPlayer):
+    """DefaultPlayer whose queue is a TrackQueue; loop modes live on the queue"""
+
+    def __init__(self, guild_id: int, node):
+        super().__init__(guild_id, node)
+        self.queue = TrackQueue()
+        self.current_entry: Optional[QueueEntry] = None
+        self.mixer = FilterMixer(self)
+
+    def add(self, track, requester: int = 0, index: Optional[int] = None):
+        entry = track if isinstance(track, QueueEntry) else QueueEntry.from_track(track, requester or None)
+        self.queue.append(entry)
+        if index is not None:
+            self.queue.move(len(self.queue) - 1, index)
+
+    def set_loop(self, loop: int):
+        super().set_loop(loop)
+        self.queue.loop = loop
+
+    def set_shuffle(self, shuffle: bool):
+        # Shuffling is a one-off reorder of the TrackQueue, not a random pick on every advance
+        if shuffle:
+            self.queue.shuffle()
+
+    async def play(self, track=None, start_time: int = MISSING, **kwargs):
+        if track is None:
+            entry = self.queue.advance(self.current_entry if self.current else None)
+            if entry is None:
+                self.current_entry = None
+                await self.stop()
+                self.client._dispatch_event(QueueEndEvent(self))
+                return
+        else:
+            entry = track if isinstance(track, QueueEntry) else QueueEntry.from_track(track)
+        self.current_entry = entry
+        self._last_position = 0 if start_time is MISSING else start_time
+        self.position_timestamp = 0
+        response = await self.play_track(entry.decode(), start_time, **kwargs)
+        if response is not None:
+            self.paused = response['paused']
+            self.volume = response['volume']
@@ -0,0 +1,159 @@
+"""
+Track search/resolution cache for play
+Level 1 is an in-process LRU, level 2 a PostgreSQL table shared by every process; both expire
+after Config.MUSIC_SEARCH_CACHE_TTL. Identical lookups in flight at the same time share one
+Lavalink request.
+"""
+
+import asyncio
+import base64
+import time
+from typing import Dict, Optional, Tuple
+
+from lavalink import LoadType
+
+from utils.config import Config
+from utils.emotes import Emotes
+from utils.models.customutils import LRUCache, LatencyTracker, MusicSearchManager, DatabaseUnavailable
+
+
+def normalize_query(query: str) -> str:
+    """Cache key and node query: URLs as given, searches lowercased with whitespace collapsed"""
+    query = query.strip().strip('<>')
+    if query.startswith(("http://", "https://")):
+        return query
+    prefix, sep, text = query.partition(":")
+    # Explicit source searches (ytsearch:, scsearch:, ...) are kept; anything else uses the default
+    if not sep or not prefix.lower().endswith("search"):
+        prefix, text = Config.MUSIC_SEARCH_PREFIX, query
+    return f"{prefix.lower()}:{' '.join(text.lower().split())}"
+
+
+class ResolvedTracks:
+    """A load result reduced to what play needs: raw track blobs, ready for QueueEntry"""
+
+    __slots__ = ("load_type", "playlist_name", "blobs", "error")
+
+    def __init__(self, load_type: LoadType, playlist_name: Optional[str] = None,
+                 blobs: Tuple[bytes, ...] = (), error: Optional[str] = None):
+        self.load_type = load_type
+        self.playlist_name = playlist_name
+        self.blobs = blobs
+        self.error = error
+
+    @property
+    def cacheable(self) -> bool:
+        if self.load_type == LoadType.PLAYLIST:
+            return 0 < len(self.blobs) <= Config.MUSIC_SEARCH_CACHE_MAX_TRACKS
+        return self.load_type in (LoadType.TRACK, LoadType.SEARCH) and bool(self.blobs)
+
+
+class TrackResolver:
+    """Resolves play queries through memory, then PostgreSQL, then a Lavalink node"""
+
+    def __init__(self, client):
+        self.client = client
+        self.memory = LRUCache(Config.MUSIC_SEARCH_CACHE_SIZE)  # key -> (expires_at, ResolvedTracks)
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.latency = LatencyTracker()
+        self.lookups = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.node_loads = 0
+        self.collapsed = 0
+        self.node_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    async def resolve(self, query: str) -> ResolvedTracks:
+        key = normalize_query(query)
+        self.lookups += 1
+        start = time.perf_counter()
+
+        cached = self.memory.get(key)
+        if cached:
+            expires_at, result = cached
+            if expires_at > time.monotonic():
+                self.memory_hits += 1
+                self.hit_seconds += time.perf_counter() - start
+                return result
+            self.memory.invalidate(key)
+
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, start))
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.collapsed += 1
+        # Shielded: a cancelled caller doesn't cancel the lookup the others are waiting on
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self.inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here so an error nobody awaited isn't logged as lost
+
+    def _remember(self, key: str, result: ResolvedTracks, ttl: float):
+        self.memory.set(key, (time.monotonic() + ttl, result))
+
+    async def _load(self, key: str, start: float) -> ResolvedTracks:
+        try:
+            row = await MusicSearchManager.get(key)
+        except DatabaseUnavailable:
+            row = None
+        if row:
+            result = ResolvedTracks(LoadType(row["load_type"]), row["playlist_name"],
+                                    tuple(bytes(blob) for blob in row["tracks"]))
+            self._remember(key, result, min(row["ttl"], Config.MUSIC_SEARCH_CACHE_TTL))
+            self.db_hits += 1
+            self.hit_seconds += time.perf_counter() - start
+            return result
+
+        node_start = time.perf_counter()
+        results = await self.client.get_tracks(key)
+        elapsed = time.perf_counter() - node_start
+        self.node_loads += 1
+        self.node_seconds += elapsed
+        self.latency.record("node", elapsed)
+
+        tracks = results.tracks
+        if results.load_type == LoadType.SEARCH:
+            tracks = tracks[:Config.MUSIC_SEARCH_CACHE_RESULTS]
+        result = ResolvedTracks(
+            results.load_type,
+            results.playlist_info.name if results.load_type == LoadType.PLAYLIST else None,
+            tuple(base64.b64decode(track.track) for track in tracks),
+            results.error.message if results.error else None
+        )
+        if result.cacheable:
+            self._remember(key, result, Config.MUSIC_SEARCH_CACHE_TTL)
+            asyncio.create_task(self._store(key, result, [track.identifier for track in tracks]))
+        return result
+
+    async def _store(self, key: str, result: ResolvedTracks, identifiers):
+        try:
+            await MusicSearchManager.put(key, result.load_type.value, result.playlist_name, identifiers,
+                                         list(result.blobs), Config.MUSIC_SEARCH_CACHE_TTL)
+        except DatabaseUnavailable:
+            pass
+        except Exception as e:
+            print(f"{Emotes.ERROR} Failed to store search cache entry: {e}")
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.db_hits
+        node_avg = self.node_seconds / self.node_loads if self.node_loads else 0.0
+        return {
+            "lookups": self.lookups,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "node_loads": self.node_loads,
+            "collapsed": self.collapsed,
+            # Share of lookups that didn't need a node request of their own
+            "hit_rate": (hits + self.collapsed) / self.lookups if self.lookups else 0.0,
+            "cached": len(self.memory),
+            "node_avg_ms": node_avg * 1000,
+            "node_p99_ms": self.latency.percentiles().get("node", {}).get("p99_ms", 0.0),
+            "hit_avg_ms": self.hit_seconds / hits * 1000 if hits else 0.0,
+            # Each hit (and each collapsed lookup) would otherwise have cost an average node load
+            "saved_seconds": max(0.0, (hits + self.collapsed) * node_avg - self.hit_seconds)
+        }
@@ -0,0 +1,70 @@
+"""
+Startup helpers - a boot timeline report and an app-command tree fingerprint for skipping redundant syncs
+"""
+
+import discord
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class StartupTimeline:
+    """Offsets and durations of each startup stage, measured from process boot"""
+
+    def __init__(self, origin: float):
+        self.origin = origin
+        self.entries: List[Tuple[str, float, float]] = []  # (name, offset, duration)
+        self.reported = False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entries.append((name, start - self.origin, time.perf_counter() - start))
+
+    def record(self, name: str, start: float, end: float):
+        self.entries.append((name, start - self.origin, end - start))
+
+    def mark(self, name: str):
+        self.entries.append((name, time.perf_counter() - self.origin, 0.0))
+
+    def report(self) -> str:
+        lines = [f"{'offset':>9}  {'took':>8}  stage"]
+        for name, offset, duration in sorted(self.entries, key=lambda entry: entry[1]):
+            took = f"{duration:7.3f}s" if duration else "       -"
+            lines.append(f"{offset:8.3f}s  {took}  {name}")
+        return "\n".join(lines)
+
+
+# ====================== COMMAND TREE FINGERPRINT ====================== #
+def command_tree_digest(tree: discord.app_commands.CommandTree) -> str:
+    """SHA-256 of the global commands exactly as they would be sent to Discord"""
+    payload = [command.to_dict() for command in tree.get_commands()]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class CommandSyncCache:
+    """Remembers the last synced tree digest per application, on local disk"""
+
+    def __init__(self, path: str):
+        path = Path(path)
+        self.path = path if path.is_absolute() else _PROJECT_ROOT / path
+
+    def last_digest(self, application_id: Optional[int]) -> Optional[str]:
+        try:
+            stored_id, _, digest = self.path.read_text().strip().partition(":")
+        except OSError:
+            return None
+        return digest if stored_id == str(application_id) else None
+
+    def save(self, application_id: Optional[int], digest: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(f"{application_id}:{digest}\n")
@@ -0,0 +1,173 @@
+"""
+Streaming ticket transcript exporter
+Walks channel history page by page into a spooled temp file, so memory stays flat
+"""
+
+import discord
+import functools
+import gzip
+import html
+import io
+import shutil
+import tempfile
+from typing import List
+
+from utils.config import Config
+
+TEXT = "txt"
+HTML = "html"
+
+_HTML_HEADER = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ background: #313338; color: #dbdee1; font-family: Helvetica, Arial, sans-serif; margin: 0; padding: 16px; }}
+h1 {{ font-size: 18px; border-bottom: 1px solid #4e5058; padding-bottom: 8px; }}
+.msg {{ padding: 6px 0; border-bottom: 1px solid #3f4147; }}
+.author {{ font-weight: bold; color: #f2f3f5; }}
+.time, .edited {{ color: #949ba4; font-size: 12px; margin-left: 6px; }}
+.content {{ white-space: pre-wrap; margin-top: 2px; }}
+.embed {{ border-left: 4px solid #5865f2; background: #2b2d31; padding: 6px 10px; margin-top: 4px; }}
+.attachment a {{ color: #00a8fc; }}
+</style></head><body>
+<h1>{title}</h1>
+"""
+_HTML_FOOTER = "</body></html>\n"
+
+
+class TranscriptExporter:
+    """Exports a channel's full history as text or self-contained HTML, optionally gzipped"""
+
+    def __init__(self, channel: discord.TextChannel, fmt: str = TEXT, compress: bool = False):
+        self.channel = channel
+        self.fmt = fmt
+        self.compress = compress
+        self.message_count = 0
+
+    @property
+    def filename(self) -> str:
+        name = f"transcript-{self.channel.name}.{self.fmt}"
+        return f"{name}.gz" if self.compress else name
+
+    async def export(self) -> tempfile.SpooledTemporaryFile:
+        """Write the transcript and return the spooled file rewound to the start"""
+        spool = tempfile.SpooledTemporaryFile(max_size=Config.TRANSCRIPT_SPOOL_SIZE)
+        sink = gzip.GzipFile(fileobj=spool, mode="wb") if self.compress else spool
+
+        if self.fmt == HTML:
+            sink.write(_HTML_HEADER.format(title=html.escape(f"#{self.channel.name}")).encode())
+
+        # history() fetches 100 messages per request; nothing is held beyond the current page
+        async for message in self.channel.history(limit=None, oldest_first=True):
+            render = self._render_html if self.fmt == HTML else self._render_text
+            await self.on_message(message)
+            sink.write(render(message).encode())
+            self.message_count += 1
+
+        if self.fmt == HTML:
+            sink.write(_HTML_FOOTER.encode())
+        if self.compress:
+            sink.close()  # flushes the gzip trailer, leaves the spool open
+        spool.seek(0)
+        return spool
+
+    async def on_message(self, message: discord.Message):
+        """Hook for subclasses that need to see each message as it streams past, before it's rendered"""
+        pass
+
+    # ---------- rendering ---------- #
+    @staticmethod
+    def _render_text(message: discord.Message) -> str:
+        lines = [f"[{message.created_at.strftime('%Y-%m-%d %H:%M:%S')}] {message.author}: {message.content}"]
+        if message.edited_at:
+            lines[0] += f" (edited {message.edited_at.strftime('%Y-%m-%d %H:%M:%S')})"
+        for embed in message.embeds:
+            parts = [p for p in (embed.title, embed.description) if p]
+            parts += [f"{field.name}: {field.value}" for field in embed.fields]
+            lines.append(f"    [Embed] {' | '.join(parts)}")
+        for attachment in message.attachments:
+            lines.append(f"    [Attachment] {attachment.filename} ({attachment.size} bytes) {attachment.url}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_html(message: discord.Message) -> str:
+        out = [
+            '<div class="msg">',
+            f'<span class="author">{html.escape(str(message.author))}</span>',
+            f'<span class="time">{message.created_at.strftime("%Y-%m-%d %H:%M:%S")}</span>'
+        ]
+        if message.edited_at:
+            out.append(f'<span class="edited">(edited {message.edited_at.strftime("%Y-%m-%d %H:%M:%S")})</span>')
+        if message.content:
+            out.append(f'<div class="content">{html.escape(message.content)}</div>')
+        for embed in message.embeds:
+            body = []
+            if embed.title:
+                body.append(f"<b>{html.escape(embed.title)}</b>")
+            if embed.description:
+                body.append(f'<div class="content">{html.escape(embed.description)}</div>')
+            for field in embed.fields:
+                body.append(f"<div><b>{html.escape(field.name)}</b>: {html.escape(field.value)}</div>")
+            out.append(f'<div class="embed">{"".join(body)}</div>')
+        for attachment in message.attachments:
+            out.append(
+                f'<div class="attachment">📎 <a href="{html.escape(attachment.url)}">'
+                f'{html.escape(attachment.filename)}</a> ({attachment.size} bytes)</div>'
+            )
+        out.append("</div>\n")
+        return "".join(out)
+
+
+def file_size(spool) -> int:
+    spool.seek(0, io.SEEK_END)
+    size = spool.tell()
+    spool.seek(0)
+    return size
+
+
+def gzip_spool(spool) -> tempfile.SpooledTemporaryFile:
+    """Stream-compress an existing spooled file into a new one"""
+    compressed = tempfile.SpooledTemporaryFile(max_size=Config.TRANSCRIPT_SPOOL_SIZE)
+    with gzip.GzipFile(fileobj=compressed, mode="wb") as sink:
+        shutil.copyfileobj(spool, sink)
+    spool.close()
+    compressed.seek(0)
+    return compressed
+
+
+def part_names(filename: str, size: int, limit: int) -> List[str]:
+    """Names for each upload-sized part; a file under the limit keeps its name"""
+    if size <= limit:
+        return [filename]
+    total = -(-size // limit)
+    return [f"{filename}.part{i + 1}of{total}" for i in range(total)]
+
+
+async def send_transcript(interaction: discord.Interaction, exporter: TranscriptExporter, content: str):
+    """Export and upload a transcript, compressing and splitting to fit the guild's upload limit"""
+    spool = await exporter.export()
+    limit = interaction.guild.filesize_limit
+    filename = exporter.filename
+
+    if file_size(spool) > limit and not exporter.compress:
+        spool = gzip_spool(spool)
+        filename += ".gz"
+
+    try:
+        send = functools.partial(interaction.followup.send, ephemeral=True)
+        await upload_parts(send, spool, filename, file_size(spool), limit, content)
+    finally:
+        spool.close()
+
+
+async def upload_parts(send, fp, filename: str, size: int, limit: int, content: str):
+    """Upload a file through `send` (ctx.send or a followup), split into upload-sized parts if needed"""
+    parts = part_names(filename, size, limit)
+    if len(parts) == 1:
+        await send(content, file=discord.File(fp, filename=filename))
+        return
+
+    await send(f"{content} (split into {len(parts)} parts - join them in order)")
+    for name in parts:
+        # Only one part is ever held in memory
+        chunk = io.BytesIO(fp.read(limit))
+        await send(file=discord.File(chunk, filename=name))
@@ -0,0 +1,62 @@
+"""
+Plan regression checks - the open-ticket queries must keep using their partial indexes
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from utils.models.queries import QUERIES
+
+asyncpg = pytest.importorskip("asyncpg")
+
+TICKETS = 100_000  # 1% open, spread over 200 guilds; most closed tickets already purged
+
+SEED = f"""
+    INSERT INTO tickets (guild_id, user_id, channel_id, ticket_number, status, created_at, closed_at, purged_at)
+    SELECT 1000 + (g / 100) % 200,
+           5000 + g,
+           1000000000000 + g,
+           g,
+           (CASE WHEN g % 100 = 0 THEN 'open' ELSE 'closed' END)::ticket_status,
+           CURRENT_TIMESTAMP - g * INTERVAL '1 minute',
+           CASE WHEN g % 100 = 0 THEN NULL ELSE CURRENT_TIMESTAMP - g * INTERVAL '30 seconds' END,
+           CASE WHEN g % 100 = 0 OR g % 10 = 1 THEN NULL ELSE CURRENT_TIMESTAMP END
+    FROM generate_series(1, {TICKETS}) AS g;
+    ANALYZE tickets;
+"""
+
+# Guild 1005 owns tickets 500..599; ticket 500 (user 5500) is open
+CASES = [
+    ("ticket_by_user", (1005, 5500), "idx_open_user"),
+    ("ticket_open_list", (1005,), "idx_open_guild"),
+    ("ticket_sweep_batch", (0, None, 500, None, None), "idx_sweep_open"),
+]
+
+
+def index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+async def explain_all(dsn: str, schema: str) -> dict:
+    conn = await asyncpg.connect(dsn, server_settings={"search_path": schema})
+    try:
+        await conn.execute(SEED)
+        plans = {}
+        for name, args, _ in CASES:
+            raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {QUERIES[name]}", *args)
+            plans[name] = json.loads(raw)[0]["Plan"]
+        return plans
+    finally:
+        await conn.close()
+
+
+def test_open_ticket_queries_use_partial_indexes(pg_schema):
+    plans = asyncio.run(explain_all(*pg_schema))
+    for name, _, index in CASES:
+        used = index_names(plans[name])
+        assert index in used, f"{name} no longer uses {index} (plan uses {sorted(used) or 'no index'})"
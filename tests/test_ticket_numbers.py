@@ -0,0 +1,40 @@
+"""
+Ticket number allocation under contention - every number unique, no gaps, per guild
+"""
+
+import asyncio
+
+import pytest
+
+from utils.models.queries import QUERIES
+
+asyncpg = pytest.importorskip("asyncpg")
+
+GUILDS = (101, 202, 303)
+ALLOCATIONS_PER_GUILD = 300
+POOL_SIZE = 20
+
+
+async def allocate_concurrently(dsn: str, schema: str) -> dict:
+    pool = await asyncpg.create_pool(dsn, min_size=POOL_SIZE, max_size=POOL_SIZE,
+                                     server_settings={"search_path": schema})
+    try:
+        async def allocate(guild_id: int):
+            async with pool.acquire() as conn:
+                return guild_id, await conn.fetchval(QUERIES["ticket_next_number"], guild_id)
+
+        # Interleaved across guilds so the first INSERT of each counter row races too
+        jobs = [allocate(guild_id) for _ in range(ALLOCATIONS_PER_GUILD) for guild_id in GUILDS]
+        numbers = {guild_id: [] for guild_id in GUILDS}
+        for guild_id, number in await asyncio.gather(*jobs):
+            numbers[guild_id].append(number)
+        return numbers
+    finally:
+        await pool.close()
+
+
+def test_concurrent_allocations_are_unique_and_gapless(pg_schema):
+    numbers = asyncio.run(allocate_concurrently(*pg_schema))
+    for guild_id, allocated in numbers.items():
+        assert len(allocated) == ALLOCATIONS_PER_GUILD
+        assert sorted(allocated) == list(range(1, ALLOCATIONS_PER_GUILD + 1)), f"guild {guild_id}"